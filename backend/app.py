@@ -1,7 +1,16 @@
 from flask import Blueprint
+from backend.db.session import close_request_session, commit_request_session
+from backend.utils.upload_utils import MAX_REQUEST_BYTES
 
 
 routes_bp = Blueprint("mlclient", __name__)
 
+# One database session per request: committed before the response is sent, rolled back on error, closed at teardown
+routes_bp.after_app_request(commit_request_session)
+routes_bp.teardown_app_request(close_request_session)
 
-
+# The app that mounts these routes gets a MAX_CONTENT_LENGTH, so werkzeug rejects oversized bodies with a 413 while parsing
+@routes_bp.record_once
+def limit_request_size(state):
+  if state.app.config.get("MAX_CONTENT_LENGTH") is None:
+    state.app.config["MAX_CONTENT_LENGTH"] = MAX_REQUEST_BYTES
@@ -0,0 +1,302 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Iterator
+from threading import BoundedSemaphore, Lock
+from weakref import WeakKeyDictionary
+from functools import lru_cache
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+import openai
+import tiktoken
+import asyncio
+import logging
+import random
+import httpx
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+# Point this at any OpenAI-compatible server, e.g. a local fake for load tests
+BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "4"))
+REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+# A second identical request starts if the first has not answered by then; 0 disables hedging
+HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+# Completion tokens budgeted up front; the bucket is corrected with the real usage afterwards
+EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "800"))
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+
+
+class LLMUnavailableError(RuntimeError):
+  def __init__(self, message: str, retry_after: float | None = None):
+    super().__init__(message)
+    self.retry_after = retry_after
+
+
+# Reservation-based bucket: callers take capacity immediately (possibly going into debt) and are told how long to wait,
+# so waiters are served in arrival order without polling
+class TokenBucket:
+  def __init__(self, per_minute: int):
+    self.capacity = float(per_minute)
+    self.rate = per_minute / 60.0
+    self._level = self.capacity
+    self._updated = time.monotonic()
+    self._lock = Lock()
+
+  def reserve(self, amount: float) -> float:
+    with self._lock:
+      now = time.monotonic()
+      self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+      self._updated = now
+      self._level -= min(amount, self.capacity)
+      return 0.0 if self._level >= 0 else -self._level / self.rate
+
+  def adjust(self, amount: float) -> None:
+    with self._lock:
+      self._level = min(self.capacity, self._level - amount)
+
+
+@lru_cache(maxsize = None)
+def _encoding(model: str):
+  # tiktoken downloads its BPE files on first use; without network access fall back to ~4 characters per token
+  try:
+    try:
+      return tiktoken.encoding_for_model(model)
+    except KeyError:
+      return tiktoken.get_encoding("o200k_base")
+  except Exception as e:
+    logger.warning("tiktoken encoding for %s unavailable, estimating tokens from length: %s", model, e)
+    return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+  encoding = _encoding(model)
+  return len(encoding.encode(text, disallowed_special = ())) if encoding else len(text) // 4 + 1
+
+
+# The longest prefix of text that is at most `limit` tokens
+def truncate_tokens(text: str, limit: int, model: str = "gpt-4o-mini") -> str:
+  encoding = _encoding(model)
+  if not encoding:
+    return text[:max(limit - 1, 0) * 4]
+  return encoding.decode(encoding.encode(text, disallowed_special = ())[:max(limit, 0)])
+
+
+def _backoff(attempt: int, error: Exception) -> float:
+  response = getattr(error, "response", None)
+  retry_after = response.headers.get("retry-after") if response is not None else None
+  if retry_after:
+    try:
+      return min(MAX_BACKOFF_SECONDS, float(retry_after))
+    except ValueError:
+      pass
+  # Full jitter keeps a burst of 429s from retrying in lockstep
+  return random.uniform(0, min(MAX_BACKOFF_SECONDS, BACKOFF_SECONDS * 2 ** attempt))
+
+
+class LLMGateway:
+  def __init__(self):
+    self.requests = TokenBucket(REQUESTS_PER_MINUTE)
+    self.tokens = TokenBucket(TOKENS_PER_MINUTE)
+    self._slots = BoundedSemaphore(MAX_CONCURRENCY)
+    self._loops = WeakKeyDictionary()
+    self._hedges = ThreadPoolExecutor(max_workers = MAX_CONCURRENCY, thread_name_prefix = "llm-hedge")
+    self._lock = Lock()
+    self._models = {}
+
+    self._limits = httpx.Limits(max_connections = MAX_CONNECTIONS, max_keepalive_connections = MAX_CONNECTIONS, keepalive_expiry = 60)
+    self.http_client = httpx.Client(limits = self._limits, timeout = REQUEST_TIMEOUT)
+
+  def _client_model(self, model: str, temperature: float, **clients) -> ChatOpenAI:
+    return ChatOpenAI(model = model, temperature = temperature, base_url = BASE_URL, max_retries = 0, stream_usage = True, **clients)
+
+  def chat_model(self, model: str, temperature: float = 0) -> "GatewayChatModel":
+    with self._lock:
+      key = (model, temperature)
+      if key not in self._models:
+        inner = self._client_model(model, temperature, http_client = self.http_client)
+        self._models[key] = GatewayChatModel(inner = inner, gateway = self)
+      return self._models[key]
+
+  # Pooled async connections belong to the event loop that opened them, so each loop gets its own client and limiter
+  def _loop_state(self) -> dict:
+    loop = asyncio.get_running_loop()
+    with self._lock:
+      if loop not in self._loops:
+        self._loops[loop] = {
+          "slots": asyncio.Semaphore(MAX_CONCURRENCY),
+          "client": httpx.AsyncClient(limits = self._limits, timeout = REQUEST_TIMEOUT),
+          "models": {}
+        }
+      return self._loops[loop]
+
+  def async_model(self, model: str, temperature: float) -> ChatOpenAI:
+    state = self._loop_state()
+    key = (model, temperature)
+    if key not in state["models"]:
+      state["models"][key] = self._client_model(model, temperature, http_async_client = state["client"])
+    return state["models"][key]
+
+  def estimate_tokens(self, model: str, messages: list[BaseMessage]) -> int:
+    # ~4 tokens of chat framing per message
+    return sum(count_tokens(str(m.content), model) + 4 for m in messages) + EXPECTED_OUTPUT_TOKENS
+
+  def _reserve(self, estimate: int) -> float:
+    return max(self.requests.reserve(1), self.tokens.reserve(estimate))
+
+  def _settle(self, estimate: int, message: BaseMessage) -> None:
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+      self.tokens.adjust(usage["total_tokens"] - estimate)
+
+  def _attempt(self, call, estimate: int):
+    time.sleep(self._reserve(estimate))
+    with self._slots:
+      message = call()
+    self._settle(estimate, message)
+    return message
+
+  def _hedged(self, call, estimate: int):
+    if HEDGE_AFTER_SECONDS <= 0:
+      return self._attempt(call, estimate)
+
+    first = self._hedges.submit(self._attempt, call, estimate)
+    done, _ = wait([first], timeout = HEDGE_AFTER_SECONDS)
+    if done:
+      return first.result()
+
+    # The slower request cannot be cancelled mid-flight; its answer is simply dropped
+    second = self._hedges.submit(self._attempt, call, estimate)
+    done, _ = wait([first, second], return_when = FIRST_COMPLETED)
+    winner = next(iter(done))
+    if winner.exception() is None:
+      return winner.result()
+    other = second if winner is first else first
+    return other.result()
+
+  def call(self, model: str, messages: list[BaseMessage], call):
+    estimate = self.estimate_tokens(model, messages)
+
+    for attempt in range(MAX_ATTEMPTS):
+      try:
+        return self._hedged(call, estimate)
+      except RETRYABLE_ERRORS as e:
+        if attempt == MAX_ATTEMPTS - 1:
+          raise LLMUnavailableError(f"LLM request failed after {MAX_ATTEMPTS} attempts: {e}", _backoff(attempt, e)) from e
+        delay = _backoff(attempt, e)
+        logger.warning("LLM call failed (%s), retry %d in %.2fs", type(e).__name__, attempt + 1, delay)
+        time.sleep(delay)
+
+  async def _aattempt(self, acall, estimate: int):
+    await asyncio.sleep(self._reserve(estimate))
+    async with self._loop_state()["slots"]:
+      message = await acall()
+    self._settle(estimate, message)
+    return message
+
+  async def _ahedged(self, acall, estimate: int):
+    if HEDGE_AFTER_SECONDS <= 0:
+      return await self._aattempt(acall, estimate)
+
+    first = asyncio.ensure_future(self._aattempt(acall, estimate))
+    done, _ = await asyncio.wait([first], timeout = HEDGE_AFTER_SECONDS)
+    if done:
+      return first.result()
+
+    second = asyncio.ensure_future(self._aattempt(acall, estimate))
+    pending = {first, second}
+    error = None
+    while pending:
+      done, pending = await asyncio.wait(pending, return_when = asyncio.FIRST_COMPLETED)
+      for task in done:
+        if task.exception() is None:
+          for loser in pending:
+            loser.cancel()
+          return task.result()
+        error = task.exception()
+    raise error
+
+  async def acall(self, model: str, messages: list[BaseMessage], acall):
+    estimate = self.estimate_tokens(model, messages)
+
+    for attempt in range(MAX_ATTEMPTS):
+      try:
+        return await self._ahedged(acall, estimate)
+      except RETRYABLE_ERRORS as e:
+        if attempt == MAX_ATTEMPTS - 1:
+          raise LLMUnavailableError(f"LLM request failed after {MAX_ATTEMPTS} attempts: {e}", _backoff(attempt, e)) from e
+        delay = _backoff(attempt, e)
+        logger.warning("LLM call failed (%s), retry %d in %.2fs", type(e).__name__, attempt + 1, delay)
+        await asyncio.sleep(delay)
+
+  def stream(self, model: str, messages: list[BaseMessage], open_stream) -> Iterator[AIMessageChunk]:
+    # Streams are not hedged or retried once the first chunk has arrived, since the caller has already seen output
+    estimate = self.estimate_tokens(model, messages)
+
+    for attempt in range(MAX_ATTEMPTS):
+      time.sleep(self._reserve(estimate))
+      final = None
+      try:
+        with self._slots:
+          for chunk in open_stream():
+            final = chunk if final is None else final + chunk
+            yield chunk
+        if final is not None:
+          self._settle(estimate, final)
+        return
+      except RETRYABLE_ERRORS as e:
+        if final is not None or attempt == MAX_ATTEMPTS - 1:
+          raise LLMUnavailableError(f"LLM stream failed: {e}", _backoff(attempt, e)) from e
+        time.sleep(_backoff(attempt, e))
+
+
+# Drop-in chat model for prompt | llm | parser chains; every call goes through the shared gateway
+class GatewayChatModel(BaseChatModel):
+  inner: ChatOpenAI
+  gateway: Any
+
+  @property
+  def _llm_type(self) -> str:
+    return "gateway-openai"
+
+  @property
+  def model_name(self) -> str:
+    return self.inner.model_name
+
+  def _generate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager = None, **kwargs) -> ChatResult:
+    message = self.gateway.call(self.model_name, messages, lambda: self.inner.invoke(messages, stop = stop, **kwargs))
+    return ChatResult(generations = [ChatGeneration(message = message)])
+
+  async def _agenerate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager = None, **kwargs) -> ChatResult:
+    message = await self.gateway.acall(self.model_name, messages, lambda: self.gateway.async_model(self.model_name, self.inner.temperature).ainvoke(messages, stop = stop, **kwargs))
+    return ChatResult(generations = [ChatGeneration(message = message)])
+
+  def _stream(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager = None, **kwargs) -> Iterator[ChatGenerationChunk]:
+    for chunk in self.gateway.stream(self.model_name, messages, lambda: self.inner.stream(messages, stop = stop, **kwargs)):
+      if run_manager:
+        run_manager.on_llm_new_token(chunk.content, chunk = chunk)
+      yield ChatGenerationChunk(message = chunk)
+
+
+_gateway = None
+_gateway_lock = Lock()
+
+def get_gateway() -> LLMGateway:
+  global _gateway
+
+  with _gateway_lock:
+    if _gateway is None:
+      _gateway = LLMGateway()
+    return _gateway
+
+def chat_model(model: str, temperature: float = 0) -> GatewayChatModel:
+  return get_gateway().chat_model(model, temperature)
@@ -1,11 +1,32 @@
-from resume_extractor import get_resume_extractor_chain
-from resume_analyzer import get_analysis_result_chain
-from resume_writer import get_written_human_output
+from backend.chains import resume_extractor, resume_analyzer, resume_writer
+from backend.chains.resume_extractor import get_resume_extractor_chain
+from backend.chains.resume_analyzer import get_analysis_result_chain
+from backend.chains.resume_writer import get_written_human_output, stream_written_human_output
+from backend.utils.skill_matcher import prescore
+import hashlib
 
-def run_resume_pipeline(resume_text: str, jd_text: str, store_intermediate: bool = False, store_all: bool = True):
-  extraction = get_resume_extractor_chain(resume_text)
-  analyzed = get_analysis_result_chain(extraction, jd_text)
-  human_ready = get_written_human_output(analyzed)
+# Changes whenever any of the three prompts, parsers or models changes
+PIPELINE_VERSION = hashlib.sha256(
+  "\0".join([resume_extractor.PROMPT_VERSION, resume_analyzer.PROMPT_VERSION, resume_writer.PROMPT_VERSION]).encode("utf-8")
+).hexdigest()[:16]
+
+def run_resume_pipeline(resume_text: str, jd_text: str, store_intermediate: bool = False, store_all: bool = True, on_stage = None, extraction = None, on_writer_delta = None):
+  # A stored extraction of the same resume skips the extractor call
+  if extraction is None:
+    extraction = get_resume_extractor_chain(resume_text)
+  if on_stage:
+    on_stage("extracted", {"extracted": extraction.dict()})
+
+  analyzed = get_analysis_result_chain(extraction, jd_text, prescore(resume_text, jd_text).describe())
+  if on_stage:
+    on_stage("analyzed", {"analysis": analyzed.dict()})
+
+  if on_writer_delta:
+    human_ready = stream_written_human_output(analyzed, on_writer_delta)
+  else:
+    human_ready = get_written_human_output(analyzed)
+  if on_stage:
+    on_stage("written", {"written": human_ready.dict()})
 
   if not store_intermediate:
     return human_ready.dict()
@@ -1,25 +1,29 @@
-from langchain.prompts import ChatPromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from langchain_openai import ChatOpenAI
 from backend.schemas.extractor_schema import ExtractedResume
+from backend.chains.versioning import chain_fingerprint
+from backend.chains.llm_gateway import chat_model
+from backend.chains.structured_output import build_prompt, structured_chain
 
-parser = PydanticOutputParser(pydantic_object = ExtractedResume)
-
-prompt = ChatPromptTemplate.from_messages([
-  ("system", """You are a precise information extractor that pulls structured data from resumes. Always extract the candidate's name, skills, experiences, education, certifications, and a brief summary of their background. 
+prompt = build_prompt(
+  """You are a precise information extractor that pulls structured data from resumes. Always extract the candidate's name, skills, experiences, education, certifications, and a brief summary of their background. 
   Do not add information that is not present in the resume. 
-  Return output strictly in the structured format provided."""),
-  
-  ("user", """Extract the requested structured information from the resume text below. 
+  Return output strictly in the structured format provided.""",
+
+  """Extract the requested structured information from the resume text below. 
   Ensure all fields (name, skills, experiences, education, certifications, summary) are filled accurately using only the information in the resume.
 
   Resume text:
-  {resume_text}
+  {resume_text}""",
+
+  ExtractedResume
+)
+
+MODEL_NAME = "gpt-4o-mini"
+
+llm = chat_model(MODEL_NAME, temperature = 0)
 
-  {format_instructions}"""),
-  ]).partial(format_instructions=parser.get_format_instructions())
+PROMPT_VERSION = chain_fingerprint(prompt, MODEL_NAME, ExtractedResume)
 
-llm = ChatOpenAI(model = "gpt-4o-mini", temperature = 0)
+chain = structured_chain(prompt, llm, ExtractedResume)
 
 def get_resume_extractor_chain(resume_text: str) -> ExtractedResume:
-  return (prompt | llm | parser).invoke({"resume_text": resume_text})
\ No newline at end of file
+  return chain.invoke({"resume_text": resume_text})
\ No newline at end of file
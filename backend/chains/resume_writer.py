@@ -1,18 +1,22 @@
-from langchain.prompts import ChatPromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from langchain_openai import ChatOpenAI
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.outputs import Generation
 from backend.schemas.writer_schema import WriterOutput
+from backend.chains.versioning import chain_fingerprint
+from backend.chains.llm_gateway import chat_model
+from backend.chains.structured_output import build_prompt, parse_streamed, structured_chain, streaming_llm
 
-parser = PydanticOutputParser(pydantic_object = WriterOutput)
+# Parses the partial JSON object after every streamed token
+stream_parser = JsonOutputParser(pydantic_object = WriterOutput)
 
-prompt = ChatPromptTemplate.from_messages([
-  ("system", """You are a professional career advisor and report writer. Your task is to transform structured analysis data about a candidate's resume versus a job description into a clear, concise, and human-friendly report. 
+prompt = build_prompt(
+  """You are a professional career advisor and report writer. Your task is to transform structured analysis data about a candidate's resume versus a job description into a clear, concise, and human-friendly report. 
   Maintain a professional and approachable tone. 
   Do not add new facts; only reframe the information provided. 
   Ensure the report is easy to read for recruiters and candidates, with actionable recommendations and a clear overall rating.
-  """),
+  """,
 
-  ("user", """Using the structured analysis data below, produce a polished, human-readable report. 
+  """Using the structured analysis data below, produce a polished, human-readable report. 
   The report should be easy for both recruiters and candidates to understand. 
   Include the following sections:
 
@@ -22,12 +26,43 @@ prompt = ChatPromptTemplate.from_messages([
 
   Analysis Data:
   {analysis_result}
+  """,
 
-  {format_instructions}
-  """)
-]).partial(format_instructions = parser.get_format_instructions())
+  WriterOutput
+)
 
-llm = ChatOpenAI(model = "gpt-4o-mini", temperature = 0)
+MODEL_NAME = "gpt-4o-mini"
+
+llm = chat_model(MODEL_NAME, temperature = 0)
+
+PROMPT_VERSION = chain_fingerprint(prompt, MODEL_NAME, WriterOutput)
+
+chain = structured_chain(prompt, llm, WriterOutput)
 
 def get_written_human_output(analysis_result: str) -> WriterOutput:
-  return (prompt | llm | parser).invoke({"analysis_result": analysis_result})
\ No newline at end of file
+  return chain.invoke({"analysis_result": analysis_result})
+
+def stream_written_human_output(analysis_result: str, on_delta) -> WriterOutput:
+  messages = prompt.invoke({"analysis_result": analysis_result}).to_messages()
+  sent = {}
+  message = None
+
+  for chunk in streaming_llm(llm, WriterOutput).stream(messages):
+    message = chunk if message is None else message + chunk
+    partial = stream_parser.parse_result([Generation(text = message.content)], partial = True)
+    if not isinstance(partial, dict):
+      continue
+
+    for field, value in partial.items():
+      if not isinstance(value, str) or value == sent.get(field):
+        continue
+      previous = sent.get(field, "")
+      # String fields only ever grow while streaming; send just the new suffix
+      delta = value[len(previous):] if value.startswith(previous) else value
+      sent[field] = value
+      on_delta(field, delta)
+
+  if message is None:
+    raise OutputParserException("The writer stream ended without any output")
+  # The deltas were only a preview; a truncated or invalid answer is repaired or raises here
+  return parse_streamed(llm, WriterOutput, messages, message)
@@ -0,0 +1,109 @@
+from langchain.prompts import ChatPromptTemplate
+from langchain.output_parsers import PydanticOutputParser
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_function
+from langchain_core.utils.json import parse_partial_json
+from pydantic import BaseModel, ValidationError, create_model
+import logging
+import json
+import os
+
+logger = logging.getLogger(__name__)
+
+# "native" uses the model's JSON-schema response format; "parser" appends format instructions and parses free text
+STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "native")
+
+
+def is_native() -> bool:
+  return STRUCTURED_OUTPUT == "native"
+
+
+# Everything static (system text and, in parser mode, the schema instructions) comes before the per-request
+# variables, so provider-side prefix caching covers it
+def build_prompt(system: str, user: str, schema: type[BaseModel]) -> ChatPromptTemplate:
+  if is_native():
+    return ChatPromptTemplate.from_messages([("system", system), ("user", user)])
+
+  return ChatPromptTemplate.from_messages([
+    ("system", system + "\n\n  {format_instructions}"),
+    ("user", user)
+  ]).partial(format_instructions = PydanticOutputParser(pydantic_object = schema).get_format_instructions())
+
+
+def response_format(schema: type[BaseModel]) -> dict:
+  function = convert_to_openai_function(schema, strict = True)
+  return {"type": "json_schema", "json_schema": {"name": function["name"], "schema": function["parameters"], "strict": True}}
+
+
+def _load(text: str) -> dict:
+  try:
+    data = json.loads(text)
+  except (TypeError, json.JSONDecodeError):
+    data = parse_partial_json(text or "")
+  return data if isinstance(data, dict) else {}
+
+
+def _failing_fields(schema: type[BaseModel], error: ValidationError) -> list[str]:
+  fields = {str(e["loc"][0]) for e in error.errors() if e["loc"] and str(e["loc"][0]) in schema.model_fields}
+  return sorted(fields) or list(schema.model_fields)
+
+
+# Re-asks for just the fields that failed validation instead of rerunning the whole chain
+def _repair(llm, schema: type[BaseModel], messages: list[BaseMessage], raw: str, data: dict, error: ValidationError) -> BaseModel:
+  failing = _failing_fields(schema, error)
+  logger.warning("%s failed validation on %s, re-asking for those fields", schema.__name__, failing)
+
+  partial_schema = create_model(
+    f"{schema.__name__}Repair",
+    **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in failing}
+  )
+  follow_up = messages + [
+    AIMessage(content = raw or ""),
+    HumanMessage(content = f"These fields were missing or invalid: {', '.join(failing)}. Return only those fields, corrected.")
+  ]
+  answer = llm.bind(response_format = response_format(partial_schema)).invoke(follow_up)
+
+  data.update({name: value for name, value in _load(answer.content).items() if name in failing})
+  try:
+    return schema.model_validate(data)
+  except ValidationError as e:
+    raise OutputParserException(f"{schema.__name__} still invalid after repair: {e}", llm_output = answer.content) from e
+
+
+def parse_native(llm, schema: type[BaseModel], messages: list[BaseMessage], message: AIMessage) -> BaseModel:
+  if message.additional_kwargs.get("refusal"):
+    raise OutputParserException(f"Model refused to produce {schema.__name__}: {message.additional_kwargs['refusal']}")
+
+  data = _load(message.content)
+  try:
+    return schema.model_validate(data)
+  except ValidationError as e:
+    return _repair(llm, schema, messages, message.content, data, e)
+
+
+def structured_chain(prompt: ChatPromptTemplate, llm, schema: type[BaseModel]) -> Runnable:
+  if not is_native():
+    return prompt | llm | PydanticOutputParser(pydantic_object = schema)
+
+  bound = llm.bind(response_format = response_format(schema))
+
+  def invoke(prompt_value) -> BaseModel:
+    messages = prompt_value.to_messages()
+    return parse_native(llm, schema, messages, bound.invoke(messages))
+
+  return prompt | RunnableLambda(invoke)
+
+
+# Chat model for token streaming; in native mode the streamed content is already schema-shaped JSON
+def streaming_llm(llm, schema: type[BaseModel]):
+  return llm.bind(response_format = response_format(schema)) if is_native() else llm
+
+
+
+# Final parse of a streamed answer, held to the same validation (and field repair) as a non-streamed call
+def parse_streamed(llm, schema: type[BaseModel], messages: list[BaseMessage], message: AIMessage) -> BaseModel:
+  if not is_native():
+    return PydanticOutputParser(pydantic_object = schema).parse(message.content)
+  return parse_native(llm, schema, messages, message)
@@ -0,0 +1,13 @@
+from langchain.prompts import ChatPromptTemplate
+from pydantic import BaseModel
+import hashlib
+import json
+
+# Any edit to the prompt text, its format instructions, the output schema or the model yields a new version
+def chain_fingerprint(prompt: ChatPromptTemplate, model_name: str, schema: type[BaseModel]) -> str:
+  payload = json.dumps(
+    {"prompt": prompt.to_json(), "model": model_name, "schema": schema.model_json_schema()},
+    sort_keys = True,
+    default = str
+  )
+  return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
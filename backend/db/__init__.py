@@ -1,4 +1,4 @@
-from db.session import engine
-from db.models import Base
+from backend.db.session import engine
+from backend.db.models import Base
 
 Base.metadata.create_all(bind=engine)
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+Seeds a scratch database and times the crud hot paths with and without the query indexes.
+
+  DATABASE_URL=sqlite:////tmp/bench.db python -m backend.db.benchmark_queries --analyses 1000000
+
+Point DATABASE_URL at a throwaway database; the seeded tables are left in place for reruns.
+"""
+from sqlalchemy import func, insert, select, text
+import argparse
+import datetime
+import random
+import statistics
+import time
+
+from backend.db.session import engine, SessionLocal
+from backend.db.models import User, Resume, JobDescription, Analysis
+from backend.db import crud
+
+BENCH_INDEXES = [
+  index for table in (Resume.__table__, Analysis.__table__)
+  for index in table.indexes if index.name.endswith(("_filename", "_created", "_score"))
+]
+BATCH_SIZE = 10_000
+
+
+def seed(users: int, resumes_per_user: int, analyses: int):
+  with engine.begin() as conn:
+    if conn.execute(select(func.count()).select_from(User)).scalar():
+      return
+
+    conn.execute(insert(User), [
+      {"id": u, "name": f"user{u}", "email": f"user{u}@bench.local", "password_hash": "x"}
+      for u in range(1, users + 1)
+    ])
+    conn.execute(insert(Resume), [
+      {"id": (u - 1) * resumes_per_user + r, "user_id": u, "filename": f"resume_{r}.pdf", "text": "resume text"}
+      for u in range(1, users + 1) for r in range(1, resumes_per_user + 1)
+    ])
+
+    conn.execute(insert(JobDescription), [{"id": 1, "content_hash": "0" * 64, "text": "job description"}])
+
+    start = datetime.datetime(2024, 1, 1, tzinfo = datetime.timezone.utc)
+    for offset in range(0, analyses, BATCH_SIZE):
+      rows = []
+      for i in range(offset, min(offset + BATCH_SIZE, analyses)):
+        resume_id = random.randint(1, users * resumes_per_user)
+        score = round(random.random(), 3)
+        rows.append({
+          "user_id": (resume_id - 1) // resumes_per_user + 1,
+          "resume_id": resume_id,
+          "jd_id": 1,
+          "result": {"analysis": {"match_score": score}, "written": {"overall_rating": "Good"}},
+          "match_score": score,
+          "overall_rating": "Good",
+          "created_at": start + datetime.timedelta(seconds = i * 30)
+        })
+      conn.execute(insert(Analysis), rows)
+
+
+def set_indexes(enabled: bool):
+  with engine.begin() as conn:
+    for index in BENCH_INDEXES:
+      if enabled:
+        index.create(conn, checkfirst = True)
+      else:
+        index.drop(conn, checkfirst = True)
+    conn.execute(text("ANALYZE"))
+
+
+def _time(fn, repeats: int) -> float:
+  timings = []
+  for _ in range(repeats):
+    began = time.perf_counter()
+    fn()
+    timings.append((time.perf_counter() - began) * 1000)
+  return statistics.median(timings)
+
+
+def run_queries(user_id: int, resume_id: int, repeats: int) -> dict:
+  with SessionLocal() as db:
+    first_page = crud.list_analysis_summaries(user_id, limit = 50, db = db)
+    after = (first_page[-1].created_at, first_page[-1].id) if first_page else None
+
+    return {
+      "resume by filename": _time(lambda: crud.get_resume_by_filename("resume_1.pdf", user_id, db = db), repeats),
+      "resume summaries": _time(lambda: crud.list_resume_summaries(user_id, db = db), repeats),
+      "analyses, first page": _time(lambda: crud.list_analysis_summaries(user_id, db = db), repeats),
+      "analyses, next page": _time(lambda: crud.list_analysis_summaries(user_id, after = after, db = db), repeats),
+      "analyses by resume": _time(lambda: crud.list_analysis_summaries(user_id, resume_id = resume_id, db = db), repeats),
+      "top 20 for a JD": _time(lambda: crud.list_analyses_by_score(user_id, jd_id = 1, limit = 20, db = db), repeats),
+      "score >= 0.7": _time(lambda: crud.list_analyses_by_score(user_id, min_score = 0.7, db = db), repeats),
+    }
+
+
+def main():
+  parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+  parser.add_argument("--analyses", type = int, default = 1_000_000)
+  parser.add_argument("--users", type = int, default = 1_000)
+  parser.add_argument("--resumes-per-user", type = int, default = 10)
+  parser.add_argument("--repeats", type = int, default = 20)
+  args = parser.parse_args()
+
+  began = time.perf_counter()
+  seed(args.users, args.resumes_per_user, args.analyses)
+  print(f"seeded in {time.perf_counter() - began:.1f}s ({engine.dialect.name})")
+
+  user_id = random.randint(1, args.users)
+  resume_id = (user_id - 1) * args.resumes_per_user + 1
+
+  set_indexes(False)
+  before = run_queries(user_id, resume_id, args.repeats)
+  set_indexes(True)
+  after = run_queries(user_id, resume_id, args.repeats)
+
+  print(f"{'query':<24}{'before ms':>12}{'after ms':>12}")
+  for name in before:
+    print(f"{name:<24}{before[name]:>12.2f}{after[name]:>12.2f}")
+
+
+if __name__ == "__main__":
+  main()
@@ -1,57 +1,38 @@
-from sqlalchemy import desc, select
-from sqlalchemy.orm import Session, SessionLocal
-from db.models import User, Resume, Analysis
+from sqlalchemy import and_, desc, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, undefer
+from backend.db.session import SessionLocal, session_scope
+from backend.db.models import User, Resume, JobDescription, Analysis, AnalysisJob, ResumeExtraction, PipelineResult
+import datetime
+
+# Every function takes an optional session. Without one it joins the current request's session (committed at
+# teardown), or outside a request uses a private session that commits before returning.
 
 """
 Below are the User class CRUD methods
 """
 
-def create_user(name: str, email: str, password_hash: str) -> User:
-  db = SessionLocal()
-
-  try:
+def create_user(name: str, email: str, password_hash: str, db: Session = None) -> User:
+  with session_scope(db) as db:
     user = User(name = name, email = email, password_hash = password_hash)
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    db.flush()
     return user
-  except:
-    db.rollback()
-    raise
-  finally:
-    db.close()
 
-def get_user_by_id(user_id: int):
-  db = SessionLocal()
+def get_user_by_id(user_id: int, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(select(User).where(User.id == user_id)).scalar_one_or_none()
 
-  try:
-    result = db.execute(select(User).where(User.id == user_id)).scalar_one_or_none()
-    return result
-  finally:
-    db.close()
+def get_user_by_email(user_email: str, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(select(User).where(User.email == user_email)).scalar_one_or_none()
 
-def get_user_by_email(user_email: str):
-  db = SessionLocal()
-
-  try:
-    result = db.execute(select(User).where(User.email == user_email)).scalar_one_or_none()
-    return result
-  finally:
-    db.close()
+def get_users(skip=0, limit=100, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(select(User).order_by(desc(User.created_at)).offset(skip).limit(limit)).scalars().all()
 
-def get_users(skip=0, limit=100):
-  db = SessionLocal()
-
-  try:
-    result = db.execute(select(User).order_by(desc(User.created_at)).offset(skip).limit(limit)).scalars().all()
-    return result
-  finally:
-    db.close()
-
-def update_user(user_id: int, updates: dict):
-  db = SessionLocal()
-
-  try:
+def update_user(user_id: int, updates: dict, db: Session = None):
+  with session_scope(db) as db:
     user = db.get(User, user_id)
     if not user: 
       return None
@@ -59,167 +40,340 @@ def update_user(user_id: int, updates: dict):
     for key, value in updates.items():
       if key in allowed_fields:
         setattr(user, key, value)
-    db.commit()
-    db.refresh(user)
+    db.flush()
     return user
-  except:
-    db.rollback()
-    raise
-  finally:
-    db.close()
   
-def delete_user(user_id: int):
-  db = SessionLocal()
-  try:
+def delete_user(user_id: int, db: Session = None):
+  with session_scope(db) as db:
     user = db.execute(select(User).where(User.id == user_id)).scalar_one_or_none()
     if user:
       db.delete(user)
-      db.commit()
+      db.flush()
       return True
     return False
-  except:
-    db.rollback()
-    raise
-  finally:
-    db.close()
 
 """
 Below are the Resume class CRUD methods
 """
 
-def create_resume(resume: dict, user_id: int, filename: str) -> Resume:
-  db = SessionLocal()
-  try:
-    new_resume = Resume(
-      text=resume["text"],
-      filename=filename,
-      user_id = user_id
-    )
-    db.add(new_resume)
-    db.commit()
-    db.refresh(new_resume)
-    return new_resume
-  except:
-    db.rollback()
-    raise
-  finally:
-    db.close()
+def create_resume(resume: dict, user_id: int, filename: str, content_hash: str = None, db: Session = None) -> Resume:
+  with session_scope(db) as db:
+    try:
+      # A savepoint, so losing the race to a concurrent identical upload does not roll back a shared transaction
+      with db.begin_nested():
+        new_resume = Resume(
+          text=resume["text"],
+          filename=filename,
+          user_id = user_id,
+          content_hash = content_hash
+        )
+        db.add(new_resume)
+      # Only the server default; a full refresh would expire the deferred text the caller reads after the session closes
+      db.refresh(new_resume, ["created_at"])
+      return new_resume
+    except IntegrityError:
+      # The same file was stored by the other upload; both requests share its row
+      return get_resume_by_hash(content_hash, user_id, db = db)
   
 
-def get_resume_by_id(resume_id: int):
-  db = SessionLocal()
-  try:
-    result = db.execute(select(Resume).where(Resume.id == resume_id)).scalar_one_or_none()
-    return result
-  finally:
-    db.close()
+def get_resume_by_id(resume_id: int, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(select(Resume).options(undefer(Resume.text)).where(Resume.id == resume_id)).scalar_one_or_none()
 
-def get_resumes_by_user(user_id: int):
-  db = SessionLocal()
-  try:
-    result = db.execute(select(Resume).where(Resume.user_id == user_id).order_by(desc(Resume.created_at))).scalars().all()
-    return result
-  finally:
-    db.close()
+def get_resumes_by_user(user_id: int, with_text: bool = False, db: Session = None):
+  with session_scope(db) as db:
+    stmt = select(Resume).where(Resume.user_id == user_id).order_by(desc(Resume.created_at))
+    if with_text:
+      stmt = stmt.options(undefer(Resume.text))
+    return db.execute(stmt).scalars().all()
 
-def get_resume_by_filename(filename: str, user_id: int):
-  db = SessionLocal()
+def get_resumes_by_ids(resume_ids: list[int], user_id: int, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(select(Resume).options(undefer(Resume.text)).where(Resume.id.in_(resume_ids), Resume.user_id == user_id)).scalars().all()
 
-  try:
-    result = db.execute(
+# Newest first, one page at a time; `after` is the (created_at, id) of the last row already returned
+def list_resume_summaries(user_id: int, after: tuple = None, limit: int = 50, db: Session = None):
+  with session_scope(db) as db:
+    stmt = select(Resume.id, Resume.filename, Resume.vector_count, Resume.created_at).where(Resume.user_id == user_id)
+    if after:
+      stmt = stmt.where(or_(Resume.created_at < after[0], and_(Resume.created_at == after[0], Resume.id < after[1])))
+    return db.execute(stmt.order_by(desc(Resume.created_at), desc(Resume.id)).limit(limit + 1)).all()
+
+def get_resume_by_filename(filename: str, user_id: int, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(
       select(Resume).where(
         Resume.filename == filename,
         Resume.user_id == user_id
       )
+    ).scalars().first()
+
+def get_resume_by_hash(content_hash: str, user_id: int, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(
+      select(Resume).options(undefer(Resume.text)).where(
+        Resume.content_hash == content_hash,
+        Resume.user_id == user_id
+      )
     ).scalar_one_or_none()
-    return result
-  except:
-    return None
-  finally:
-    db.close()
 
+def set_resume_vector_count(resume_id: int, vector_count: int, db: Session = None):
+  with session_scope(db) as db:
+    resume = db.get(Resume, resume_id)
+    if not resume:
+      return None
+    resume.vector_count = vector_count
+    db.flush()
+    return resume
 
-def delete_resume(resume_id: int):
-  db = SessionLocal()
-  try:
+
+def delete_resume(resume_id: int, db: Session = None):
+  with session_scope(db) as db:
     resume = db.get(Resume, resume_id)
     if resume:
       db.delete(resume)
-      db.commit()
+      db.flush()
       return True
     return False
-  except:
-    db.rollback()
-    raise
-  finally:
-    db.close()
 
 
+"""
+Below are the ResumeExtraction class CRUD methods
+"""
+
+def get_resume_extraction(content_hash: str, prompt_version: str, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(
+      select(ResumeExtraction).where(
+        ResumeExtraction.content_hash == content_hash,
+        ResumeExtraction.prompt_version == prompt_version
+      )
+    ).scalar_one_or_none()
+
+def create_resume_extraction(content_hash: str, prompt_version: str, data: dict, db: Session = None) -> ResumeExtraction:
+  with session_scope(db) as db:
+    try:
+      # A savepoint, so losing the race does not roll back the rest of a shared transaction
+      with db.begin_nested():
+        extraction = ResumeExtraction(content_hash = content_hash, prompt_version = prompt_version, data = data)
+        db.add(extraction)
+      return extraction
+    except IntegrityError:
+      # Another worker stored the same extraction first
+      return get_resume_extraction(content_hash, prompt_version, db = db)
+
+"""
+Below are the PipelineResult class CRUD methods
+"""
+
+def get_pipeline_result(resume_hash: str, jd_hash: str, pipeline_version: str, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(
+      select(PipelineResult).where(
+        PipelineResult.resume_hash == resume_hash,
+        PipelineResult.jd_hash == jd_hash,
+        PipelineResult.pipeline_version == pipeline_version
+      )
+    ).scalar_one_or_none()
+
+def create_pipeline_result(resume_hash: str, jd_hash: str, pipeline_version: str, result: dict, db: Session = None) -> PipelineResult:
+  with session_scope(db) as db:
+    try:
+      with db.begin_nested():
+        stored = PipelineResult(resume_hash = resume_hash, jd_hash = jd_hash, pipeline_version = pipeline_version, result = result)
+        db.add(stored)
+      return stored
+    except IntegrityError:
+      return get_pipeline_result(resume_hash, jd_hash, pipeline_version, db = db)
+
+
+"""
+Below are the JobDescription class CRUD methods
+"""
+
+def get_job_description_by_hash(content_hash: str, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(
+      select(JobDescription).options(undefer(JobDescription.text)).where(JobDescription.content_hash == content_hash)
+    ).scalar_one_or_none()
+
+def get_or_create_job_description(content_hash: str, text: str, source_url: str = None, db: Session = None) -> JobDescription:
+  with session_scope(db) as db:
+    existing = get_job_description_by_hash(content_hash, db = db)
+    if existing:
+      # A fresh fetch of an unchanged posting only moves its fetch time
+      if source_url:
+        existing.source_url = existing.source_url or source_url
+        existing.fetched_at = datetime.datetime.now(datetime.timezone.utc)
+        db.flush()
+      return existing
+
+    try:
+      with db.begin_nested():
+        jd = JobDescription(content_hash = content_hash, text = text, source_url = source_url)
+        db.add(jd)
+      # Only the server defaults; a full refresh would expire the deferred text the caller reads after the session closes
+      db.refresh(jd, ["fetched_at", "created_at"])
+      return jd
+    except IntegrityError:
+      return get_job_description_by_hash(content_hash, db = db)
+
+def set_job_description_manifest(jd_id: int, doc_hash: str, chunk_count: int, db: Session = None):
+  with session_scope(db) as db:
+    jd = db.get(JobDescription, jd_id)
+    if not jd:
+      return None
+    jd.doc_hash = doc_hash
+    jd.chunk_count = chunk_count
+    db.flush()
+    return jd
+
 
 """
 Below are the Analysis class CRUD methods
 """
 
-def create_analysis(analysis_data: dict, resume_id: int, user_id: int) -> Analysis:
-  db = SessionLocal()
-  try:
+# Loads the analysis's JD row, text included, so callers can read it after the session closes
+WITH_JD_TEXT = joinedload(Analysis.job_description).undefer(JobDescription.text)
+
+def _count(items) -> int | None:
+  return len(items) if isinstance(items, list) else None
+
+def _score_fields(result: dict) -> dict:
+  analysis = result.get("analysis") or {}
+  written = result.get("written") or {}
+  score = analysis.get("match_score")
+
+  return {
+    "match_score": float(score) if isinstance(score, (int, float)) else None,
+    "overall_rating": written.get("overall_rating"),
+    "matched_skill_count": _count(analysis.get("matched_skills")),
+    "missing_skill_count": _count(analysis.get("missing_skills"))
+  }
+
+def create_analysis(analysis_data: dict, resume_id: int, user_id: int, db: Session = None) -> Analysis:
+  with session_scope(db) as db:
     new_analysis = Analysis(
       user_id = user_id,
       resume_id = resume_id,
-      jd_text = analysis_data["jd_text"],
-      result = analysis_data["result"]
+      jd_id = analysis_data["jd_id"],
+      result = analysis_data["result"],
+      **_score_fields(analysis_data["result"])
     )
     
     db.add(new_analysis)
-    db.commit()
-    db.refresh(new_analysis)
+    db.flush()
+    # The deferred result must stay loaded, so only the server default is read back
+    db.refresh(new_analysis, ["created_at"])
     return new_analysis
-  except:
-    db.rollback()
-    raise
-  finally:
-    db.close()
 
-def get_analysis_by_id(analysis_id: int):
-  db = SessionLocal()
+def get_analysis_by_id(analysis_id: int, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(
+      select(Analysis).options(WITH_JD_TEXT, undefer(Analysis.result)).where(Analysis.id == analysis_id)
+    ).scalar_one_or_none()
 
-  try:
-    result = db.execute(select(Analysis).where(Analysis.id == analysis_id)).scalar_one_or_none()
-    return result
-  finally:
-    db.close()
+def get_analyses_by_resume(resume_id: int, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(
+      select(Analysis).options(WITH_JD_TEXT, undefer(Analysis.result)).where(Analysis.resume_id == resume_id)
+    ).scalars().all()
 
-def get_analyses_by_resume(resume_id: int):
-  db = SessionLocal()
+def get_analyses_by_ids(analysis_ids: list[int], user_id: int, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(
+      select(Analysis).options(WITH_JD_TEXT).where(Analysis.id.in_(analysis_ids), Analysis.user_id == user_id)
+    ).scalars().all()
 
-  try:
-    results = db.execute(select(Analysis).where(Analysis.resume_id == resume_id)).scalars().all()
-    return results
-  finally:
-    db.close()
+def get_analyses_by_user(user_id: int, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(
+      select(Analysis).options(WITH_JD_TEXT, undefer(Analysis.result)).where(Analysis.user_id == user_id).order_by(desc(Analysis.created_at))
+    ).scalars().all()
 
-def get_analyses_by_user(user_id: int):
-  db = SessionLocal()
-  try:
-    results = db.execute(select(Analysis).where(Analysis.user_id == user_id).order_by(desc(Analysis.created_at))).scalars().all()
-    return results
-  finally:
-    db.close()
+SUMMARY_COLUMNS = (
+  Analysis.id,
+  Analysis.resume_id,
+  Analysis.jd_id,
+  Analysis.created_at,
+  Analysis.match_score,
+  Analysis.overall_rating,
+  Analysis.matched_skill_count,
+  Analysis.missing_skill_count
+)
 
+# List pages read only the summary columns, never the JD text or the full result
+def list_analysis_summaries(user_id: int, resume_id: int = None, after: tuple = None, limit: int = 50, db: Session = None):
+  with session_scope(db) as db:
+    stmt = select(*SUMMARY_COLUMNS).where(Analysis.user_id == user_id)
 
-def delete_analysis(analysis_id: int):
-  db = SessionLocal()
-  
-  try:
+    if resume_id is not None:
+      stmt = stmt.where(Analysis.resume_id == resume_id)
+    if after:
+      stmt = stmt.where(or_(Analysis.created_at < after[0], and_(Analysis.created_at == after[0], Analysis.id < after[1])))
+
+    return db.execute(stmt.order_by(desc(Analysis.created_at), desc(Analysis.id)).limit(limit + 1)).all()
+
+# Best score first, optionally for one JD and within [min_score, max_score]; `after` is the (match_score, id) of the
+# last row already returned. Unscored analyses are left out.
+def list_analyses_by_score(user_id: int, jd_id: int = None, min_score: float = None, max_score: float = None, after: tuple = None, limit: int = 50, db: Session = None):
+  with session_scope(db) as db:
+    stmt = select(*SUMMARY_COLUMNS).where(Analysis.user_id == user_id, Analysis.match_score.is_not(None))
+
+    if jd_id is not None:
+      stmt = stmt.where(Analysis.jd_id == jd_id)
+    if min_score is not None:
+      stmt = stmt.where(Analysis.match_score >= min_score)
+    if max_score is not None:
+      stmt = stmt.where(Analysis.match_score <= max_score)
+    if after:
+      stmt = stmt.where(or_(Analysis.match_score < after[0], and_(Analysis.match_score == after[0], Analysis.id < after[1])))
+
+    return db.execute(stmt.order_by(desc(Analysis.match_score), desc(Analysis.id)).limit(limit + 1)).all()
+
+
+def delete_analysis(analysis_id: int, db: Session = None):
+  with session_scope(db) as db:
     analysis = db.get(Analysis, analysis_id)
     if analysis:
       db.delete(analysis)
-      db.commit()
+      db.flush()
       return True
     return False
+
+
+"""
+Below are the AnalysisJob class CRUD methods
+"""
+
+def create_analysis_job(user_id: int) -> AnalysisJob:
+  # Workers pick the job up from their own sessions, so it is committed on its own right away
+  db = SessionLocal()
+  try:
+    job = AnalysisJob(user_id = user_id, status = "queued", partial = {})
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
   except:
     db.rollback()
     raise
   finally:
     db.close()
 
+def get_analysis_job(job_id: str, db: Session = None):
+  with session_scope(db) as db:
+    return db.execute(select(AnalysisJob).where(AnalysisJob.id == job_id)).scalar_one_or_none()
+
+def update_analysis_job(job_id: str, updates: dict, db: Session = None):
+  with session_scope(db) as db:
+    job = db.get(AnalysisJob, job_id)
+    if not job:
+      return None
+    allowed_fields = {"status", "stage", "partial", "error", "analysis_id"}
+    for key, value in updates.items():
+      if key in allowed_fields:
+        setattr(job, key, value)
+    db.flush()
+    db.refresh(job)
+    return job
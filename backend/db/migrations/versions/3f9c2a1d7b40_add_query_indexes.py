@@ -0,0 +1,70 @@
+"""add indexes for the crud query paths
+
+Revision ID: 3f9c2a1d7b40
+Revises:
+Create Date: 2026-10-18 18:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a1d7b40'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables were first created with Base.metadata.create_all, so this revision only adds what older
+# deployments are missing and skips anything create_all already made.
+INDEXES = [
+    ("ix_resumes_user_filename", "resumes", ["user_id", "filename"]),
+    ("ix_resumes_user_created", "resumes", ["user_id", "created_at", "id"]),
+    ("ix_analyses_user_created", "analyses", ["user_id", "created_at", "id"]),
+    ("ix_analyses_resume_created", "analyses", ["resume_id", "created_at", "id"]),
+]
+
+
+# SQLite reflects the original inline UNIQUE(filename) without a name; batch mode names it by this convention so it can be dropped
+NAMING_CONVENTION = {"uq": "uq_%(table_name)s_%(column_0_name)s"}
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    resume_columns = {c["name"] for c in inspector.get_columns("resumes")}
+    for column in (sa.Column("content_hash", sa.String(length=64), nullable=True), sa.Column("vector_count", sa.Integer(), nullable=True)):
+        if column.name not in resume_columns:
+            op.add_column("resumes", column)
+
+    resume_uniques = inspector.get_unique_constraints("resumes")
+    # Filenames were once unique across all users; resumes are now deduplicated per user by content hash instead
+    filename_uniques = [u["name"] or "uq_resumes_filename" for u in resume_uniques if u["column_names"] == ["filename"]]
+    needs_hash_unique = "uq_resumes_user_content_hash" not in {u["name"] for u in resume_uniques}
+
+    if filename_uniques or needs_hash_unique:
+        with op.batch_alter_table("resumes", naming_convention=NAMING_CONVENTION) as batch_op:
+            for name in filename_uniques:
+                batch_op.drop_constraint(name, type_="unique")
+            if needs_hash_unique:
+                batch_op.create_unique_constraint("uq_resumes_user_content_hash", ["user_id", "content_hash"])
+
+    # On Postgres the big tables are indexed without holding a write lock for the whole build,
+    # which CREATE INDEX CONCURRENTLY only allows outside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=_is_postgres())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=_is_postgres())
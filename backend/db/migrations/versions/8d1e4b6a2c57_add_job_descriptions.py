@@ -0,0 +1,132 @@
+"""move analysis JD text into a deduplicated job_descriptions table
+
+Revision ID: 8d1e4b6a2c57
+Revises: 3f9c2a1d7b40
+Create Date: 2026-10-18 19:10:00.000000
+
+"""
+from typing import Sequence, Union
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d1e4b6a2c57'
+down_revision: Union[str, Sequence[str], None] = '3f9c2a1d7b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+analyses = sa.table(
+    "analyses",
+    sa.column("id", sa.Integer),
+    sa.column("jd_id", sa.Integer),
+    sa.column("jd_text", sa.Text),
+    sa.column("created_at", sa.DateTime(timezone=True)),
+)
+job_descriptions = sa.table(
+    "job_descriptions",
+    sa.column("id", sa.Integer),
+    sa.column("content_hash", sa.String),
+    sa.column("text", sa.Text),
+    sa.column("fetched_at", sa.DateTime(timezone=True)),
+)
+
+
+# Must match backend.utils.result_cache.text_hash, which the app uses to look JDs up
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(" ".join((text or "").split()).encode("utf-8")).hexdigest()
+
+
+def _backfill(bind) -> None:
+    known = dict(bind.execute(sa.select(job_descriptions.c.content_hash, job_descriptions.c.id)).all())
+
+    # Walks analyses by id in batches so a large table is never held in memory at once
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(analyses.c.id, analyses.c.jd_text, analyses.c.created_at)
+            .where(analyses.c.id > last_id, analyses.c.jd_id.is_(None))
+            .order_by(analyses.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+
+        links = []
+        for analysis_id, jd_text, created_at in rows:
+            content_hash = _text_hash(jd_text)
+            if content_hash not in known:
+                known[content_hash] = bind.execute(
+                    sa.insert(job_descriptions)
+                    .values(content_hash=content_hash, text=jd_text or "", fetched_at=created_at)
+                    .returning(job_descriptions.c.id)
+                ).scalar_one()
+            links.append({"analysis_id": analysis_id, "linked_jd": known[content_hash]})
+
+        bind.execute(
+            sa.update(analyses).where(analyses.c.id == sa.bindparam("analysis_id")).values(jd_id=sa.bindparam("linked_jd")),
+            links
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # create_all may already have made the empty table
+    if not inspector.has_table("job_descriptions"):
+        op.create_table(
+            "job_descriptions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("content_hash", sa.String(length=64), nullable=False),
+            sa.Column("source_url", sa.String(), nullable=True),
+            sa.Column("text", sa.Text(), nullable=False),
+            sa.Column("fetched_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("doc_hash", sa.String(length=64), nullable=True),
+            sa.Column("chunk_count", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("content_hash"),
+        )
+        op.create_index("ix_job_descriptions_id", "job_descriptions", ["id"])
+
+    analysis_columns = {c["name"] for c in inspector.get_columns("analyses")}
+    if "jd_text" not in analysis_columns:
+        return
+
+    if "jd_id" not in analysis_columns:
+        op.add_column("analyses", sa.Column("jd_id", sa.Integer(), nullable=True))
+
+    _backfill(bind)
+
+    with op.batch_alter_table("analyses") as batch_op:
+        batch_op.alter_column("jd_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key("fk_analyses_jd_id", "job_descriptions", ["jd_id"], ["id"])
+        batch_op.create_index("ix_analyses_jd", ["jd_id"])
+        batch_op.drop_column("jd_text")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column("analyses", sa.Column("jd_text", sa.Text(), nullable=True))
+    op.execute(
+        analyses.update().values(
+            jd_text=sa.select(job_descriptions.c.text)
+            .where(job_descriptions.c.id == analyses.c.jd_id)
+            .scalar_subquery()
+        )
+    )
+
+    with op.batch_alter_table("analyses") as batch_op:
+        batch_op.alter_column("jd_text", existing_type=sa.Text(), nullable=False)
+        batch_op.drop_index("ix_analyses_jd")
+        batch_op.drop_constraint("fk_analyses_jd_id", type_="foreignkey")
+        batch_op.drop_column("jd_id")
+
+    op.drop_table("job_descriptions")
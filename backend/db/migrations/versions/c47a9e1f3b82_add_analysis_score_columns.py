@@ -0,0 +1,100 @@
+"""promote match score, rating and skill counts to indexed analysis columns
+
+Revision ID: c47a9e1f3b82
+Revises: 8d1e4b6a2c57
+Create Date: 2026-10-18 20:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47a9e1f3b82'
+down_revision: Union[str, Sequence[str], None] = '8d1e4b6a2c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+COLUMNS = [
+    sa.Column("match_score", sa.Float(), nullable=True),
+    sa.Column("overall_rating", sa.String(length=64), nullable=True),
+    sa.Column("matched_skill_count", sa.Integer(), nullable=True),
+    sa.Column("missing_skill_count", sa.Integer(), nullable=True),
+]
+
+analyses = sa.table(
+    "analyses",
+    sa.column("id", sa.Integer),
+    sa.column("result", sa.JSON),
+    *[sa.column(c.name, c.type) for c in COLUMNS],
+)
+
+
+# Same extraction as crud.create_analysis applies to new rows
+def _score_fields(result: dict) -> dict:
+    analysis = (result or {}).get("analysis") or {}
+    written = (result or {}).get("written") or {}
+    score = analysis.get("match_score")
+    matched = analysis.get("matched_skills")
+    missing = analysis.get("missing_skills")
+
+    return {
+        "match_score": float(score) if isinstance(score, (int, float)) else None,
+        "overall_rating": written.get("overall_rating"),
+        "matched_skill_count": len(matched) if isinstance(matched, list) else None,
+        "missing_skill_count": len(missing) if isinstance(missing, list) else None,
+    }
+
+
+def _backfill(bind) -> None:
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(analyses.c.id, analyses.c.result)
+            .where(analyses.c.id > last_id)
+            .order_by(analyses.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+
+        bind.execute(
+            sa.update(analyses).where(analyses.c.id == sa.bindparam("analysis_id")).values(
+                **{c.name: sa.bindparam(c.name) for c in COLUMNS}
+            ),
+            [{"analysis_id": analysis_id, **_score_fields(result)} for analysis_id, result in rows]
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    existing = {c["name"] for c in inspector.get_columns("analyses")}
+    for column in COLUMNS:
+        if column.name not in existing:
+            op.add_column("analyses", sa.Column(column.name, column.type, nullable=True))
+
+    _backfill(bind)
+
+    # The (jd_id, user_id, match_score, id) index also serves foreign key lookups on jd_id
+    op.drop_index("ix_analyses_jd", table_name="analyses", if_exists=True)
+    op.create_index("ix_analyses_user_score", "analyses", ["user_id", "match_score", "id"], if_not_exists=True)
+    op.create_index("ix_analyses_jd_score", "analyses", ["jd_id", "user_id", "match_score", "id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_analyses_jd_score", table_name="analyses", if_exists=True)
+    op.drop_index("ix_analyses_user_score", table_name="analyses", if_exists=True)
+    op.create_index("ix_analyses_jd", "analyses", ["jd_id"], if_not_exists=True)
+
+    with op.batch_alter_table("analyses") as batch_op:
+        for column in reversed(COLUMNS):
+            batch_op.drop_column(column.name)
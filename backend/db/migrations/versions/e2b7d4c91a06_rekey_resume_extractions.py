@@ -0,0 +1,31 @@
+"""drop resume extractions keyed by uploaded file hash
+
+Revision ID: e2b7d4c91a06
+Revises: c47a9e1f3b82
+Create Date: 2026-10-18 21:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7d4c91a06'
+down_revision: Union[str, Sequence[str], None] = 'c47a9e1f3b82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Extractions used to be keyed by the uploaded file's hash while their data came from whatever text the
+# client posted alongside it, so existing rows cannot be trusted. They are a cache and are rebuilt on demand.
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("resume_extractions"):
+        op.execute(sa.text("DELETE FROM resume_extractions"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    pass
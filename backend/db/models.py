@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, JSON, func
-from sqlalchemy.orm import relationship, declarative_base
-from backend.db import Base
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime, Text, JSON, Index, UniqueConstraint, func
+from sqlalchemy.orm import relationship, declarative_base, deferred
 import datetime
+import uuid
+
+Base = declarative_base()
 
 class User(Base):
   __tablename__ = "users"
@@ -14,19 +16,50 @@ class User(Base):
 
   resumes = relationship("Resume", back_populates = "owner")
   analyses = relationship("Analysis", back_populates="owner")
+  analysis_jobs = relationship("AnalysisJob", back_populates="owner")
 
 class Resume(Base):
   __tablename__ = "resumes"
 
   id = Column(Integer, primary_key = True, index = True)
-  filename = Column(str, nullable=False, unique=True)
+  filename = Column(String, nullable=False)
   user_id = Column(Integer, ForeignKey("users.id"), nullable = False)
-  text = Column(Text)
+  content_hash = Column(String(64), nullable=True)
+  vector_count = Column(Integer, nullable=True)
+  # Large columns load only when a query undefers them or the attribute is first read
+  text = deferred(Column(Text))
   created_at = Column(DateTime(timezone=True), server_default=func.now())
 
   owner = relationship("User", back_populates = "resumes")
   analyses = relationship("Analysis", back_populates="resume")
 
+  # The unique constraint doubles as the (user_id, content_hash) lookup index
+  __table_args__ = (
+    UniqueConstraint("user_id", "content_hash", name = "uq_resumes_user_content_hash"),
+    Index("ix_resumes_user_filename", "user_id", "filename"),
+    Index("ix_resumes_user_created", "user_id", "created_at", "id"),
+  )
+
+
+class JobDescription(Base):
+  __tablename__ = "job_descriptions"
+
+  id = Column(Integer, primary_key = True, index = True)
+
+  # sha256 of the whitespace-normalized text, so a posting analyzed many times is stored once
+  content_hash = Column(String(64), nullable=False, unique = True)
+  source_url = Column(String, nullable=True)
+  text = deferred(Column(Text, nullable=False))
+  fetched_at = Column(DateTime(timezone=True), server_default=func.now())
+
+  # Manifest of the chunks last upserted to the JD index, whose vectors carry this row's id as jd_id
+  doc_hash = Column(String(64), nullable=True)
+  chunk_count = Column(Integer, nullable=True)
+
+  created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+  analyses = relationship("Analysis", back_populates = "job_description")
+
 
 class Analysis(Base):
   __tablename__ = "analyses"
@@ -35,18 +68,83 @@ class Analysis(Base):
 
   user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
   resume_id = Column(Integer, ForeignKey("resumes.id"), nullable=False)
+  jd_id = Column(Integer, ForeignKey("job_descriptions.id", name = "fk_analyses_jd_id"), nullable=False)
 
-  jd_text = Column(Text, nullable=False)
+  result = deferred(Column(JSON, nullable=False))
 
-  result = Column(JSON, nullable=False)
+  # Copied out of result when the analysis is written, so listings and score queries never parse the JSON
+  match_score = Column(Float, nullable=True)
+  overall_rating = Column(String(64), nullable=True)
+  matched_skill_count = Column(Integer, nullable=True)
+  missing_skill_count = Column(Integer, nullable=True)
 
   created_at = Column(DateTime(timezone=True), server_default=func.now())
 
   owner = relationship("User", back_populates = "analyses")
   resume = relationship("Resume", back_populates = "analyses")
+  job_description = relationship("JobDescription", back_populates = "analyses")
+
+  # Each index matches the keyset order of a listing: newest first per user or per resume,
+  # and best score first per user or per (JD, user)
+  __table_args__ = (
+    Index("ix_analyses_user_created", "user_id", "created_at", "id"),
+    Index("ix_analyses_resume_created", "resume_id", "created_at", "id"),
+    Index("ix_analyses_user_score", "user_id", "match_score", "id"),
+    Index("ix_analyses_jd_score", "jd_id", "user_id", "match_score", "id"),
+  )
+
+
+class AnalysisJob(Base):
+  __tablename__ = "analysis_jobs"
+
+  id = Column(String(36), primary_key = True, default = lambda: str(uuid.uuid4()))
+
+  user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index = True)
+  analysis_id = Column(Integer, ForeignKey("analyses.id"), nullable=True)
 
+  status = Column(String, nullable=False, default = "queued")
+  stage = Column(String, nullable=True)
+  partial = Column(JSON, nullable=False, default = dict)
+  error = Column(Text, nullable=True)
+
+  created_at = Column(DateTime(timezone=True), server_default=func.now())
+  updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+  owner = relationship("User", back_populates = "analysis_jobs")
+  analysis = relationship("Analysis")
 
 
+class ResumeExtraction(Base):
+  __tablename__ = "resume_extractions"
+
+  id = Column(Integer, primary_key = True, index = True)
+
+  # text_hash of the resume text the extractor read, not of the uploaded file
+  content_hash = Column(String(64), nullable=False)
+  prompt_version = Column(String(16), nullable=False)
+
+  data = Column(JSON, nullable=False)
+
+  created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+  __table_args__ = (
+    UniqueConstraint("content_hash", "prompt_version", name = "uq_resume_extractions_hash_version"),
+  )
 
 
+class PipelineResult(Base):
+  __tablename__ = "pipeline_results"
+
+  id = Column(Integer, primary_key = True, index = True)
+
+  resume_hash = Column(String(64), nullable=False)
+  jd_hash = Column(String(64), nullable=False)
+  pipeline_version = Column(String(16), nullable=False)
+
+  result = Column(JSON, nullable=False)
+
+  created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+  __table_args__ = (
+    UniqueConstraint("resume_hash", "jd_hash", "pipeline_version", name = "uq_pipeline_results_key"),
+  )
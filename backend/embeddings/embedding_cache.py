@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from threading import Lock
+from pathlib import Path
+import numpy as np
+import hashlib
+import sqlite3
+import time
+import os
+
+CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "/tmp/resume-screener/embeddings.sqlite3")
+MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "4096"))
+DISK_ITEMS = int(os.getenv("EMBEDDING_CACHE_DISK_ITEMS", "200000"))
+SQLITE_BATCH = 500
+
+
+def normalize_text(text: str) -> str:
+  return " ".join(text.split())
+
+def cache_key(model_name: str, text: str) -> str:
+  return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+  def __init__(self, path: str = CACHE_PATH, memory_items: int = MEMORY_ITEMS, disk_items: int = DISK_ITEMS):
+    self.memory_items = memory_items
+    self.disk_items = disk_items
+    self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    self._memory: OrderedDict[str, list[float]] = OrderedDict()
+    self._lock = Lock()
+
+    Path(path).parent.mkdir(parents = True, exist_ok = True)
+    self._db = sqlite3.connect(path, timeout = 5, check_same_thread = False)
+    self._db.execute("PRAGMA journal_mode=WAL")
+    self._db.execute("""
+      CREATE TABLE IF NOT EXISTS embeddings (
+        key TEXT PRIMARY KEY,
+        vector BLOB NOT NULL,
+        last_used REAL NOT NULL
+      )
+    """)
+    self._db.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+    self._db.commit()
+
+  def _remember(self, key: str, vector: list[float]) -> None:
+    self._memory[key] = vector
+    self._memory.move_to_end(key)
+
+    while len(self._memory) > self.memory_items:
+      self._memory.popitem(last = False)
+
+  def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+    found = {}
+
+    with self._lock:
+      for key in keys:
+        if key in self._memory:
+          self._memory.move_to_end(key)
+          found[key] = self._memory[key]
+          self.stats["memory_hits"] += 1
+
+      remaining = [key for key in dict.fromkeys(keys) if key not in found]
+      if not remaining:
+        return found
+
+      rows = []
+      for start in range(0, len(remaining), SQLITE_BATCH):
+        batch = remaining[start:start + SQLITE_BATCH]
+        placeholders = ",".join("?" * len(batch))
+        rows.extend(self._db.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch).fetchall())
+
+      for key, blob in rows:
+        vector = np.frombuffer(blob, dtype = np.float16).astype(np.float32).tolist()
+        found[key] = vector
+        self._remember(key, vector)
+        self.stats["disk_hits"] += 1
+
+      if rows:
+        now = time.time()
+        self._db.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key, _ in rows])
+        self._db.commit()
+
+      self.stats["misses"] += len([key for key in remaining if key not in found])
+
+    return found
+
+  def put_many(self, items: dict[str, list[float]]) -> None:
+    if not items:
+      return
+
+    now = time.time()
+
+    with self._lock:
+      for key, vector in items.items():
+        self._remember(key, vector)
+
+      self._db.executemany(
+        "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+        [(key, np.asarray(vector, dtype = np.float16).tobytes(), now) for key, vector in items.items()]
+      )
+      self._evict()
+      self._db.commit()
+
+  # Trim the disk tier back to 90% of its bound, least recently used first
+  def _evict(self) -> None:
+    count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    if count <= self.disk_items:
+      return
+
+    excess = count - int(self.disk_items * 0.9)
+    self._db.execute(
+      "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+      (excess,)
+    )
+    self.stats["evictions"] += excess
+
+
+class CachedEmbeddings:
+  def __init__(self, embeddings, model_name: str, cache: EmbeddingCache = None):
+    self.embeddings = embeddings
+    self.model_name = model_name
+    self.cache = cache or get_default_cache()
+
+  def embed_documents(self, texts: list[str]) -> list[list[float]]:
+    keys = [cache_key(self.model_name, text) for text in texts]
+    found = self.cache.get_many(keys)
+
+    missing = {}
+    for key, text in zip(keys, texts):
+      if key not in found and key not in missing:
+        missing[key] = text
+
+    if missing:
+      vectors = self.embeddings.embed_documents(list(missing.values()))
+      computed = dict(zip(missing.keys(), vectors))
+      self.cache.put_many(computed)
+      found.update(computed)
+
+    return [found[key] for key in keys]
+
+  def embed_query(self, text: str) -> list[float]:
+    return self.embed_documents([text])[0]
+
+
+_default_cache = None
+_default_lock = Lock()
+
+def get_default_cache() -> EmbeddingCache:
+  global _default_cache
+
+  with _default_lock:
+    if _default_cache is None:
+      _default_cache = EmbeddingCache()
+    return _default_cache
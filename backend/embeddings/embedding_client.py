@@ -0,0 +1,98 @@
+from threading import local, Lock
+import logging
+import socket
+import time
+import os
+
+from backend.embeddings.embedding_server import MODEL_NAME, send_frame, recv_frame
+
+logger = logging.getLogger(__name__)
+
+SOCKET_PATH = os.getenv("EMBEDDING_SOCKET")
+TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "30"))
+# How long a worker waits at startup for the server to create its socket, since both are started together
+STARTUP_WAIT = float(os.getenv("EMBEDDING_STARTUP_WAIT", "60"))
+
+
+class EmbeddingServerError(RuntimeError):
+  pass
+
+
+class RemoteEmbeddings:
+  def __init__(self, socket_path: str, timeout: float = TIMEOUT):
+    self.socket_path = socket_path
+    self.timeout = timeout
+    self._local = local()
+
+  def _connection(self) -> socket.socket:
+    conn = getattr(self._local, "conn", None)
+    if conn is None:
+      conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+      conn.settimeout(self.timeout)
+      conn.connect(self.socket_path)
+      self._local.conn = conn
+    return conn
+
+  def _reset(self) -> None:
+    conn = getattr(self._local, "conn", None)
+    if conn is not None:
+      conn.close()
+    self._local.conn = None
+
+  def embed_documents(self, texts: list[str]) -> list[list[float]]:
+    if not texts:
+      return []
+
+    # One reconnect covers a server restart between requests
+    for attempt in range(2):
+      try:
+        conn = self._connection()
+        send_frame(conn, {"texts": texts})
+        response = recv_frame(conn)
+        if response is None:
+          raise ConnectionError("embedding server closed the connection")
+        break
+      except OSError:
+        self._reset()
+        if attempt:
+          raise
+
+    if "error" in response:
+      raise EmbeddingServerError(response["error"])
+    return response["vectors"]
+
+  def embed_query(self, text: str) -> list[float]:
+    return self.embed_documents([text])[0]
+
+
+def _wait_for_socket(path: str, timeout: float) -> bool:
+  deadline = time.monotonic() + timeout
+  while not os.path.exists(path):
+    if time.monotonic() >= deadline:
+      return False
+    time.sleep(0.5)
+  return True
+
+
+_embeddings = None
+_lock = Lock()
+
+# With EMBEDDING_SOCKET set the shared server is required, and a missing server fails startup rather than quietly
+# loading a model copy into every worker. Without it, one in-process model is loaded for development.
+def get_embeddings():
+  global _embeddings
+
+  with _lock:
+    if _embeddings is None:
+      if SOCKET_PATH:
+        if not _wait_for_socket(SOCKET_PATH, STARTUP_WAIT):
+          raise EmbeddingServerError(
+            f"EMBEDDING_SOCKET is {SOCKET_PATH} but no embedding server created it within {STARTUP_WAIT:g}s; "
+            "start it with `python -m backend.embeddings.embedding_server`"
+          )
+        _embeddings = RemoteEmbeddings(SOCKET_PATH)
+      else:
+        logger.warning("EMBEDDING_SOCKET is not set; loading %s in this process instead of using the shared embedding server", MODEL_NAME)
+        from langchain.embeddings import HuggingFaceEmbeddings
+        _embeddings = HuggingFaceEmbeddings(model_name = MODEL_NAME)
+    return _embeddings
@@ -0,0 +1,154 @@
+from queue import Queue, Empty
+from threading import Thread, Event
+import socketserver
+import logging
+import struct
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+SOCKET_PATH = os.getenv("EMBEDDING_SOCKET", "/tmp/resume-screener/embeddings.sock")
+MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "64"))
+MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "10"))
+
+HEADER = struct.Struct("!I")
+
+
+def send_frame(sock, payload: dict) -> None:
+  body = json.dumps(payload).encode("utf-8")
+  sock.sendall(HEADER.pack(len(body)) + body)
+
+def recv_frame(sock) -> dict | None:
+  header = _recv_exact(sock, HEADER.size)
+  if header is None:
+    return None
+
+  (length,) = HEADER.unpack(header)
+  body = _recv_exact(sock, length)
+  if body is None:
+    return None
+
+  return json.loads(body)
+
+def _recv_exact(sock, size: int) -> bytes | None:
+  buf = bytearray()
+  while len(buf) < size:
+    part = sock.recv(size - len(buf))
+    if not part:
+      return None
+    buf.extend(part)
+  return bytes(buf)
+
+
+class _PendingRequest:
+  def __init__(self, texts: list[str]):
+    self.texts = texts
+    self.vectors = None
+    self.error = None
+    self.done = Event()
+
+
+# Groups texts from concurrent callers into one embed_documents call, waiting at most max_wait_ms for a batch to fill
+class MicroBatcher:
+  def __init__(self, model, max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS):
+    self.model = model
+    self.max_batch = max_batch
+    self.max_wait = max_wait_ms / 1000
+    self._pending: Queue = Queue()
+
+    Thread(target = self._run, name = "embedding-batcher", daemon = True).start()
+
+  def embed(self, texts: list[str]) -> list[list[float]]:
+    if not texts:
+      return []
+
+    request = _PendingRequest(texts)
+    self._pending.put(request)
+    request.done.wait()
+
+    if request.error:
+      raise request.error
+    return request.vectors
+
+  def _collect(self) -> list[_PendingRequest]:
+    batch = [self._pending.get()]
+    size = len(batch[0].texts)
+    deadline = time.monotonic() + self.max_wait
+
+    while size < self.max_batch:
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        break
+      try:
+        request = self._pending.get(timeout = remaining)
+      except Empty:
+        break
+      batch.append(request)
+      size += len(request.texts)
+
+    return batch
+
+  def _run(self) -> None:
+    while True:
+      batch = self._collect()
+      texts = [text for request in batch for text in request.texts]
+
+      try:
+        vectors = self.model.embed_documents(texts)
+      except Exception as e:
+        for request in batch:
+          request.error = e
+          request.done.set()
+        continue
+
+      offset = 0
+      for request in batch:
+        request.vectors = vectors[offset:offset + len(request.texts)]
+        offset += len(request.texts)
+        request.done.set()
+
+
+class _EmbeddingHandler(socketserver.BaseRequestHandler):
+  def handle(self) -> None:
+    while True:
+      message = recv_frame(self.request)
+      if message is None:
+        return
+
+      try:
+        vectors = self.server.batcher.embed(message.get("texts", []))
+        send_frame(self.request, {"vectors": vectors})
+      except Exception as e:
+        logger.exception("embedding request failed")
+        send_frame(self.request, {"error": str(e)})
+
+
+class EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+  daemon_threads = True
+
+  def __init__(self, socket_path: str, batcher: MicroBatcher):
+    self.batcher = batcher
+    super().__init__(socket_path, _EmbeddingHandler)
+
+
+def serve(socket_path: str = SOCKET_PATH, model_name: str = MODEL_NAME) -> None:
+  from langchain.embeddings import HuggingFaceEmbeddings
+
+  os.makedirs(os.path.dirname(socket_path), exist_ok = True)
+  if os.path.exists(socket_path):
+    os.remove(socket_path)
+
+  batcher = MicroBatcher(HuggingFaceEmbeddings(model_name = model_name))
+
+  with EmbeddingServer(socket_path, batcher) as server:
+    os.chmod(socket_path, 0o660)
+    logger.info("embedding server listening on %s", socket_path)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+  logging.basicConfig(level = logging.INFO)
+  serve()
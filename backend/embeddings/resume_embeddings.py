@@ -1,27 +1,31 @@
-from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.schema import Document
+from backend.embeddings.embedding_cache import CachedEmbeddings
+from backend.embeddings.embedding_client import MODEL_NAME, get_embeddings
+from backend.utils.vector_manifest import document_hash, vector_id
 
 
 
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+embeddings = CachedEmbeddings(get_embeddings(), MODEL_NAME)
 
-def embed_chunks(chunks: list[Document], user_id: int) -> list[dict]:
+def embed_chunks(chunks: list[Document], user_id: int, doc_hash: str = None) -> list[dict]:
   texts = [chunk.page_content for chunk in chunks]
   vectors = embeddings.embed_documents(texts)
+  doc_hash = doc_hash or document_hash(chunks)
 
   vector_data = []
   
   for (i, (vec, chunk)) in enumerate(zip(vectors, chunks)):
     resume_id = chunk.metadata.get("resume_id", "unknown")
-    vector_id = f"{resume_id}_chunk{i}"
 
     vector_data.append(
       {
-        "id": vector_id,
+        "id": vector_id("res", user_id, doc_hash, i, chunk.page_content),
         "values": vec,
         "metadata": {
           "resume_id": resume_id,
           "user_id": user_id,
+          "doc_hash": doc_hash,
+          "chunk_index": i,
           "text": chunk.page_content,
           **chunk.metadata
         }
@@ -31,6 +35,6 @@ def embed_chunks(chunks: list[Document], user_id: int) -> list[dict]:
   return vector_data
 
 def embed_query(query: str) -> list[float]:
-  return embeddings.embed_documents([query])[0]
+  return embeddings.embed_query(query)
 
 
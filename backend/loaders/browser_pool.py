@@ -0,0 +1,84 @@
+from concurrent.futures import Future
+from threading import Thread, Lock
+import asyncio
+import os
+
+MAX_CONTEXTS = int(os.getenv("BROWSER_POOL_SIZE", "4"))
+NAVIGATION_TIMEOUT_MS = int(os.getenv("BROWSER_NAVIGATION_TIMEOUT_MS", "30000"))
+
+
+# Playwright objects are bound to the event loop that created them, so the pool owns one loop thread
+# and every caller hands its navigation to that loop. The number of warm contexts is the concurrency cap.
+class BrowserPool:
+  def __init__(self, max_contexts: int = MAX_CONTEXTS):
+    self.max_contexts = max_contexts
+    self._loop = asyncio.new_event_loop()
+    self._thread = Thread(target = self._loop.run_forever, name = "browser-pool", daemon = True)
+    self._thread.start()
+
+    self._playwright = None
+    self._browser = None
+    self._contexts = None
+    self._submit(self._start()).result()
+
+  def _submit(self, coro) -> Future:
+    return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+  async def _start(self) -> None:
+    from playwright.async_api import async_playwright
+
+    self._playwright = await async_playwright().start()
+    self._contexts = asyncio.Queue()
+    await self._launch()
+
+  async def _launch(self) -> None:
+    self._browser = await self._playwright.chromium.launch(headless = True)
+
+    while not self._contexts.empty():
+      self._contexts.get_nowait()
+    for _ in range(self.max_contexts):
+      await self._contexts.put(await self._browser.new_context())
+
+  async def _fetch(self, url: str) -> tuple[str, dict]:
+    if not self._browser.is_connected():
+      await self._launch()
+
+    context = await self._contexts.get()
+    try:
+      page = await context.new_page()
+      try:
+        response = await page.goto(url, timeout = NAVIGATION_TIMEOUT_MS)
+        html = await page.content()
+        headers = await response.all_headers() if response else {}
+      finally:
+        await page.close()
+    finally:
+      # Contexts from a browser that has since crashed are dropped; _launch refills the queue
+      if context.browser is self._browser and self._browser.is_connected():
+        await context.clear_cookies()
+        await self._contexts.put(context)
+
+    return html, headers
+
+  def fetch(self, url: str) -> tuple[str, dict]:
+    return self._submit(self._fetch(url)).result()
+
+  async def _stop(self) -> None:
+    await self._browser.close()
+    await self._playwright.stop()
+
+  def close(self) -> None:
+    self._submit(self._stop()).result()
+    self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_pool = None
+_lock = Lock()
+
+def get_browser_pool() -> BrowserPool:
+  global _pool
+
+  with _lock:
+    if _pool is None:
+      _pool = BrowserPool()
+    return _pool
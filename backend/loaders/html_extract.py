@@ -0,0 +1,55 @@
+from bs4 import BeautifulSoup
+import json
+import re
+
+NOISE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "nav", "header", "footer", "aside", "form", "button"]
+NOISE_PATTERN = re.compile(
+  r"cookie|consent|gdpr|banner|newsletter|similar|related|recommend|share|social|breadcrumb|sidebar|footer|navbar|menu|modal|popup|promo|subscribe",
+  re.IGNORECASE
+)
+STRUCTURAL_TAGS = {"html", "body", "main", "article"}
+MAIN_SELECTORS = ["main", "article", "[role=main]", "#content", ".content"]
+
+
+def _clean_lines(text: str) -> str:
+  return "\n".join([line.strip() for line in text.splitlines() if line.strip()])
+
+
+def _json_ld_posting(soup: BeautifulSoup) -> str:
+  for script in soup.find_all("script", type = "application/ld+json"):
+    try:
+      data = json.loads(script.string or "")
+    except ValueError:
+      continue
+
+    items = data if isinstance(data, list) else data.get("@graph", [data])
+    for item in items:
+      if isinstance(item, dict) and item.get("@type") == "JobPosting" and item.get("description"):
+        description = BeautifulSoup(item["description"], "lxml").get_text("\n")
+        return _clean_lines(f"{item.get('title', '')}\n{description}")
+
+  return ""
+
+
+# Structured JobPosting data wins when present; otherwise strip page chrome and keep the main content block
+def extract_main_text(html: str) -> str:
+  soup = BeautifulSoup(html, "lxml")
+
+  posting = _json_ld_posting(soup)
+  if posting:
+    return posting
+
+  for tag in soup(NOISE_TAGS):
+    tag.decompose()
+
+  for el in soup.find_all(attrs = {"class": True}) + soup.find_all(attrs = {"id": True}):
+    if el.decomposed or el.name in STRUCTURAL_TAGS:
+      continue
+    marker = " ".join(el.get("class", [])) + " " + (el.get("id") or "")
+    if NOISE_PATTERN.search(marker):
+      el.decompose()
+
+  candidates = [el for selector in MAIN_SELECTORS for el in soup.select(selector)]
+  root = max(candidates, key = lambda el: len(el.get_text()), default = None) or soup.body or soup
+
+  return _clean_lines(root.get_text("\n"))
@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from langchain.schema import Document
+import requests
+import time
+import os
+
+TTL_SECONDS = int(os.getenv("JD_CACHE_TTL", "3600"))
+MAX_ENTRIES = int(os.getenv("JD_CACHE_MAX_ENTRIES", "512"))
+REVALIDATE_TIMEOUT = float(os.getenv("JD_CACHE_REVALIDATE_TIMEOUT", "5"))
+
+
+@dataclass
+class CachedJD:
+  docs: list[Document]
+  etag: str | None
+  last_modified: str | None
+  fetched_at: float
+
+
+class JDCache:
+  def __init__(self, ttl: int = TTL_SECONDS, max_entries: int = MAX_ENTRIES):
+    self.ttl = ttl
+    self.max_entries = max_entries
+    self.stats = {"hits": 0, "revalidated": 0, "misses": 0}
+
+    self._entries: OrderedDict[str, CachedJD] = OrderedDict()
+    self._lock = Lock()
+
+  def put(self, url: str, docs: list[Document], headers: dict) -> None:
+    entry = CachedJD(
+      docs = docs,
+      etag = headers.get("etag"),
+      last_modified = headers.get("last-modified"),
+      fetched_at = time.time()
+    )
+
+    with self._lock:
+      self._entries[url] = entry
+      self._entries.move_to_end(url)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last = False)
+
+  def get(self, url: str) -> list[Document] | None:
+    with self._lock:
+      entry = self._entries.get(url)
+      if entry:
+        self._entries.move_to_end(url)
+
+    if entry is None:
+      self.stats["misses"] += 1
+      return None
+
+    if time.time() - entry.fetched_at < self.ttl:
+      self.stats["hits"] += 1
+      return entry.docs
+
+    if self._revalidate(url, entry):
+      entry.fetched_at = time.time()
+      self.stats["revalidated"] += 1
+      return entry.docs
+
+    self.stats["misses"] += 1
+    return None
+
+  # A conditional GET answered with 304 means the posting is unchanged and the stored extraction can be reused
+  def _revalidate(self, url: str, entry: CachedJD) -> bool:
+    headers = {}
+    if entry.etag:
+      headers["If-None-Match"] = entry.etag
+    if entry.last_modified:
+      headers["If-Modified-Since"] = entry.last_modified
+    if not headers:
+      return False
+
+    try:
+      response = requests.get(url, headers = headers, timeout = REVALIDATE_TIMEOUT, stream = True)
+      response.close()
+    except requests.RequestException:
+      return False
+
+    return response.status_code == 304
+
+
+jd_cache = JDCache()
@@ -1,7 +1,26 @@
-from langchain_community.document_loaders import PlaywrightURLLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 from urllib.parse import urlparse
+from unstructured.partition.html import partition_html
+from collections import defaultdict
+from threading import Lock
+import requests
+import time
+import os
+
+from backend.loaders.browser_pool import get_browser_pool
+from backend.loaders.html_extract import extract_main_text
+from backend.loaders.jd_cache import jd_cache
+
+HTTP_TIMEOUT = float(os.getenv("JD_HTTP_TIMEOUT", "10"))
+MIN_TEXT_CHARS = int(os.getenv("JD_MIN_TEXT_CHARS", "500"))
+JS_REQUIRED_DOMAINS = [d.strip().lower() for d in os.getenv("JD_JS_REQUIRED_DOMAINS", "myworkdayjobs.com").split(",") if d.strip()]
+# After this many plain-HTTP misses with no successes, a domain goes straight to the browser
+HTTP_MISS_LIMIT = 5
+USER_AGENT = "Mozilla/5.0 (compatible; ResumeScreener/1.0)"
+
+_domain_stats = defaultdict(lambda: {"http": 0, "browser": 0, "http_misses": 0, "http_ms": 0.0, "browser_ms": 0.0})
+_stats_lock = Lock()
 
 def is_valid_url(url: str) -> bool:
   try:
@@ -10,13 +29,78 @@ def is_valid_url(url: str) -> bool:
   except:
     return False
 
+def _record(domain: str, tier: str, started: float, success: bool = True) -> None:
+  with _stats_lock:
+    stats = _domain_stats[domain]
+    if success:
+      stats[tier] += 1
+    else:
+      stats["http_misses"] += 1
+    stats[f"{tier}_ms"] += (time.perf_counter() - started) * 1000
+
+def get_domain_stats() -> dict:
+  with _stats_lock:
+    return {domain: dict(stats) for domain, stats in _domain_stats.items()}
+
+def _needs_browser(domain: str) -> bool:
+  if any(domain == d or domain.endswith("." + d) for d in JS_REQUIRED_DOMAINS):
+    return True
+
+  with _stats_lock:
+    stats = _domain_stats.get(domain)
+    return bool(stats) and stats["http"] == 0 and stats["http_misses"] >= HTTP_MISS_LIMIT
+
+def _fetch_http(url: str) -> tuple[str, dict] | None:
+  try:
+    response = requests.get(url, timeout = HTTP_TIMEOUT, headers = {"User-Agent": USER_AGENT})
+  except requests.RequestException:
+    return None
+
+  if not response.ok or "html" not in response.headers.get("content-type", ""):
+    return None
+
+  text = extract_main_text(response.text)
+  if len(text) < MIN_TEXT_CHARS:
+    return None
+
+  return text, {"etag": response.headers.get("etag"), "last-modified": response.headers.get("last-modified")}
+
+def _fetch_browser(url: str) -> tuple[str, dict]:
+  html, headers = get_browser_pool().fetch(url)
+
+  text = extract_main_text(html)
+  if not text:
+    # Same extraction PlaywrightURLLoader applies to the rendered page
+    text = "\n\n".join([str(el) for el in partition_html(text = html)])
+
+  return text, headers
+
+# Plain HTTP with main-content extraction first; the headless browser only for short/empty results or JS-only domains
 def load_jd(url: str) -> list[Document]:
   if not is_valid_url(url):
     raise ValueError(f"Invalid URL: {url}")
 
-  loader = PlaywrightURLLoader([url])
-  
-  docs = loader.load()
+  cached = jd_cache.get(url)
+  if cached is not None:
+    return cached
+
+  domain = urlparse(url).netloc.lower()
+  fetched = None
+
+  if not _needs_browser(domain):
+    started = time.perf_counter()
+    fetched = _fetch_http(url)
+    _record(domain, "http", started, success = fetched is not None)
+
+  if fetched is None:
+    started = time.perf_counter()
+    fetched = _fetch_browser(url)
+    _record(domain, "browser", started)
+
+  text, headers = fetched
+  docs = [Document(page_content = text, metadata = {"source": url})]
+
+  jd_cache.put(url, docs, headers)
   return docs
 
 def split_jd(loaded_jd: list[Document]) -> list[Document]:
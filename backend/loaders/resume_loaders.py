@@ -1,21 +1,24 @@
-from langchain_community.document_loaders import UnstructuredPDFLoader
-from langchain_community.document_loaders import UnstructuredWordDocumentLoader
-from langchain_community.document_loaders import TextLoader
+from langchain_community.document_loaders import UnstructuredFileIOLoader
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from typing import IO
 
-def load_resume(file_path: str) -> list[Document]:
-  if file_path.endswith(".pdf"):
-    loader = UnstructuredPDFLoader(file_path)
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
 
-    
-  elif file_path.endswith(".docx"):
-    loader = UnstructuredWordDocumentLoader(file_path)
+# Parses the upload from its buffer; the filename only picks the parser and labels the documents
+def load_resume(file: IO[bytes], filename: str) -> list[Document]:
+  name = filename.lower()
+  if name.endswith(".txt"):
+    docs = [Document(page_content = file.read().decode("utf-8", errors = "replace"))]
 
-  elif file_path.endswith(".txt"):
-    loader = TextLoader(file_path)
+  elif name.endswith((".pdf", ".docx")):
+    docs = UnstructuredFileIOLoader(file, metadata_filename = filename).load()
 
-  docs = loader.load()
+  else:
+    raise ValueError(f"Unsupported resume format: {filename}")
+
+  for doc in docs:
+    doc.metadata["source"] = filename
   return docs
 
 
@@ -1,20 +1,24 @@
-from flask import request, jsonify, current_app
-from threading import Thread
-from pinecone import Index
+from flask import request, jsonify, current_app, url_for, Response
 import bcrypt
-import os
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
 
 from .app import routes_bp
 from .db import crud
 from backend.utils.pinecone_init import begin_index
-from backend.utils.resume_jd_match_utils import match_resume_with_retrieval
-from backend.loaders.jd_loaders import load_jd, split_jd
-from backend.loaders.resume_loaders import load_resume, split_resume
-from backend.embeddings.jd_embeddings import embed_jd_chunks, embed_query
-from backend.embeddings.resume_embeddings import embed_chunks, embed_query
-from backend.utils import jd_pc, res_pc
+from backend.utils.analysis_pipeline import run_analysis
+from backend.utils.analysis_jobs import start_analysis_job
+from backend.utils.analysis_stream import start_analysis_stream
+from backend.utils.screening import start_screening_job, SCREENING_TOP_K
+from backend.utils.jd_ranking import rank_jds_for_resume
+from backend.utils.skill_matcher import prescore
+from backend.loaders.jd_loaders import is_valid_url, load_jd
+from backend.utils.upload_utils import UploadTooLarge, read_upload
+from backend.loaders.resume_loaders import SUPPORTED_EXTENSIONS
+from backend.utils.resume_extraction import get_or_extract
+from backend.utils import worker_pool
+from backend.utils.pagination import decode_cursor, optional_number, page_size, split_page
+from backend.chains.llm_gateway import LLMUnavailableError
 
 """
 AUTH routes
@@ -148,6 +152,26 @@ def delete_user():
 RESUME routes
 """
 
+# Returns (upload, None) or (None, error response); the caller owns the upload and must close it
+def read_resume_upload(resume_file):
+    if not (resume_file.filename or "").lower().endswith(SUPPORTED_EXTENSIONS):
+        return None, (jsonify({
+            "error": "Unsupported resume format. Please upload a PDF, TXT or DOCX file."
+        }), 400)
+
+    try:
+        return read_upload(resume_file), None
+    except UploadTooLarge as e:
+        return None, (jsonify({
+            "error": f"The resume file is too large. The limit is {e.limit} bytes."
+        }), 413)
+
+@routes_bp.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    return jsonify({
+        "error": f"The request is too large. The limit is {current_app.config.get('MAX_CONTENT_LENGTH')} bytes."
+    }), 413
+
 @routes_bp.route("/resume", methods=["POST"])
 @jwt_required
 def create_resume():
@@ -163,18 +187,21 @@ def create_resume():
             "error": "There is missing file or text."
         }), 400
     
-    filename = os.path.join("/tmp", secure_filename(resume_file.filename))
-    resume_file.save(filename)
+    # The text arrives with the request, so the file itself is only hashed
+    upload, error = read_resume_upload(resume_file)
+    if error:
+        return error
+    upload.close()
     
-    existing = crud.get_resume_by_filename(filename, current_user_id)
+    existing = crud.get_resume_by_hash(upload.content_hash, current_user_id)
 
     if existing:
         resume_id = existing.id
     else:
-        new_resume = crud.create_resume({"text": text}, current_user_id, filename)
+        new_resume = crud.create_resume({"text": text}, current_user_id, upload.filename, upload.content_hash)
         resume_id = new_resume.id
-
-    os.remove(filename)
+        # Extract in the background so later analyses of this resume skip the extractor call
+        worker_pool.submit(get_or_extract, text)
 
     return jsonify({
         "resume_id": resume_id, "text": text
@@ -186,9 +213,15 @@ def create_resume():
 def get_resumes():
     current_user_id = get_jwt_identity()
 
-    resumes = crud.get_resume_by_id(current_user_id)
+    try:
+        after = decode_cursor(request.args.get("cursor"))
+        limit = page_size(request.args.get("limit"))
+    except ValueError:
+        return jsonify({"error": "Invalid cursor or limit"}), 400
+
+    resumes, next_cursor = split_page(crud.list_resume_summaries(current_user_id, after, limit), limit)
 
-    if not resumes:
+    if not resumes and after is None:
         return jsonify({
             "error": "No resumes found for this user. Please try again or add resumes"
         }), 404
@@ -197,10 +230,12 @@ def get_resumes():
         "resumes": [
             {
                 "id": resume.id,
-                "text": resume.text,
+                "filename": resume.filename,
+                "vector_count": resume.vector_count,
                 "created_at": resume.created_at
             } for resume in resumes
-        ]
+        ],
+        "next_cursor": next_cursor
     }), 200
 
 @routes_bp.route("/resumes/<int:resume_id>", methods=["GET"])
@@ -241,81 +276,252 @@ ANALYSIS routes
 def create_analysis():
     current_user_id = get_jwt_identity()
 
-    resume_index = current_config["RESUME_INDEX"]
-    jd_index = current_config["JD_INDEX"]
+    resume_index = begin_index(current_app.config["RESUME_INDEX"])
+    jd_index = begin_index(current_app.config["JD_INDEX"])
 
     if "resume" not in request.files or not request.form.get("url"):
         return jsonify({
             "error": "There is information missing from the payload. Please make sure that you have sent a resume file (PDF, TXT, DOCX) and the URL to a job posting."
         }), 400
     
-    resume = request.files['resume']
-    filename = os.path.join("/tmp", secure_filename(resume.filename))
-    resume.save(filename)
+    upload, error = read_resume_upload(request.files['resume'])
+    if error:
+        return error
 
     jd_url = request.form.get('url')
 
-    res_docs = load_resume(filename)
-    jd_docs = load_jd(jd_url)
+    # ?mode=job hands the pipeline to the background worker pool and returns immediately
+    if request.values.get("mode") == "job":
+        job = start_analysis_job(current_user_id, upload, jd_url, resume_index, jd_index)
 
-    res_split = split_resume(res_docs)
-    jd_split = split_jd(jd_docs)
+        if not job:
+            return jsonify({
+                "error": "The analysis queue is currently full. Please try again shortly."
+            }), 503
 
-    retrieved_resume = crud.get_resume_by_filename(filename, current_user_id)
-    jd_text = " ".join([c["text"] for c in jd_split])
-    resume_text = " ".join([d.page_content for d in res_docs])
-    if retrieved_resume:
-        resume_id = retrieved_resume.id
-    else:
-        new_resume = crud.create_resume({"text": resume_text}, current_user_id, filename)
-        resume_id = new_resume.id
+        return jsonify({
+            "job_id": job.id,
+            "status": job.status
+        }), 202, {"Location": url_for("mlclient.get_analysis_job", job_id=job.id)}
 
     try:
-        embedded_res = embed_chunks(res_split, current_user_id)
-        embedded_jd = embed_jd_chunks(jd_split, current_user_id)
-        
-        res_pc.upsert_vectors(resume_index, embedded_res)
-        jd_pc.upsert_vectors(jd_index, embedded_jd)
-
-        analysis_data = match_resume_with_retrieval(resume_index, resume_id, jd_text)
+        new_analysis = run_analysis(current_user_id, upload, jd_url, resume_index, jd_index)
+    except LLMUnavailableError as e:
+        return jsonify({
+            "error": "The AI service is busy right now. Please try again shortly."
+        }), 503, {"Retry-After": str(max(1, round(e.retry_after or 1)))}
     except:
         return jsonify({
             "error": "There was an error with the AI processing/pinecone. Please try again."
         }), 409
-    
-    new_analysis = crud.create_analysis(analysis_data, resume_id, current_user_id)
-    os.remove(filename)
+    finally:
+        upload.close()
+
     if not new_analysis:
         return jsonify({
             "error": "failed to create analysis with the information provided. Please try again."
         }), 403
     
     return jsonify({
-        "jd_text": new_analysis.jd_text,
+        "jd_id": new_analysis.jd_id,
+        "jd_text": new_analysis.job_description.text,
         "result": new_analysis.result
     }), 201
 
+@routes_bp.route("/analyses/stream", methods=["POST"])
+@jwt_required
+def stream_analysis():
+    current_user_id = get_jwt_identity()
+
+    resume_index = begin_index(current_app.config["RESUME_INDEX"])
+    jd_index = begin_index(current_app.config["JD_INDEX"])
+
+    if "resume" not in request.files or not request.form.get("url"):
+        return jsonify({
+            "error": "There is information missing from the payload. Please make sure that you have sent a resume file (PDF, TXT, DOCX) and the URL to a job posting."
+        }), 400
+
+    upload, error = read_resume_upload(request.files['resume'])
+    if error:
+        return error
+
+    events = start_analysis_stream(current_user_id, upload, request.form.get('url'), resume_index, jd_index)
+
+    if events is None:
+        return jsonify({
+            "error": "The analysis queue is currently full. Please try again shortly."
+        }), 503
+
+    return Response(events, mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+@routes_bp.route("/resumes/<int:resume_id>/jd-rankings", methods=["POST"])
+@jwt_required
+def rank_jds(resume_id):
+    current_user_id = get_jwt_identity()
+    data = request.get_json()
+
+    if not data or not (data.get("urls") or data.get("analysis_ids")):
+        return jsonify({"error": "Provide job description urls or analysis_ids of stored job descriptions"}), 400
+
+    fetched_resume = crud.get_resume_by_id(resume_id)
+
+    if not fetched_resume or fetched_resume.user_id != current_user_id:
+        return jsonify({
+            "error": "Resume could not be found. Please try again."
+        }), 404
+
+    urls = data.get("urls") or []
+    invalid = [url for url in urls if not is_valid_url(url)]
+    if invalid:
+        return jsonify({"error": f"Invalid job description urls: {invalid}"}), 400
+
+    try:
+        analyze_top = int(data.get("analyze_top", 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "analyze_top must be an integer"}), 400
+
+    resume_index = begin_index(current_app.config["RESUME_INDEX"])
+    jd_index = begin_index(current_app.config["JD_INDEX"])
+
+    try:
+        ranking = rank_jds_for_resume(resume_index, jd_index, current_user_id, fetched_resume, urls, data.get("analysis_ids") or [], analyze_top)
+    except:
+        return jsonify({
+            "error": "There was an error ranking the job descriptions. Please try again."
+        }), 409
+
+    return jsonify({
+        "resume_id": resume_id,
+        "ranking": ranking
+    }), 200
+
+@routes_bp.route("/resumes/<int:resume_id>/prescore", methods=["POST"])
+@jwt_required
+def prescore_resume(resume_id):
+    current_user_id = get_jwt_identity()
+    data = request.get_json()
+
+    if not data or not (data.get("url") or data.get("jd_text")):
+        return jsonify({"error": "A job description url or jd_text is required"}), 400
+
+    fetched_resume = crud.get_resume_by_id(resume_id)
+
+    if not fetched_resume or fetched_resume.user_id != current_user_id:
+        return jsonify({
+            "error": "Resume could not be found. Please try again."
+        }), 404
+
+    jd_text = data.get("jd_text")
+    if not jd_text:
+        if not is_valid_url(data["url"]):
+            return jsonify({"error": "Invalid job description url"}), 400
+        try:
+            jd_text = " ".join([d.page_content for d in load_jd(data["url"])])
+        except:
+            return jsonify({
+                "error": "The job description could not be loaded. Please try again."
+            }), 409
+
+    return jsonify({
+        "resume_id": resume_id,
+        "skills": prescore(fetched_resume.text or "", jd_text).to_dict()
+    }), 200
+
+@routes_bp.route("/screenings", methods=["POST"])
+@jwt_required
+def create_screening():
+    current_user_id = get_jwt_identity()
+    data = request.get_json()
+
+    if not data or not (data.get("url") or data.get("jd_text")):
+        return jsonify({"error": "A job description url or jd_text is required"}), 400
+
+    resume_ids = data.get("resume_ids")
+    if not data.get("all") and not resume_ids:
+        return jsonify({"error": "Provide resume_ids or set all to true"}), 400
+
+    try:
+        top_k = int(data.get("top_k", SCREENING_TOP_K))
+    except (TypeError, ValueError):
+        return jsonify({"error": "top_k must be an integer"}), 400
+
+    if top_k < 1:
+        return jsonify({"error": "top_k must be at least 1"}), 400
+
+    resume_index = begin_index(current_app.config["RESUME_INDEX"])
+
+    job = start_screening_job(current_user_id, data.get("url"), data.get("jd_text"), None if data.get("all") else resume_ids, top_k, resume_index)
+
+    if not job:
+        return jsonify({
+            "error": "The analysis queue is currently full. Please try again shortly."
+        }), 503
+
+    return jsonify({
+        "job_id": job.id,
+        "status": job.status
+    }), 202, {"Location": url_for("mlclient.get_analysis_job", job_id=job.id)}
+
+@routes_bp.route("/analyses/jobs/<job_id>", methods=["GET"])
+@jwt_required
+def get_analysis_job(job_id):
+    current_user_id = get_jwt_identity()
+
+    job = crud.get_analysis_job(job_id)
+
+    if not job or job.user_id != current_user_id:
+        return jsonify({
+            "error": "Analysis job could not be found. Please try again."
+        }), 404
+
+    return jsonify({
+        "job_id": job.id,
+        "status": job.status,
+        "stage": job.stage,
+        "partial": job.partial,
+        "analysis_id": job.analysis_id,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None
+    }), 200
+
+# List rows carry only what a results table needs; the detail route returns the JD text and the full result
+def analysis_summary(analysis):
+    return {
+        "id": analysis.id,
+        "resume_id": analysis.resume_id,
+        "jd_id": analysis.jd_id,
+        "match_score": analysis.match_score,
+        "rating": analysis.overall_rating,
+        "matched_skill_count": analysis.matched_skill_count,
+        "missing_skill_count": analysis.missing_skill_count,
+        "created_at": analysis.created_at
+    }
+
 @routes_bp.route("/analyses", methods=["GET"])
 @jwt_required
 def get_analyses():
     current_user_id = get_jwt_identity()
 
-    analyses = crud.get_analyses_by_user(current_user_id)
+    try:
+        after = decode_cursor(request.args.get("cursor"))
+        limit = page_size(request.args.get("limit"))
+    except ValueError:
+        return jsonify({"error": "Invalid cursor or limit"}), 400
+
+    analyses, next_cursor = split_page(crud.list_analysis_summaries(current_user_id, after = after, limit = limit), limit)
 
-    if not analyses:
+    if not analyses and after is None:
         return jsonify({
             "error": "Analyses could not be retrieved. Please ensure you have created an analysis before trying again."
         }), 404
     
     return jsonify({
-        "analyses": [
-            {
-                "resume_id": analysis.resume_id,
-                "jd_text": analysis.jd_text,
-                "result": analysis.result,
-                "created_at": analysis.created_at
-            } for analysis in analyses
-        ]
+        "analyses": [analysis_summary(analysis) for analysis in analyses],
+        "next_cursor": next_cursor
     }), 200
 
 @routes_bp.route("/analyses/<int:analysis_id>", methods=["GET"])
@@ -329,25 +535,89 @@ def get_analysis(analysis_id):
         }), 404
     
     return jsonify({
-        "result": fetched_analysis.result
+        "resume_id": fetched_analysis.resume_id,
+        "jd_id": fetched_analysis.jd_id,
+        "source_url": fetched_analysis.job_description.source_url,
+        "jd_text": fetched_analysis.job_description.text,
+        "result": fetched_analysis.result,
+        "created_at": fetched_analysis.created_at
     }), 200
 
 @routes_bp.route("/resumes/<int:resume_id>/analysis", methods=["GET"])
 @jwt_required
 def analyses_by_resume(resume_id):
-    resume_id_analyses = crud.get_analyses_by_resume(resume_id)
+    current_user_id = get_jwt_identity()
+
+    try:
+        after = decode_cursor(request.args.get("cursor"))
+        limit = page_size(request.args.get("limit"))
+    except ValueError:
+        return jsonify({"error": "Invalid cursor or limit"}), 400
+
+    resume_id_analyses, next_cursor = split_page(
+        crud.list_analysis_summaries(current_user_id, resume_id = resume_id, after = after, limit = limit), limit
+    )
 
-    if not resume_id_analyses:
+    if not resume_id_analyses and after is None:
         return jsonify({
             "error": "Could not retrieve analyses from that resume ID. Please try again."
         }), 404
     
 
     return jsonify({
-        "analyses": [
-            {"jd_text": analysis.jd_text, "result": analysis.result}
-            for analysis in resume_id_analyses
-        ]
+        "analyses": [analysis_summary(analysis) for analysis in resume_id_analyses],
+        "next_cursor": next_cursor
+    }), 200
+
+@routes_bp.route("/job-descriptions/<int:jd_id>/top-analyses", methods=["GET"])
+@jwt_required
+def top_analyses_for_jd(jd_id):
+    current_user_id = get_jwt_identity()
+
+    try:
+        limit = page_size(request.args.get("limit"))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    top = crud.list_analyses_by_score(current_user_id, jd_id = jd_id, limit = limit)[:limit]
+
+    if not top:
+        return jsonify({
+            "error": "No scored analyses were found for that job description."
+        }), 404
+
+    return jsonify({
+        "jd_id": jd_id,
+        "analyses": [analysis_summary(analysis) for analysis in top]
+    }), 200
+
+@routes_bp.route("/analyses/by-score", methods=["GET"])
+@jwt_required
+def analyses_by_score():
+    current_user_id = get_jwt_identity()
+
+    try:
+        after = decode_cursor(request.args.get("cursor"), parse = float)
+        limit = page_size(request.args.get("limit"))
+    except ValueError:
+        return jsonify({"error": "Invalid cursor or limit"}), 400
+
+    try:
+        min_score = optional_number(request.args, "min_score")
+        max_score = optional_number(request.args, "max_score")
+        jd_id = optional_number(request.args, "jd_id", parse = int)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    analyses, next_cursor = split_page(
+        crud.list_analyses_by_score(current_user_id, jd_id = jd_id, min_score = min_score, max_score = max_score, after = after, limit = limit),
+        limit,
+        key = "match_score"
+    )
+
+    return jsonify({
+        "analyses": [analysis_summary(analysis) for analysis in analyses],
+        "next_cursor": next_cursor
     }), 200
 
 @routes_bp.route("/analyses/<int:analysis_id>", methods=["DELETE"])
@@ -0,0 +1,48 @@
+from backend.utils.vector_store import VectorStore
+from threading import Lock
+
+from backend.db import crud
+from backend.db.models import AnalysisJob
+from backend.utils import worker_pool
+from backend.utils.analysis_pipeline import run_analysis
+from backend.utils.upload_utils import Upload
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+def _run_analysis_job(job_id: str, user_id: int, upload: Upload, jd_url: str, resume_index: VectorStore, jd_index: VectorStore) -> None:
+  partial = {}
+  lock = Lock()
+
+  # Pipeline stages run concurrently, so progress updates are serialized
+  def on_stage(stage: str, data: dict) -> None:
+    with lock:
+      partial.update(data)
+      crud.update_analysis_job(job_id, {"stage": stage, "partial": dict(partial)})
+
+  crud.update_analysis_job(job_id, {"status": JOB_RUNNING})
+
+  try:
+    new_analysis = run_analysis(user_id, upload, jd_url, resume_index, jd_index, on_stage = on_stage)
+    crud.update_analysis_job(job_id, {"status": JOB_SUCCEEDED, "analysis_id": new_analysis.id})
+  except Exception as e:
+    crud.update_analysis_job(job_id, {"status": JOB_FAILED, "error": str(e)})
+  finally:
+    upload.close()
+
+
+# The job takes ownership of the upload and releases it once the pipeline finishes
+def start_analysis_job(user_id: int, upload: Upload, jd_url: str, resume_index: VectorStore, jd_index: VectorStore) -> AnalysisJob | None:
+  job = crud.create_analysis_job(user_id)
+
+  queued = worker_pool.submit(_run_analysis_job, job.id, user_id, upload, jd_url, resume_index, jd_index)
+
+  if not queued:
+    crud.update_analysis_job(job.id, {"status": JOB_FAILED, "error": "The analysis queue is full."})
+    upload.close()
+    return None
+
+  return job
@@ -0,0 +1,133 @@
+from typing import Callable, Optional
+from backend.utils.vector_store import VectorStore
+from langchain.schema import Document
+import logging
+
+from backend.db import crud
+from backend.db.models import Analysis, JobDescription, Resume
+from backend.utils.dag import Stage, run_dag
+from backend.utils.resume_jd_match_utils import match_resume_with_retrieval
+from backend.utils.resume_extraction import get_or_extract
+from backend.loaders.jd_loaders import load_jd, split_jd
+from backend.loaders.resume_loaders import load_resume, split_resume
+from backend.embeddings.jd_embeddings import embed_jd_chunks
+from backend.embeddings.resume_embeddings import embed_chunks
+from backend.utils import jd_pc, res_pc
+from backend.utils.upload_utils import Upload
+from backend.utils.result_cache import text_hash
+from backend.utils.vector_manifest import document_hash
+
+logger = logging.getLogger(__name__)
+
+StageCallback = Callable[[str, dict], None]
+
+
+def _noop(stage: str, partial: dict) -> None:
+  pass
+
+
+def index_resume(resume: Resume, res_split: list[Document], user_id: int, resume_index: VectorStore) -> None:
+  for chunk in res_split:
+    chunk.metadata["resume_id"] = resume.id
+
+  embedded_res = embed_chunks(res_split, user_id, resume.content_hash)
+  res_pc.upsert_vectors(resume_index, embedded_res)
+  crud.set_resume_vector_count(resume.id, len(embedded_res))
+
+
+# Bulk variant for screening runs and backfills: every resume's vectors go out in one batched, parallel upsert.
+# Returns the vector count stored for each resume id.
+def index_resumes(resumes: list[tuple[Resume, list[Document]]], user_id: int, resume_index: VectorStore) -> dict[int, int]:
+  vector_sets = []
+  for resume, res_split in resumes:
+    for chunk in res_split:
+      chunk.metadata["resume_id"] = resume.id
+    vector_sets.append(embed_chunks(res_split, user_id, resume.content_hash))
+
+  reports = res_pc.upsert_vector_sets(resume_index, vector_sets)
+  logger.info("indexed %d resumes in %d upsert batches", len(resumes), len(reports))
+
+  counts = {}
+  for (resume, _), embedded in zip(resumes, vector_sets):
+    crud.set_resume_vector_count(resume.id, len(embedded))
+    counts[resume.id] = len(embedded)
+  return counts
+
+
+def store_jd(jd_text: str, source_url: str = None) -> JobDescription:
+  return crud.get_or_create_job_description(text_hash(jd_text), jd_text, source_url)
+
+
+def index_jd(jd: JobDescription, jd_docs: list[Document], user_id: int, jd_index: VectorStore) -> None:
+  jd_split = split_jd(jd_docs)
+  for chunk in jd_split:
+    chunk.metadata["jd_id"] = jd.id
+
+  doc_hash = document_hash(jd_split)
+  embedded_jd = embed_jd_chunks(jd_split, user_id, doc_hash)
+  jd_pc.upsert_vectors(jd_index, embedded_jd)
+  crud.set_job_description_manifest(jd.id, doc_hash, len(embedded_jd))
+
+
+def _load_resume_stage(user_id: int, upload: Upload, report: StageCallback) -> tuple[Resume, list[Document] | None]:
+  # An identical upload reuses the stored text and vectors instead of parsing and embedding again
+  resume = crud.get_resume_by_hash(upload.content_hash, user_id)
+  if resume and resume.vector_count:
+    report("resume_reused", {"resume_id": resume.id})
+    return resume, None
+
+  if resume:
+    res_split = split_resume([Document(page_content = resume.text or "", metadata = {"source": resume.filename})])
+  else:
+    res_docs = load_resume(upload.open(), upload.filename)
+    res_split = split_resume(res_docs)
+    resume_text = " ".join([d.page_content for d in res_docs])
+    resume = crud.create_resume({"text": resume_text}, user_id, upload.filename, upload.content_hash)
+
+  report("resume_loaded", {"resume_id": resume.id})
+  return resume, res_split
+
+
+def _load_jd_stage(jd_url: str, report: StageCallback) -> tuple[JobDescription, list[Document]]:
+  jd_docs = load_jd(jd_url)
+  jd = store_jd(" ".join([d.page_content for d in jd_docs]), jd_url)
+  report("jd_loaded", {"jd_id": jd.id, "jd_text": jd.text})
+  return jd, jd_docs
+
+
+# Resume parsing and the JD fetch overlap, extraction only waits on the resume, and vector indexing runs in the
+# background because the analysis reads the stored resume text rather than retrieved chunks.
+def run_analysis(user_id: int, upload: Upload, jd_url: str, resume_index: VectorStore, jd_index: VectorStore, on_stage: Optional[StageCallback] = None, on_writer_delta = None) -> Analysis:
+  report = on_stage or _noop
+
+  def index_resume_stage(results: dict) -> None:
+    resume, res_split = results["resume"]
+    if res_split is not None:
+      index_resume(resume, res_split, user_id, resume_index)
+
+  def analyze(results: dict) -> dict:
+    resume, _ = results["resume"]
+    jd, _ = results["jd"]
+    return match_resume_with_retrieval(
+      resume_index, resume.id, jd.text,
+      on_stage = report, resume_text = resume.text, extraction = results["extract"],
+      on_writer_delta = on_writer_delta
+    )
+
+  run = run_dag([
+    Stage("resume", lambda results: _load_resume_stage(user_id, upload, report)),
+    Stage("jd", lambda results: _load_jd_stage(jd_url, report)),
+    Stage("extract", lambda results: get_or_extract(results["resume"][0].text), deps = ("resume",)),
+    Stage("index_resume", index_resume_stage, deps = ("resume",), background = True),
+    Stage("index_jd", lambda results: index_jd(*results["jd"], user_id, jd_index), deps = ("jd",), background = True),
+    Stage("analyze", analyze, deps = ("resume", "jd", "extract")),
+  ])
+
+  resume, _ = run.results["resume"]
+  jd, _ = run.results["jd"]
+
+  new_analysis = crud.create_analysis({"jd_id": jd.id, "result": run.results["analyze"]}, resume.id, user_id)
+  report("stored", {"analysis_id": new_analysis.id, "timings": dict(run.timings)})
+  logger.info("analysis %s stage timings: %s", new_analysis.id, run.timings)
+
+  return new_analysis
@@ -0,0 +1,60 @@
+from queue import Queue, Empty
+from typing import Iterator
+import logging
+import json
+
+from backend.utils import worker_pool
+from backend.utils.analysis_pipeline import run_analysis
+from backend.utils.upload_utils import Upload
+from backend.utils.vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = 15
+_DONE = object()
+
+
+def format_event(event: str, data: dict) -> str:
+  return f"event: {event}\ndata: {json.dumps(data, default = str)}\n\n"
+
+
+# Runs the pipeline on the worker pool and returns a generator of SSE frames: one per finished stage,
+# then the writer summary token by token, then "done" (or "error")
+def start_analysis_stream(user_id: int, upload: Upload, jd_url: str, resume_index: VectorStore, jd_index: VectorStore) -> Iterator[str] | None:
+  events: Queue = Queue()
+
+  def on_stage(stage: str, data: dict) -> None:
+    events.put((stage, data))
+
+  def on_writer_delta(field: str, delta: str) -> None:
+    events.put(("writer_delta", {"field": field, "delta": delta}))
+
+  def run() -> None:
+    try:
+      new_analysis = run_analysis(user_id, upload, jd_url, resume_index, jd_index, on_stage = on_stage, on_writer_delta = on_writer_delta)
+      events.put(("done", {"analysis_id": new_analysis.id}))
+    except Exception:
+      logger.exception("streamed analysis failed")
+      events.put(("error", {"error": "There was an error with the AI processing/pinecone. Please try again."}))
+    finally:
+      upload.close()
+      events.put(_DONE)
+
+  if not worker_pool.submit(run):
+    upload.close()
+    return None
+
+  def generate() -> Iterator[str]:
+    while True:
+      try:
+        item = events.get(timeout = HEARTBEAT_SECONDS)
+      except Empty:
+        # SSE comment line; keeps proxies from closing an idle connection during long LLM calls
+        yield ": keep-alive\n\n"
+        continue
+
+      if item is _DONE:
+        return
+      yield format_event(*item)
+
+  return generate()
@@ -0,0 +1,122 @@
+import re
+import os
+
+from backend.chains.llm_gateway import count_tokens, truncate_tokens
+from backend.utils.skill_matcher import get_matcher
+
+# Bounds both a full stored resume and the context assembled from retrieved chunks
+RESUME_TOKEN_BUDGET = int(os.getenv("CONTEXT_RESUME_TOKENS", "3000"))
+JD_TOKEN_BUDGET = int(os.getenv("CONTEXT_JD_TOKENS", "1500"))
+# Chunk overlap in the splitters is 200 characters; look a little further in case a separator moved the boundary
+MAX_OVERLAP_CHARS = 400
+MIN_OVERLAP_CHARS = 20
+# Budget left over after whole sections is filled with a cut-down section only if at least this much remains
+MIN_PARTIAL_SECTION_TOKENS = int(os.getenv("CONTEXT_MIN_PARTIAL_TOKENS", "64"))
+GAP_MARKER = "\n...\n"
+
+REQUIREMENT_CUES = re.compile(
+  r"\b(require[sd]?|requirements?|qualifications?|must|should|experience|proficien\w*|knowledge|skills?|years?|degree|responsibilit\w*|preferred|nice to have|familiar\w*)\b",
+  re.IGNORECASE
+)
+BULLET = re.compile(r"^\s*([-*•▪●]|\d+[.)])\s+")
+
+
+def _overlap(previous: str, following: str) -> int:
+  for size in range(min(len(previous), len(following), MAX_OVERLAP_CHARS), MIN_OVERLAP_CHARS - 1, -1):
+    if previous.endswith(following[:size]):
+      return size
+  return 0
+
+
+def merge_chunks(chunks: list[dict]) -> list[str]:
+  ordered = sorted(chunks, key = lambda c: c["metadata"].get("chunk_index", 0))
+
+  # Runs of neighbouring chunks become one passage with the shared overlap written once
+  passages = []
+  previous_index = None
+  for chunk in ordered:
+    text = chunk["text"].strip()
+    index = chunk["metadata"].get("chunk_index")
+    if not text:
+      continue
+
+    if passages and previous_index is not None and index == previous_index + 1:
+      shared = _overlap(passages[-1], text)
+      passages[-1] += text[shared:] if shared else " " + text
+    else:
+      passages.append(text)
+    previous_index = index
+
+  return passages
+
+
+# Retrieved chunks in document order with overlaps removed; when over budget the lowest-ranked chunks are dropped first
+def build_resume_context(chunks: list[dict], budget: int = RESUME_TOKEN_BUDGET) -> str:
+  kept = list(chunks)
+  context = GAP_MARKER.join(merge_chunks(kept))
+
+  while len(kept) > 1 and count_tokens(context) > budget:
+    kept.pop()
+    context = GAP_MARKER.join(merge_chunks(kept))
+
+  return context
+
+
+def _sections(jd_text: str) -> list[str]:
+  blocks = [b.strip() for b in re.split(r"\n\s*\n", jd_text) if b.strip()]
+  # Scraped pages often come back as one block per line, or as one long line
+  if len(blocks) <= 1:
+    blocks = [line.strip() for line in jd_text.splitlines() if line.strip()]
+  if len(blocks) <= 1:
+    blocks = [s.strip() for s in re.split(r"(?<=[.!?])\s+", jd_text) if s.strip()]
+  return blocks
+
+
+def _requirement_density(section: str, tokens: int) -> float:
+  lines = section.splitlines() or [section]
+  signal = (
+    2 * len(get_matcher().find_skills(section))
+    + len(REQUIREMENT_CUES.findall(section))
+    + sum(1 for line in lines if BULLET.match(line))
+  )
+  return signal / max(tokens, 1)
+
+
+# Keeps the most requirement-dense sections that fit the budget, in their original order
+def _fit_sections(text: str, budget: int) -> str:
+  if count_tokens(text) <= budget:
+    return text
+
+  sections = _sections(text)
+  sized = [(position, section, count_tokens(section)) for position, section in enumerate(sections)]
+  density = {position: _requirement_density(section, tokens) for position, section, tokens in sized}
+  # Sections with no requirement signal are not worth their tokens even when budget is left over
+  ranked = sorted([s for s in sized if density[s[0]] > 0], key = lambda s: density[s[0]], reverse = True)
+
+  # The opening section usually names the role or the candidate, so it stays if it fits
+  chosen, used, skipped = {}, 0, []
+  for position, section, tokens in [sized[0]] + ranked:
+    if position in chosen:
+      continue
+    if used + tokens <= budget:
+      chosen[position] = section
+      used += tokens
+    else:
+      skipped.append((position, section))
+
+  # The best section that did not fit whole is cut to the leftover budget, so text that is one huge block still yields something
+  if skipped and budget - used >= min(MIN_PARTIAL_SECTION_TOKENS, budget):
+    position, section = skipped[0]
+    chosen[position] = truncate_tokens(section, budget - used)
+
+  fitted = "\n\n".join(chosen[position] for position, _, _ in sized if position in chosen)
+  # The separators are not in the section counts; capping here also makes fitting already fitted text a no-op
+  return fitted if count_tokens(fitted) <= budget else truncate_tokens(fitted, budget)
+
+
+def fit_jd(jd_text: str, budget: int = JD_TOKEN_BUDGET) -> str:
+  return _fit_sections(jd_text, budget)
+
+# Skill mentions, experience bullets and dates are what the extractor and analyzer use, and score the same way in a resume
+def fit_resume(resume_text: str, budget: int = RESUME_TOKEN_BUDGET) -> str:
+  return _fit_sections(resume_text, budget)
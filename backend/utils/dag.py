@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Callable
+import logging
+import time
+
+from backend.utils import worker_pool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+  name: str
+  fn: Callable[[dict], Any]
+  deps: tuple[str, ...] = ()
+  # Background stages start once their deps finish but are handed to the worker pool and never awaited
+  background: bool = False
+
+
+@dataclass
+class DagRun:
+  results: dict = field(default_factory = dict)
+  timings: dict = field(default_factory = dict)
+  _lock: Lock = field(default_factory = Lock, repr = False)
+
+  def record(self, name: str, seconds: float) -> None:
+    with self._lock:
+      self.timings[name] = round(seconds, 4)
+
+
+def _validate(stages: list[Stage]) -> dict[str, Stage]:
+  by_name = {stage.name: stage for stage in stages}
+  if len(by_name) != len(stages):
+    raise ValueError("Stage names must be unique")
+
+  for stage in stages:
+    for dep in stage.deps:
+      if dep not in by_name:
+        raise ValueError(f"Stage {stage.name} depends on unknown stage {dep}")
+      if by_name[dep].background:
+        raise ValueError(f"Stage {stage.name} cannot depend on background stage {dep}")
+
+  return by_name
+
+
+def _timed(run: DagRun, stage: Stage, inputs: dict) -> Any:
+  started = time.perf_counter()
+  try:
+    return stage.fn(inputs)
+  finally:
+    run.record(stage.name, time.perf_counter() - started)
+
+
+def _background(run: DagRun, stage: Stage, inputs: dict) -> None:
+  try:
+    _timed(run, stage, inputs)
+  except Exception:
+    logger.exception("background stage %s failed", stage.name)
+
+
+# Runs every stage as soon as its dependencies have results; stage functions receive the dict of finished results
+def run_dag(stages: list[Stage], max_workers: int = 4) -> DagRun:
+  pending = dict(_validate(stages))
+  run = DagRun()
+  running = {}
+
+  with ThreadPoolExecutor(max_workers = max_workers) as pool:
+    try:
+      while pending or running:
+        ready = [stage for stage in pending.values() if all(dep in run.results for dep in stage.deps)]
+
+        for stage in ready:
+          del pending[stage.name]
+          inputs = dict(run.results)
+
+          if stage.background:
+            # If the background queue is full the stage still runs here, just off the critical path
+            if not worker_pool.submit(_background, run, stage, inputs):
+              pool.submit(_background, run, stage, inputs)
+            run.results[stage.name] = None
+          else:
+            running[pool.submit(_timed, run, stage, inputs)] = stage.name
+
+        if not running:
+          if pending:
+            raise ValueError(f"Stages have a dependency cycle: {sorted(pending)}")
+          break
+
+        done, _ = wait(running, return_when = FIRST_COMPLETED)
+        for future in done:
+          name = running.pop(future)
+          run.results[name] = future.result()
+    except BaseException:
+      for future in running:
+        future.cancel()
+      raise
+
+  return run
@@ -1,18 +1,26 @@
-from pinecone import Index
+from backend.utils.vector_store import VectorStore
+from backend.utils.vector_manifest import get_manifest
+from backend.utils.upsert_batches import upsert_in_batches
 from backend.embeddings import jd_embeddings
 
-def upsert_vectors(index: Index, vector_data: list[dict]) -> None:
+def upsert_vectors(index: VectorStore, vector_data: list[dict]) -> None:
+  if not vector_data:
+    return
+
   jd_id = vector_data[0]["metadata"]["jd_id"]
   user_id = vector_data[0]["metadata"]["user_id"]
-  meta_filter = {"jd_id": jd_id, "user_id":user_id}
+  doc_hash = vector_data[0]["metadata"]["doc_hash"]
+  manifest = get_manifest()
 
-  vectors_exist = query_jd_exists(index, meta_filter)
+  # Vector ids are content-derived, so the upsert is idempotent and needs no existence query first
+  if manifest.is_indexed(index.name, user_id, doc_hash):
+    return
 
-  if not vectors_exist:
-    index.upsert(vectors=vector_data)
+  upsert_in_batches(index, vector_data)
+  manifest.mark_indexed(index.name, user_id, doc_hash, jd_id, len(vector_data))
 
 
-def delete_vectors_by_jd(index: Index, meta_filter: dict) -> None:
+def delete_vectors_by_jd(index: VectorStore, meta_filter: dict) -> None:
   required_keys = {"jd_id", "user_id"}
 
   if set(meta_filter.keys()) != required_keys:
@@ -26,8 +34,9 @@ def delete_vectors_by_jd(index: Index, meta_filter: dict) -> None:
   index.delete(
     filter = pinecone_filter
   )
+  get_manifest().forget(index.name, meta_filter["user_id"], meta_filter["jd_id"])
 
-def query_vectors(index: Index, query: str, user_id: int) -> list[dict]:
+def query_vectors(index: VectorStore, query: str, user_id: int) -> list[dict]:
   embedded_query = jd_embeddings.embed_query(query)
 
   results = index.query(
@@ -41,20 +50,14 @@ def query_vectors(index: Index, query: str, user_id: int) -> list[dict]:
 
   return results["matches"]
 
-def query_jd_exists(index: Index, meta_filter: dict) -> bool:
+def query_jd_exists(index: VectorStore, meta_filter: dict) -> bool:
 
   required_keys = {"jd_id", "user_id"}
 
   if set(meta_filter.keys()) != required_keys:
     raise ValueError(f"Filter must only contain {required_keys}")
 
-  results = index.query(
-    top_k = 1,
-    include_values = False,
-    filter = meta_filter
-  )
-
-  return len(results["matches"]) > 0
+  return index.exists(meta_filter)
 
 
 
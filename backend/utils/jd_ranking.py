@@ -0,0 +1,182 @@
+from concurrent.futures import ThreadPoolExecutor
+from langchain.schema import Document
+import numpy as np
+import logging
+import os
+
+from backend.db import crud
+from backend.db.models import Resume
+from backend.embeddings.jd_embeddings import embeddings as jd_embedder
+from backend.embeddings.resume_embeddings import embeddings as resume_embedder
+from backend.loaders.jd_loaders import load_jd, split_jd
+from backend.loaders.resume_loaders import split_resume
+from backend.utils.analysis_pipeline import store_jd
+from backend.utils.resume_jd_match_utils import match_resume_with_retrieval
+from backend.utils.result_cache import text_hash
+from backend.utils.screening import MAX_QUERY_TOP_K
+from backend.utils.skill_matcher import prescore
+from backend.utils.vector_store import DIMENSION, VectorStore
+
+logger = logging.getLogger(__name__)
+
+JD_FETCH_CONCURRENCY = int(os.getenv("JD_FETCH_CONCURRENCY", "8"))
+RANKING_ANALYZE_CONCURRENCY = int(os.getenv("RANKING_ANALYZE_CONCURRENCY", "3"))
+# Each analyzed JD is a full LLM pipeline run inside the request, so the client's analyze_top is capped here
+RANKING_MAX_ANALYZE_TOP = int(os.getenv("RANKING_MAX_ANALYZE_TOP", "5"))
+
+
+def _unit_rows(vectors: list[list[float]]) -> np.ndarray:
+  matrix = np.asarray(vectors, dtype = np.float32)
+  norms = np.linalg.norm(matrix, axis = 1, keepdims = True)
+  return matrix / np.maximum(norms, 1e-12)
+
+
+def _load_url(url: str) -> dict:
+  try:
+    jd_docs = load_jd(url)
+  except Exception as e:
+    logger.warning("could not load JD %s: %s", url, e)
+    return {"source": url, "error": str(e)}
+
+  jd_text = " ".join([d.page_content for d in jd_docs])
+  jd = {"source": url, "jd_text": jd_text, "docs": jd_docs}
+  # A posting analyzed before is already stored, possibly with its chunk vectors indexed
+  stored = crud.get_job_description_by_hash(text_hash(jd_text))
+  if stored:
+    jd.update(jd_id = stored.id, chunk_count = stored.chunk_count)
+  return jd
+
+
+def collect_jds(user_id: int, urls: list[str], analysis_ids: list[int]) -> list[dict]:
+  with ThreadPoolExecutor(max_workers = max(1, min(JD_FETCH_CONCURRENCY, len(urls)))) as pool:
+    jds = list(pool.map(_load_url, urls))
+
+  # A stored JD is the posting an earlier analysis was run against
+  for analysis in crud.get_analyses_by_ids(analysis_ids, user_id) if analysis_ids else []:
+    jd_text = analysis.job_description.text
+    jds.append({
+      "source": f"analysis:{analysis.id}",
+      "jd_id": analysis.jd_id,
+      "chunk_count": analysis.job_description.chunk_count,
+      "jd_text": jd_text,
+      "docs": [Document(page_content = jd_text or "", metadata = {"source": f"analysis:{analysis.id}"})]
+    })
+
+  return jds
+
+
+# Indexed chunk vectors for the given metadata key, read back from the store in one query instead of re-embedding.
+# Returns only groups whose stored vector count matches `expected`, so a partly indexed document is embedded afresh.
+def _stored_vectors(index: VectorStore, key: str, expected: dict[int, int], user_id: int, probe: np.ndarray) -> dict[int, np.ndarray]:
+  total = sum(expected.values())
+  if not total or total > MAX_QUERY_TOP_K:
+    return {}
+
+  results = index.query(
+    vector = probe.tolist(),
+    top_k = total,
+    filter = {key: {"$in": list(expected)}, "user_id": {"$eq": user_id}},
+    include_metadata = True,
+    include_values = True
+  )
+
+  grouped = {}
+  for match in results["matches"]:
+    owner = match["metadata"].get(key)
+    grouped.setdefault(owner, {})[match["metadata"].get("chunk_index")] = match["values"]
+
+  return {
+    owner: _unit_rows(list(chunks.values()))
+    for owner, chunks in grouped.items() if len(chunks) == expected.get(owner)
+  }
+
+
+def _resume_matrix(resume_index: VectorStore, user_id: int, resume: Resume) -> np.ndarray:
+  # Any unit vector will do: the filter and top_k select every stored chunk of the resume
+  probe = np.zeros(getattr(resume_index, "dimension", DIMENSION), dtype = np.float32)
+  probe[0] = 1.0
+  if resume.vector_count:
+    stored = _stored_vectors(resume_index, "resume_id", {resume.id: resume.vector_count}, user_id, probe)
+    if resume.id in stored:
+      return stored[resume.id]
+
+  res_split = split_resume([Document(page_content = resume.text or "", metadata = {"source": resume.filename})])
+  return _unit_rows(resume_embedder.embed_documents([c.page_content for c in res_split]))
+
+
+# Each JD scores as the mean, over its chunks, of the best-matching resume chunk, so a JD is a good fit only
+# when most of its requirements are covered. Stored resume and JD chunk vectors are read back from the indexes; only
+# JDs that were never indexed are embedded (through the embedding cache). All JDs are scored with one matrix product.
+def score_jds(resume_index: VectorStore, jd_index: VectorStore, user_id: int, resume: Resume, jds: list[dict]) -> None:
+  resume_matrix = _resume_matrix(resume_index, user_id, resume)
+
+  indexed = {jd["jd_id"]: jd["chunk_count"] for jd in jds if "docs" in jd and jd.get("jd_id") and jd.get("chunk_count")}
+  stored = _stored_vectors(jd_index, "jd_id", indexed, user_id, resume_matrix.mean(axis = 0))
+
+  blocks, owners, chunk_texts, text_owners = [], [], [], []
+  for position, jd in enumerate(jds):
+    if "docs" not in jd:
+      continue
+    docs = jd.pop("docs")
+    if jd.get("jd_id") in stored:
+      blocks.append(stored[jd["jd_id"]])
+      owners.extend([position] * len(stored[jd["jd_id"]]))
+      continue
+    for chunk in split_jd(docs):
+      chunk_texts.append(chunk.page_content)
+      text_owners.append(position)
+
+  if chunk_texts:
+    blocks.append(_unit_rows(jd_embedder.embed_documents(chunk_texts)))
+    owners.extend(text_owners)
+  if not blocks:
+    return
+
+  jd_matrix = np.vstack(blocks)
+  best_per_chunk = (jd_matrix @ resume_matrix.T).max(axis = 1)
+
+  owners = np.asarray(owners)
+  totals = np.bincount(owners, weights = best_per_chunk, minlength = len(jds))
+  counts = np.bincount(owners, minlength = len(jds))
+
+  for position, jd in enumerate(jds):
+    if counts[position]:
+      jd["similarity"] = round(float(totals[position] / counts[position]), 4)
+
+
+def _analyze(resume_index: VectorStore, user_id: int, resume: Resume, jd: dict) -> None:
+  try:
+    if "jd_id" not in jd:
+      jd["jd_id"] = store_jd(jd["jd_text"], jd["source"]).id
+    result = match_resume_with_retrieval(resume_index, resume.id, jd["jd_text"], resume_text = resume.text)
+    new_analysis = crud.create_analysis({"jd_id": jd["jd_id"], "result": result}, resume.id, user_id)
+  except Exception as e:
+    logger.exception("analysis of %s failed", jd["source"])
+    jd["error"] = str(e)
+    return
+
+  jd["analysis_id"] = new_analysis.id
+  jd["match_score"] = result.get("analysis", {}).get("match_score")
+
+
+def rank_jds_for_resume(resume_index: VectorStore, jd_index: VectorStore, user_id: int, resume: Resume, urls: list[str], analysis_ids: list[int], analyze_top: int = 0) -> list[dict]:
+  analyze_top = max(0, min(analyze_top, RANKING_MAX_ANALYZE_TOP))
+  jds = collect_jds(user_id, urls, analysis_ids)
+  score_jds(resume_index, jd_index, user_id, resume, jds)
+
+  for jd in jds:
+    if "jd_text" in jd:
+      jd["skills"] = prescore(resume.text or "", jd["jd_text"]).to_dict()
+
+  ranked = sorted(jds, key = lambda jd: jd.get("similarity", -1.0), reverse = True)
+
+  # Only the closest few pay for the LLM chains
+  shortlist = [jd for jd in ranked if "similarity" in jd][:analyze_top]
+  if shortlist:
+    with ThreadPoolExecutor(max_workers = min(RANKING_ANALYZE_CONCURRENCY, len(shortlist))) as pool:
+      list(pool.map(lambda jd: _analyze(resume_index, user_id, resume, jd), shortlist))
+
+  return [
+    {key: jd[key] for key in ("source", "jd_id", "similarity", "skills", "analysis_id", "match_score", "error") if key in jd}
+    for jd in ranked
+  ]
@@ -0,0 +1,54 @@
+import datetime
+import base64
+import json
+import math
+import os
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "200"))
+
+Cursor = tuple[datetime.datetime | float, int]
+
+
+# Opaque to clients: the sort key and id of the last row on the previous page, by default (created_at, id)
+def encode_cursor(key: datetime.datetime | float, row_id: int) -> str:
+  value = key.isoformat() if isinstance(key, datetime.datetime) else key
+  raw = json.dumps([value, row_id]).encode("utf-8")
+  return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str | None, parse = datetime.datetime.fromisoformat) -> Cursor | None:
+  if not cursor:
+    return None
+
+  try:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    key, row_id = json.loads(raw)
+    return parse(key), int(row_id)
+  except (ValueError, TypeError) as e:
+    raise ValueError("Invalid cursor") from e
+
+def page_size(requested: str | None) -> int:
+  if requested is None:
+    return DEFAULT_PAGE_SIZE
+  return max(1, min(MAX_PAGE_SIZE, int(requested)))
+
+# Query-string filters are optional, but a value that is present must parse; raises ValueError naming the argument
+def optional_number(args, name: str, parse = float) -> float | int | None:
+  requested = args.get(name)
+  if requested is None:
+    return None
+
+  try:
+    value = parse(requested)
+  except (ValueError, TypeError):
+    raise ValueError(f"{name} must be a number") from None
+  if isinstance(value, float) and not math.isfinite(value):
+    raise ValueError(f"{name} must be a finite number")
+  return value
+
+# Rows are fetched with limit + 1; the extra row only signals that another page exists
+def split_page(rows: list, limit: int, key: str = "created_at") -> tuple[list, str | None]:
+  if len(rows) <= limit:
+    return rows, None
+  page = rows[:limit]
+  return page, encode_cursor(getattr(page[-1], key), page[-1].id)
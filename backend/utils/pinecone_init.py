@@ -1,30 +1,50 @@
-from pinecone import Pinecone, ServerlessSpec
-from pinecone import Index
 from dotenv import load_dotenv
 from pathlib import Path
+import time
 import os
 
+from backend.utils.vector_store import VectorStore, PineconeVectorStore, LocalVectorStore, DIMENSION
+
 # retrieve the api_key and construct an instance of Pinecone
 
 env_path = Path(__file__).resolve().parents[2] / ".env" # go up from current (embeddings) --> backend root (backend) --> app root (app)
 load_dotenv(dotenv_path=env_path)
 
-pinecone_key = os.getenv("PINECONE_API_KEY")
+# "pinecone" (default) or "local" for the embedded NumPy store used offline, in tests and on-prem
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone")
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", "/tmp/resume-screener/vectors")
+
+_pc = None
+_stores: dict[str, VectorStore] = {}
+
+
+def _pinecone_client():
+  global _pc
+
+  if _pc is None:
+    from pinecone import Pinecone
 
-if not pinecone_key:
-  raise ValueError("PINECONE_API_KEY not found. Did you load your .env?")
+    pinecone_key = os.getenv("PINECONE_API_KEY")
 
+    if not pinecone_key:
+      raise ValueError("PINECONE_API_KEY not found. Did you load your .env?")
 
-pc = Pinecone(api_key=pinecone_key)
+    _pc = Pinecone(api_key=pinecone_key)
+
+  return _pc
 
 
 # Now connect to the index
 
-def begin_index(index_name: str) -> Index:
+def _begin_pinecone_index(index_name: str) -> PineconeVectorStore:
+  from pinecone import ServerlessSpec
+
+  pc = _pinecone_client()
+
   if not pc.has_index(index_name):
     pc.create_index(
       name=index_name,
-      dimension=384,
+      dimension=DIMENSION,
       metric="cosine",
       spec=ServerlessSpec(cloud="aws", region="us-east-1")
     )
@@ -34,6 +54,14 @@ def begin_index(index_name: str) -> Index:
   while not pc.describe_index(index_name).status.ready:
     time.sleep(1)
 
-  return index
+  return PineconeVectorStore(index, index_name)
+
 
+def begin_index(index_name: str) -> VectorStore:
+  if index_name not in _stores:
+    if VECTOR_STORE_BACKEND == "local":
+      _stores[index_name] = LocalVectorStore(os.path.join(LOCAL_VECTOR_STORE_PATH, index_name))
+    else:
+      _stores[index_name] = _begin_pinecone_index(index_name)
 
+  return _stores[index_name]
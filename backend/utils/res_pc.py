@@ -1,20 +1,44 @@
-from pinecone import Index
+from backend.utils.vector_store import VectorStore
+from backend.utils.vector_manifest import get_manifest
+from backend.utils.upsert_batches import upsert_in_batches, BatchReport
 from backend.embeddings import resume_embeddings
 from backend.embeddings import jd_embeddings
 
-def upsert_vectors(index: Index, vector_data: list[dict]) -> None:
+def upsert_vectors(index: VectorStore, vector_data: list[dict]) -> None:
+  if not vector_data:
+    return
+
   resume_id = vector_data[0]["metadata"]["resume_id"]
   user_id = vector_data[0]["metadata"]["user_id"]
-  meta_filter = {"resume_id": resume_id, "user_id": user_id}
+  doc_hash = vector_data[0]["metadata"]["doc_hash"]
+  manifest = get_manifest()
+
+  # Vector ids are content-derived, so the upsert is idempotent and needs no existence query first
+  if manifest.is_indexed(index.name, user_id, doc_hash):
+    return
+
+  upsert_in_batches(index, vector_data)
+  manifest.mark_indexed(index.name, user_id, doc_hash, resume_id, len(vector_data))
+
 
-  vectors_exist = query_resume_exists(index, meta_filter)
+# Backfills and bulk imports: one batched, parallel pipeline across many resumes instead of one request per resume
+def upsert_vector_sets(index: VectorStore, vector_sets: list[list[dict]]) -> list[BatchReport]:
+  manifest = get_manifest()
+  pending = [
+    vector_data for vector_data in vector_sets
+    if vector_data and not manifest.is_indexed(index.name, vector_data[0]["metadata"]["user_id"], vector_data[0]["metadata"]["doc_hash"])
+  ]
 
-  if not vectors_exist:
-    index.upsert(vectors=vector_data)
+  reports = upsert_in_batches(index, [vector for vector_data in pending for vector in vector_data])
 
+  for vector_data in pending:
+    metadata = vector_data[0]["metadata"]
+    manifest.mark_indexed(index.name, metadata["user_id"], metadata["doc_hash"], metadata["resume_id"], len(vector_data))
 
+  return reports
 
-def delete_vectors_by_resume(index: Index, meta_filter: dict) -> None:
+
+def delete_vectors_by_resume(index: VectorStore, meta_filter: dict) -> None:
   required_keys = {"resume_id", "user_id"}
 
   # Ensuring that the filter is only comprised of resume_id and user_id keys/values
@@ -29,9 +53,10 @@ def delete_vectors_by_resume(index: Index, meta_filter: dict) -> None:
   index.delete(
     filter = pinecone_filter
   )
+  get_manifest().forget(index.name, meta_filter["user_id"], meta_filter["resume_id"])
 
 
-def query_vectors(index: Index, query: str, user_id: int) -> list[dict]:
+def query_vectors(index: VectorStore, query: str, user_id: int) -> list[dict]:
   embedded_query = resume_embeddings.embed_query(query)
 
   results = index.query(
@@ -44,7 +69,7 @@ def query_vectors(index: Index, query: str, user_id: int) -> list[dict]:
   return results["matches"]
 
 
-def query_resume_exists(index: Index, meta_filter: dict) -> bool:
+def query_resume_exists(index: VectorStore, meta_filter: dict) -> bool:
 
   required_keys = {"resume_id", "user_id"}
 
@@ -52,16 +77,10 @@ def query_resume_exists(index: Index, meta_filter: dict) -> bool:
   if set(meta_filter.keys()) != required_keys:
     raise ValueError(f"Filter must only contain {required_keys}")
 
-  results = index.query(
-    top_k = 1,
-    include_values = False,
-    filter = meta_filter
-  )
-  
-  return len(results["matches"]) > 0
+  return index.exists(meta_filter)
 
 
-def query_resume_chunks_for_jd(index: Index, resume_id: int, jd_text: str, top_k : int = 5) -> list[dict]:
+def query_resume_chunks_for_jd(index: VectorStore, resume_id: int, jd_text: str, top_k : int = 5) -> list[dict]:
   jd_embedding = jd_embeddings.embed_query(jd_text)
 
   results = index.query(
@@ -0,0 +1,27 @@
+import hashlib
+
+from backend.db import crud
+from backend.chains.multi_step_coordinator import PIPELINE_VERSION
+from backend.embeddings.embedding_cache import normalize_text
+
+# Section name reported to on_stage for each part of a stored result
+STAGES = {"extracted": "extracted", "analysis": "analyzed", "written": "written"}
+
+
+def text_hash(text: str) -> str:
+  return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+def get_cached_result(resume_text: str, jd_text: str, on_stage = None) -> dict | None:
+  stored = crud.get_pipeline_result(text_hash(resume_text), text_hash(jd_text), PIPELINE_VERSION)
+  if not stored:
+    return None
+
+  if on_stage:
+    for key, stage in STAGES.items():
+      if key in stored.result:
+        on_stage(stage, {key: stored.result[key]})
+
+  return stored.result
+
+def store_result(resume_text: str, jd_text: str, result: dict) -> None:
+  crud.create_pipeline_result(text_hash(resume_text), text_hash(jd_text), PIPELINE_VERSION, result)
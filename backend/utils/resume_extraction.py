@@ -0,0 +1,23 @@
+from backend.db import crud
+from backend.chains.resume_extractor import get_resume_extractor_chain, PROMPT_VERSION
+from backend.schemas.extractor_schema import ExtractedResume
+from backend.utils.result_cache import text_hash
+from backend.utils.context_builder import fit_resume
+
+
+def get_stored_extraction(resume_text: str) -> ExtractedResume | None:
+  stored = crud.get_resume_extraction(text_hash(resume_text), PROMPT_VERSION)
+  if not stored:
+    return None
+  return ExtractedResume(**stored.data)
+
+def extract_and_store(resume_text: str) -> ExtractedResume:
+  extraction = get_resume_extractor_chain(resume_text)
+  crud.create_resume_extraction(text_hash(resume_text), PROMPT_VERSION, extraction.model_dump())
+  return extraction
+
+# Extraction depends only on the text the extractor reads, so it is computed once per (text hash, extractor prompt version).
+# Keying on the text rather than the uploaded file means a client-supplied text can never stand in for someone else's file.
+def get_or_extract(resume_text: str) -> ExtractedResume:
+  resume_text = fit_resume(resume_text)
+  return get_stored_extraction(resume_text) or extract_and_store(resume_text)
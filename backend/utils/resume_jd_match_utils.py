@@ -1,11 +1,32 @@
 from backend.embeddings.resume_embeddings import embed_query
 from backend.utils.res_pc import query_resume_chunks_for_jd
+from backend.utils.resume_extraction import get_or_extract
+from backend.utils.result_cache import get_cached_result, store_result
 from backend.chains.multi_step_coordinator import run_resume_pipeline
-from pinecone import Index
+from backend.utils.context_builder import build_resume_context, fit_jd, fit_resume
+from backend.utils.vector_store import VectorStore
 
-def match_resume_with_retrieval(index: Index, resume_id: int, jd_text: str, top_k: int = 5):
+def match_resume_with_retrieval(index: VectorStore, resume_id: int, jd_text: str, top_k: int = 5, on_stage = None, resume_text: str = None, extraction = None, on_writer_delta = None):
+  # The analyzer sees only the requirement-dense part of long postings; the cache is keyed on what it actually saw
+  jd_text = fit_jd(jd_text)
+
+  # With the stored resume text available the extraction comes from (or goes into) the database and retrieval is not needed.
+  # Long resumes are fitted to the same budget retrieved context gets.
+  if resume_text:
+    resume_text = fit_resume(resume_text)
+    # temperature is 0, so the same resume, JD and prompt versions give the same answer
+    cached = get_cached_result(resume_text, jd_text, on_stage = on_stage)
+    if cached:
+      return cached
+
+    extraction = extraction or get_or_extract(resume_text)
+    result = run_resume_pipeline(resume_text, jd_text, True, on_stage = on_stage, extraction = extraction, on_writer_delta = on_writer_delta)
+    store_result(resume_text, jd_text, result)
+    return result
+
+  # Only for callers that have no stored text, e.g. resumes known to the index alone
   chunks = query_resume_chunks_for_jd(index, resume_id, jd_text, top_k)
 
-  resume_text = " ".join([c["text"] for c in chunks])
+  resume_text = build_resume_context(chunks)
 
-  return run_resume_pipeline(resume_text, jd_text, True)
\ No newline at end of file
+  return run_resume_pipeline(resume_text, jd_text, True, on_stage = on_stage, on_writer_delta = on_writer_delta)
\ No newline at end of file
@@ -0,0 +1,162 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from langchain.schema import Document
+from threading import Lock
+import numpy as np
+import logging
+import os
+
+from backend.db import crud
+from backend.db.models import AnalysisJob, Resume
+from backend.embeddings.jd_embeddings import embeddings as jd_embedder
+from backend.loaders.jd_loaders import load_jd, split_jd
+from backend.loaders.resume_loaders import split_resume
+from backend.utils import worker_pool
+from backend.utils.analysis_jobs import JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED
+from backend.utils.analysis_pipeline import index_resumes, store_jd
+from backend.utils.resume_jd_match_utils import match_resume_with_retrieval
+from backend.utils.skill_matcher import SkillPrescore, prescore
+from backend.utils.vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+SCREENING_TOP_K = int(os.getenv("SCREENING_TOP_K", "10"))
+SCREENING_CONCURRENCY = int(os.getenv("SCREENING_CONCURRENCY", "4"))
+# Shortlisted resumes covering less than this share of the JD's known skills skip the LLM; 0 disables the gate
+SKILL_GATE_MIN_SCORE = float(os.getenv("SKILL_GATE_MIN_SCORE", "0.2"))
+# The gate only applies when the JD names enough known skills for the share to mean something
+SKILL_GATE_MIN_JD_SKILLS = int(os.getenv("SKILL_GATE_MIN_JD_SKILLS", "5"))
+# Pinecone caps top_k at 1000 when metadata is returned
+MAX_QUERY_TOP_K = 1000
+
+
+def _load_jd_text(jd_url: str | None, jd_text: str | None) -> tuple[str, list[Document]]:
+  if jd_url:
+    jd_docs = load_jd(jd_url)
+  else:
+    jd_docs = [Document(page_content = jd_text, metadata = {"source": "text"})]
+  return " ".join([d.page_content for d in jd_docs]), jd_docs
+
+
+# The JD centroid covers the whole posting; embedding the raw text as one query would truncate it at the model's input limit
+def _jd_vector(jd_docs: list[Document]) -> list[float]:
+  chunk_vectors = np.asarray(jd_embedder.embed_documents([c.page_content for c in split_jd(jd_docs)]), dtype = np.float32)
+  return chunk_vectors.mean(axis = 0).tolist()
+
+
+def rank_resumes_by_similarity(resume_index: VectorStore, user_id: int, resumes: list[Resume], jd_docs: list[Document]) -> list[tuple[Resume, float]]:
+  unindexed = [
+    (resume, split_resume([Document(page_content = resume.text or "", metadata = {"source": resume.filename})]))
+    for resume in resumes if not resume.vector_count
+  ]
+  # The Resume objects were loaded before indexing, so fresh counts come from what index_resumes stored
+  vector_counts = {resume.id: resume.vector_count for resume in resumes}
+  if unindexed:
+    vector_counts.update(index_resumes(unindexed, user_id, resume_index))
+
+  by_id = {resume.id: resume for resume in resumes}
+  expected_chunks = sum([count or 1 for count in vector_counts.values()])
+
+  results = resume_index.query(
+    vector = _jd_vector(jd_docs),
+    top_k = min(MAX_QUERY_TOP_K, expected_chunks),
+    filter = {"user_id": {"$eq": user_id}, "resume_id": {"$in": list(by_id)}},
+    include_metadata = True
+  )
+
+  # A resume scores as its best-matching chunk; resumes with no chunk in the result set score 0
+  scores = {resume_id: 0.0 for resume_id in by_id}
+  for match in results["matches"]:
+    resume_id = match["metadata"].get("resume_id")
+    if resume_id in scores:
+      scores[resume_id] = max(scores[resume_id], float(match["score"]))
+
+  return sorted([(by_id[resume_id], score) for resume_id, score in scores.items()], key = lambda pair: pair[1], reverse = True)
+
+
+def passes_skill_gate(skills: SkillPrescore) -> bool:
+  if skills.score is None or len(skills.jd_skills) < SKILL_GATE_MIN_JD_SKILLS:
+    return True
+  return skills.score >= SKILL_GATE_MIN_SCORE
+
+
+def _screen_one(resume_index: VectorStore, user_id: int, resume: Resume, jd_text: str, jd_id: int) -> dict:
+  result = match_resume_with_retrieval(resume_index, resume.id, jd_text, resume_text = resume.text)
+  new_analysis = crud.create_analysis({"jd_id": jd_id, "result": result}, resume.id, user_id)
+
+  return {
+    "analysis_id": new_analysis.id,
+    "match_score": result.get("analysis", {}).get("match_score"),
+    "overall_rating": result.get("written", {}).get("overall_rating")
+  }
+
+
+def _run_screening_job(job_id: str, user_id: int, jd_url: str | None, jd_text: str | None, resume_ids: list[int] | None, top_k: int, resume_index: VectorStore) -> None:
+  lock = Lock()
+  partial = {}
+
+  def progress(stage: str, data: dict) -> None:
+    with lock:
+      partial.update(data)
+      crud.update_analysis_job(job_id, {"stage": stage, "partial": dict(partial)})
+
+  crud.update_analysis_job(job_id, {"status": JOB_RUNNING})
+
+  try:
+    resumes = crud.get_resumes_by_ids(resume_ids, user_id) if resume_ids else crud.get_resumes_by_user(user_id, with_text = True)
+    if not resumes:
+      raise ValueError("No resumes matched the request.")
+
+    jd_text, jd_docs = _load_jd_text(jd_url, jd_text)
+    # Every analysis in the run references this one stored JD
+    jd = store_jd(jd_text, jd_url)
+    ranked = rank_resumes_by_similarity(resume_index, user_id, resumes, jd_docs)
+
+    ranking = [
+      {"resume_id": resume.id, "filename": resume.filename, "similarity": round(score, 4)}
+      for resume, score in ranked
+    ]
+
+    shortlist = []
+    for (resume, _), entry in zip(ranked[:top_k], ranking):
+      skills = prescore(resume.text or "", jd_text)
+      entry["skills"] = skills.to_dict()
+      if passes_skill_gate(skills):
+        shortlist.append((resume, entry))
+      else:
+        entry["gated"] = True
+    progress("prefiltered", {"jd_id": jd.id, "ranking": ranking, "screened": 0, "total": len(shortlist)})
+
+    # Only the shortlist pays for the LLM chains, a few at a time
+    with ThreadPoolExecutor(max_workers = SCREENING_CONCURRENCY) as pool:
+      futures = {pool.submit(_screen_one, resume_index, user_id, resume, jd_text, jd.id): entry for resume, entry in shortlist}
+
+      for future in as_completed(futures):
+        entry = futures[future]
+        try:
+          outcome = future.result()
+        except Exception as e:
+          logger.exception("screening resume %s failed", entry["resume_id"])
+          outcome = {"error": str(e)}
+
+        with lock:
+          entry.update(outcome)
+          screened = partial["screened"] + 1
+        progress("screening", {"ranking": ranking, "screened": screened})
+
+    # LLM-scored resumes first by match_score, then the rest (including gated ones) in similarity order
+    ranking.sort(key = lambda item: (item.get("match_score") is None, -(item.get("match_score") or 0), -item["similarity"]))
+    progress("ranked", {"ranking": ranking})
+
+    crud.update_analysis_job(job_id, {"status": JOB_SUCCEEDED})
+  except Exception as e:
+    crud.update_analysis_job(job_id, {"status": JOB_FAILED, "error": str(e)})
+
+
+def start_screening_job(user_id: int, jd_url: str | None, jd_text: str | None, resume_ids: list[int] | None, top_k: int, resume_index: VectorStore) -> AnalysisJob | None:
+  job = crud.create_analysis_job(user_id)
+
+  if not worker_pool.submit(_run_screening_job, job.id, user_id, jd_url, jd_text, resume_ids, top_k, resume_index):
+    crud.update_analysis_job(job.id, {"status": JOB_FAILED, "error": "The analysis queue is full."})
+    return None
+
+  return job
@@ -0,0 +1,130 @@
+from collections import deque
+from dataclasses import dataclass, field
+from threading import Lock
+from pathlib import Path
+import json
+import os
+
+TAXONOMY_PATH = os.getenv("SKILL_TAXONOMY_PATH") or str(Path(__file__).with_name("skill_taxonomy.json"))
+
+
+# Aho-Corasick automaton over lowercased synonyms; one pass over a text finds every synonym occurrence
+class SkillMatcher:
+  def __init__(self, taxonomy: dict[str, list[str]]):
+    self._goto = [{}]
+    self._fail = [0]
+    self._out = [[]]
+    self._patterns = []
+
+    # Only the curated synonyms are patterns; display names such as "Go", "C" or "Excel" are also everyday words
+    for skill, synonyms in taxonomy.items():
+      for synonym in {s.lower() for s in synonyms}:
+        self._add(" ".join(synonym.split()), skill)
+
+    self._build_failure_links()
+
+  def _add(self, pattern: str, skill: str) -> None:
+    state = 0
+    for char in pattern:
+      if char not in self._goto[state]:
+        self._goto.append({})
+        self._fail.append(0)
+        self._out.append([])
+        self._goto[state][char] = len(self._goto) - 1
+      state = self._goto[state][char]
+
+    self._out[state].append(len(self._patterns))
+    self._patterns.append((len(pattern), skill))
+
+  def _build_failure_links(self) -> None:
+    queue = deque(self._goto[0].values())
+
+    while queue:
+      state = queue.popleft()
+      for char, child in self._goto[state].items():
+        queue.append(child)
+        if state == 0:
+          continue
+
+        fallback = self._fail[state]
+        while fallback and char not in self._goto[fallback]:
+          fallback = self._fail[fallback]
+        self._fail[child] = self._goto[fallback].get(char, 0)
+        self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+  def _scan(self, text: str) -> list[tuple[int, int, str]]:
+    matches = []
+    state = 0
+
+    for end, char in enumerate(text, start = 1):
+      while state and char not in self._goto[state]:
+        state = self._fail[state]
+      state = self._goto[state].get(char, 0)
+
+      for pattern in self._out[state]:
+        length, skill = self._patterns[pattern]
+        start = end - length
+        # Whole tokens only, so "java" does not fire inside "javascript"
+        if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+          matches.append((start, end, skill))
+
+    return matches
+
+  def find_skills(self, text: str) -> set[str]:
+    text = " ".join((text or "").lower().split())
+
+    # Leftmost-longest, so "react native" counts as React Native and not also React
+    skills = set()
+    covered_until = 0
+    for start, end, skill in sorted(self._scan(text), key = lambda m: (m[0], m[0] - m[1])):
+      if start >= covered_until:
+        skills.add(skill)
+        covered_until = end
+
+    return skills
+
+
+@dataclass
+class SkillPrescore:
+  jd_skills: set[str] = field(default_factory = set)
+  matched: set[str] = field(default_factory = set)
+  missing: set[str] = field(default_factory = set)
+  # Share of the JD's detected skills also found in the resume; None when the JD names no known skill
+  score: float | None = None
+
+  def to_dict(self) -> dict:
+    return {
+      "score": self.score,
+      "matched_skills": sorted(self.matched),
+      "missing_skills": sorted(self.missing),
+      "jd_skill_count": len(self.jd_skills)
+    }
+
+  def describe(self) -> str:
+    if not self.jd_skills:
+      return "None detected."
+    return f"In both resume and JD: {', '.join(sorted(self.matched)) or 'none'}\n  In JD only: {', '.join(sorted(self.missing)) or 'none'}"
+
+
+def prescore(resume_text: str, jd_text: str, matcher: SkillMatcher | None = None) -> SkillPrescore:
+  matcher = matcher or get_matcher()
+  jd_skills = matcher.find_skills(jd_text)
+  resume_skills = matcher.find_skills(resume_text)
+
+  matched = jd_skills & resume_skills
+  score = round(len(matched) / len(jd_skills), 4) if jd_skills else None
+
+  return SkillPrescore(jd_skills, matched, jd_skills - resume_skills, score)
+
+
+_matcher = None
+_matcher_lock = Lock()
+
+def get_matcher() -> SkillMatcher:
+  global _matcher
+
+  with _matcher_lock:
+    if _matcher is None:
+      with open(TAXONOMY_PATH, encoding = "utf-8") as taxonomy_file:
+        _matcher = SkillMatcher(json.load(taxonomy_file))
+    return _matcher
@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+from tempfile import SpooledTemporaryFile
+from typing import IO
+from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
+import hashlib
+import io
+import os
+
+CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Applied as MAX_CONTENT_LENGTH, so werkzeug refuses larger bodies while parsing; leaves room for the form fields next to the file
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", str(MAX_UPLOAD_BYTES + 1024 * 1024)))
+# Only for file streams werkzeug did not already spool: up to this size they never touch disk
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(2 * 1024 * 1024)))
+
+
+class UploadTooLarge(ValueError):
+  def __init__(self, limit: int):
+    super().__init__(f"Upload exceeds the {limit} byte limit")
+    self.limit = limit
+
+
+# An upload read off the request stream, owned by whoever processes it; close() releases the buffer
+@dataclass
+class Upload:
+  filename: str
+  content_hash: str
+  size: int
+  file: IO[bytes]
+
+  def open(self) -> IO[bytes]:
+    self.file.seek(0)
+    return self.file
+
+  def read(self) -> bytes:
+    return self.open().read()
+
+  def close(self) -> None:
+    self.file.close()
+
+
+def _seekable(stream) -> bool:
+  try:
+    return stream.seekable()
+  except (AttributeError, ValueError):
+    return False
+
+
+# Hashes the file where werkzeug already spooled it and takes that buffer over, so the body is read once, never copied,
+# and outlives the request for background workers. Streams that cannot be rewound are copied into a bounded buffer.
+def read_upload(upload: FileStorage, max_bytes: int | None = None) -> Upload:
+  limit = max_bytes or MAX_UPLOAD_BYTES
+  source = upload.stream
+  in_place = _seekable(source)
+  buffer = source if in_place else SpooledTemporaryFile(max_size = UPLOAD_SPOOL_BYTES)
+  hasher = hashlib.sha256()
+  size = 0
+
+  if in_place:
+    source.seek(0)
+  try:
+    while True:
+      block = source.read(CHUNK_SIZE)
+      if not block:
+        break
+      size += len(block)
+      if size > limit:
+        raise UploadTooLarge(limit)
+      hasher.update(block)
+      if not in_place:
+        buffer.write(block)
+  except:
+    if not in_place:
+      buffer.close()
+    raise
+
+  if in_place:
+    # Werkzeug closes the request's files once the response is sent; the Upload now owns the buffer instead
+    upload.stream = io.BytesIO()
+
+  return Upload(
+    filename = secure_filename(upload.filename or "") or "upload",
+    content_hash = hasher.hexdigest(),
+    size = size,
+    file = buffer
+  )
@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import logging
+import random
+import json
+import time
+import os
+
+from backend.utils.vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# Pinecone rejects upsert requests over 2 MB or 1000 vectors; stay well under both by default
+MAX_BATCH_VECTORS = int(os.getenv("UPSERT_BATCH_VECTORS", "100"))
+MAX_BATCH_BYTES = int(os.getenv("UPSERT_BATCH_BYTES", str(1536 * 1024)))
+MAX_PARALLEL = int(os.getenv("UPSERT_PARALLEL", "4"))
+MAX_ATTEMPTS = int(os.getenv("UPSERT_MAX_ATTEMPTS", "3"))
+BACKOFF_SECONDS = 0.5
+
+
+@dataclass
+class BatchReport:
+  batch: int
+  vectors: int
+  payload_bytes: int
+  attempts: int
+  seconds: float
+  error: str | None = None
+
+
+class UpsertError(RuntimeError):
+  def __init__(self, reports: list[BatchReport]):
+    self.reports = reports
+    failed = [r for r in reports if r.error]
+    super().__init__(f"{len(failed)} of {len(reports)} upsert batches failed: {failed[0].error}")
+
+
+def _payload_size(vector: dict) -> int:
+  return len(json.dumps(vector, separators = (",", ":"), default = str))
+
+def split_batches(vector_data: list[dict], max_vectors: int = MAX_BATCH_VECTORS, max_bytes: int = MAX_BATCH_BYTES) -> list[tuple[list[dict], int]]:
+  batches = []
+  current, current_bytes = [], 0
+
+  for vector in vector_data:
+    size = _payload_size(vector)
+    if current and (len(current) >= max_vectors or current_bytes + size > max_bytes):
+      batches.append((current, current_bytes))
+      current, current_bytes = [], 0
+    current.append(vector)
+    current_bytes += size
+
+  if current:
+    batches.append((current, current_bytes))
+
+  return batches
+
+
+def _send(index: VectorStore, number: int, batch: list[dict], payload_bytes: int, max_attempts: int) -> BatchReport:
+  started = time.perf_counter()
+  error = None
+
+  for attempt in range(1, max_attempts + 1):
+    try:
+      index.upsert(batch)
+      return BatchReport(number, len(batch), payload_bytes, attempt, time.perf_counter() - started)
+    except Exception as e:
+      error = str(e)
+      if attempt < max_attempts:
+        time.sleep(BACKOFF_SECONDS * 2 ** (attempt - 1) * (1 + random.random()))
+
+  return BatchReport(number, len(batch), payload_bytes, max_attempts, time.perf_counter() - started, error)
+
+
+# Each batch retries on its own, so one failed request never resends the batches that already landed
+def upsert_in_batches(index: VectorStore, vector_data: list[dict], max_parallel: int = MAX_PARALLEL, max_attempts: int = MAX_ATTEMPTS) -> list[BatchReport]:
+  batches = split_batches(vector_data)
+  if not batches:
+    return []
+
+  if len(batches) == 1:
+    reports = [_send(index, 0, batches[0][0], batches[0][1], max_attempts)]
+  else:
+    with ThreadPoolExecutor(max_workers = min(max_parallel, len(batches))) as pool:
+      reports = list(pool.map(
+        lambda numbered: _send(index, numbered[0], numbered[1][0], numbered[1][1], max_attempts),
+        enumerate(batches)
+      ))
+
+  for report in reports:
+    logger.debug("upsert batch %d: %d vectors, %d bytes, %d attempts, %.3fs", report.batch, report.vectors, report.payload_bytes, report.attempts, report.seconds)
+
+  if any(report.error for report in reports):
+    raise UpsertError(reports)
+
+  return reports
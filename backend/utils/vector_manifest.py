@@ -0,0 +1,81 @@
+from langchain.schema import Document
+from threading import Lock
+from pathlib import Path
+import hashlib
+import sqlite3
+import os
+
+from backend.embeddings.embedding_cache import normalize_text
+
+MANIFEST_PATH = os.getenv("VECTOR_MANIFEST_PATH", "/tmp/resume-screener/vector_manifest.sqlite3")
+
+
+def document_hash(chunks: list[Document]) -> str:
+  hasher = hashlib.sha256()
+  for chunk in chunks:
+    hasher.update(normalize_text(chunk.page_content).encode("utf-8"))
+    hasher.update(b"\0")
+  return hasher.hexdigest()
+
+# Same user + document + chunk position and text always maps to the same id, so re-upserting is idempotent.
+# The position keeps a chunk repeated within one document (boilerplate, a reused bullet) from overwriting its twin.
+def vector_id(prefix: str, user_id: int, doc_hash: str, chunk_index: int, text: str) -> str:
+  digest = hashlib.sha256(f"{user_id}\0{doc_hash}\0{chunk_index}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+  return f"{prefix}-{digest[:40]}"
+
+
+# Records which (index, user, document hash) sets are already in the vector store so warm documents skip it entirely
+class VectorManifest:
+  def __init__(self, path: str = MANIFEST_PATH):
+    Path(path).parent.mkdir(parents = True, exist_ok = True)
+    self._lock = Lock()
+    self._db = sqlite3.connect(path, timeout = 5, check_same_thread = False)
+    self._db.execute("PRAGMA journal_mode=WAL")
+    self._db.execute("""
+      CREATE TABLE IF NOT EXISTS indexed_documents (
+        index_name TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        doc_hash TEXT NOT NULL,
+        doc_id TEXT,
+        vector_count INTEGER NOT NULL,
+        PRIMARY KEY (index_name, user_id, doc_hash)
+      )
+    """)
+    self._db.execute("CREATE INDEX IF NOT EXISTS ix_indexed_documents_doc ON indexed_documents (index_name, user_id, doc_id)")
+    self._db.commit()
+
+  def is_indexed(self, index_name: str, user_id: int, doc_hash: str) -> bool:
+    with self._lock:
+      row = self._db.execute(
+        "SELECT 1 FROM indexed_documents WHERE index_name = ? AND user_id = ? AND doc_hash = ?",
+        (index_name, str(user_id), doc_hash)
+      ).fetchone()
+    return row is not None
+
+  def mark_indexed(self, index_name: str, user_id: int, doc_hash: str, doc_id, vector_count: int) -> None:
+    with self._lock:
+      self._db.execute(
+        "INSERT OR REPLACE INTO indexed_documents (index_name, user_id, doc_hash, doc_id, vector_count) VALUES (?, ?, ?, ?, ?)",
+        (index_name, str(user_id), doc_hash, str(doc_id), vector_count)
+      )
+      self._db.commit()
+
+  def forget(self, index_name: str, user_id: int, doc_id) -> None:
+    with self._lock:
+      self._db.execute(
+        "DELETE FROM indexed_documents WHERE index_name = ? AND user_id = ? AND doc_id = ?",
+        (index_name, str(user_id), str(doc_id))
+      )
+      self._db.commit()
+
+
+_manifest = None
+_manifest_lock = Lock()
+
+def get_manifest() -> VectorManifest:
+  global _manifest
+
+  with _manifest_lock:
+    if _manifest is None:
+      _manifest = VectorManifest()
+    return _manifest
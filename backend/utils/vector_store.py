@@ -0,0 +1,283 @@
+from abc import ABC, abstractmethod
+from threading import RLock
+from pathlib import Path
+import numpy as np
+import fcntl
+import json
+import os
+
+DIMENSION = 384
+FILTER_COLUMNS = ("user_id", "resume_id", "jd_id")
+
+
+# Common surface of the Pinecone index and the embedded store; filters use Pinecone's {"key": {"$eq": value}} syntax
+class VectorStore(ABC):
+  name: str
+
+  @abstractmethod
+  def upsert(self, vectors: list[dict]) -> None:
+    ...
+
+  @abstractmethod
+  def delete(self, filter: dict) -> None:
+    ...
+
+  # With include_values each match also carries its stored vector under "values"
+  @abstractmethod
+  def query(self, vector: list[float], top_k: int = 10, filter: dict | None = None, include_metadata: bool = True, include_values: bool = False) -> dict:
+    ...
+
+  @abstractmethod
+  def exists(self, filter: dict) -> bool:
+    ...
+
+
+class PineconeVectorStore(VectorStore):
+  def __init__(self, index, name: str, dimension: int = DIMENSION):
+    self.index = index
+    self.name = name
+    self.dimension = dimension
+
+  def upsert(self, vectors: list[dict]) -> None:
+    self.index.upsert(vectors = vectors)
+
+  def delete(self, filter: dict) -> None:
+    self.index.delete(filter = filter)
+
+  def query(self, vector: list[float], top_k: int = 10, filter: dict | None = None, include_metadata: bool = True, include_values: bool = False) -> dict:
+    results = self.index.query(vector = vector, top_k = top_k, filter = filter, include_metadata = include_metadata, include_values = include_values)
+
+    return {
+      "matches": [
+        {
+          "id": match["id"], "score": match["score"], "metadata": match.get("metadata") or {},
+          **({"values": list(match["values"])} if include_values else {})
+        }
+        for match in results["matches"]
+      ]
+    }
+
+  def exists(self, filter: dict) -> bool:
+    # Pinecone has no count-by-filter, so probe with any unit vector and a top_k of one
+    probe = [1.0] + [0.0] * (self.dimension - 1)
+    results = self.index.query(vector = probe, top_k = 1, filter = filter, include_values = False)
+    return len(results["matches"]) > 0
+
+
+def _condition_mask(column: np.ndarray, condition) -> np.ndarray:
+  if not isinstance(condition, dict):
+    condition = {"$eq": condition}
+
+  mask = np.ones(len(column), dtype = bool)
+  for op, value in condition.items():
+    if op == "$eq":
+      mask &= column == value
+    elif op == "$ne":
+      mask &= column != value
+    elif op == "$in":
+      allowed = set(value)
+      mask &= np.fromiter((item in allowed for item in column), dtype = bool, count = len(column))
+    elif op == "$nin":
+      blocked = set(value)
+      mask &= np.fromiter((item not in blocked for item in column), dtype = bool, count = len(column))
+    else:
+      raise ValueError(f"Unsupported filter operator: {op}")
+
+  return mask
+
+
+# Embedded store for one namespace: a memory-mapped float32 matrix of unit vectors (vectors.f32) plus a JSON sidecar
+# holding ids and metadata. Rows are kept contiguous, so a query is one matrix-vector product over the live rows.
+# Writers hold an exclusive flock and readers a shared one, since a delete compacts the matrix in place.
+class LocalVectorStore(VectorStore):
+  def __init__(self, path: str, dimension: int = DIMENSION):
+    self.path = Path(path)
+    self.name = self.path.name
+    self.path.mkdir(parents = True, exist_ok = True)
+    self.dimension = dimension
+
+    self._matrix_path = self.path / "vectors.f32"
+    self._state_path = self.path / "state.json"
+    self._generation_path = self.path / "generation"
+    self._lock_path = self.path / ".lock"
+    self._lock = RLock()
+    self._generation = None
+
+    self._ids: list[str] = []
+    self._positions: dict[str, int] = {}
+    self._metadata: list[dict] = []
+    self._columns: dict[str, np.ndarray] = {}
+    self._capacity = 0
+    self._matrix = None
+
+    with self._read_lock():
+      self._refresh()
+
+  @property
+  def count(self) -> int:
+    return len(self._ids)
+
+  def _open_matrix(self, capacity: int) -> None:
+    if capacity == 0:
+      self._matrix = np.zeros((0, self.dimension), dtype = np.float32)
+    else:
+      self._matrix = np.memmap(self._matrix_path, dtype = np.float32, mode = "r+", shape = (capacity, self.dimension))
+    self._capacity = capacity
+
+  def _stored_generation(self) -> int | None:
+    try:
+      return int(self._generation_path.read_text())
+    except (FileNotFoundError, ValueError):
+      return None
+
+  # Other worker processes may have written since we last looked. Every write bumps the sidecar's generation, which is
+  # mirrored in a tiny file so that checking it does not mean parsing all ids and metadata. Callers hold a flock.
+  def _refresh(self) -> None:
+    if not self._state_path.exists():
+      self._matrix_path.touch()
+      self._open_matrix(0)
+      return
+
+    generation = self._stored_generation()
+    if generation is not None and generation == self._generation:
+      return
+
+    state = json.loads(self._state_path.read_text())
+    self._ids = state["ids"]
+    self._metadata = state["metadata"]
+    self._positions = {vector_id: i for i, vector_id in enumerate(self._ids)}
+    self._reset_columns()
+    self._open_matrix(state["capacity"])
+    self._generation = state.get("generation", 0)
+
+  def _replace(self, path: Path, content: str) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(content)
+    os.replace(tmp_path, path)
+
+  def _persist(self) -> None:
+    if isinstance(self._matrix, np.memmap):
+      self._matrix.flush()
+
+    self._generation = (self._generation or 0) + 1
+    self._replace(self._state_path, json.dumps({"generation": self._generation, "capacity": self._capacity, "ids": self._ids, "metadata": self._metadata}))
+    self._replace(self._generation_path, str(self._generation))
+    self._reset_columns()
+
+  def _grow(self, needed: int) -> None:
+    if needed <= self._capacity:
+      return
+
+    capacity = max(needed, self._capacity * 2, 64)
+    if isinstance(self._matrix, np.memmap):
+      self._matrix.flush()
+    with open(self._matrix_path, "r+b") as f:
+      f.truncate(capacity * self.dimension * 4)
+    self._open_matrix(capacity)
+
+  def _build_column(self, key: str) -> np.ndarray:
+    column = np.empty(self.count, dtype = object)
+    column[:] = [metadata.get(key) for metadata in self._metadata]
+    return column
+
+  def _reset_columns(self) -> None:
+    self._columns = {key: self._build_column(key) for key in FILTER_COLUMNS}
+
+  def _column(self, key: str) -> np.ndarray:
+    if key not in self._columns:
+      self._columns[key] = self._build_column(key)
+    return self._columns[key]
+
+  def _filter_mask(self, filter: dict | None) -> np.ndarray:
+    mask = np.ones(self.count, dtype = bool)
+    for key, condition in (filter or {}).items():
+      mask &= _condition_mask(self._column(key), condition)
+    return mask
+
+  def _flock(self, mode: int):
+    handle = open(self._lock_path, "a")
+    fcntl.flock(handle, mode)
+    return handle
+
+  def _write_lock(self):
+    return self._flock(fcntl.LOCK_EX)
+
+  def _read_lock(self):
+    return self._flock(fcntl.LOCK_SH)
+
+  def upsert(self, vectors: list[dict]) -> None:
+    if not vectors:
+      return
+
+    values = np.asarray([v["values"] for v in vectors], dtype = np.float32)
+    norms = np.linalg.norm(values, axis = 1, keepdims = True)
+    values /= np.where(norms == 0, 1, norms)
+
+    with self._lock, self._write_lock():
+      self._refresh()
+
+      new_ids = [v["id"] for v in vectors if v["id"] not in self._positions]
+      self._grow(self.count + len(set(new_ids)))
+
+      for row, vector in zip(values, vectors):
+        position = self._positions.get(vector["id"])
+        if position is None:
+          position = self.count
+          self._ids.append(vector["id"])
+          self._metadata.append(vector.get("metadata") or {})
+          self._positions[vector["id"]] = position
+        else:
+          self._metadata[position] = vector.get("metadata") or {}
+        self._matrix[position] = row
+
+      self._persist()
+
+  def delete(self, filter: dict) -> None:
+    with self._lock, self._write_lock():
+      self._refresh()
+
+      mask = self._filter_mask(filter)
+      if not mask.any():
+        return
+
+      keep = np.flatnonzero(~mask)
+      self._matrix[:len(keep)] = self._matrix[keep]
+      self._ids = [self._ids[i] for i in keep]
+      self._metadata = [self._metadata[i] for i in keep]
+      self._positions = {vector_id: i for i, vector_id in enumerate(self._ids)}
+
+      self._persist()
+
+  def query(self, vector: list[float], top_k: int = 10, filter: dict | None = None, include_metadata: bool = True, include_values: bool = False) -> dict:
+    with self._lock, self._read_lock():
+      self._refresh()
+
+      candidates = np.flatnonzero(self._filter_mask(filter))
+      if len(candidates) == 0:
+        return {"matches": []}
+
+      # A copy, so a float32 array from the caller is not normalized in place
+      query = np.asarray(vector, dtype = np.float32)
+      query = query / (np.linalg.norm(query) or 1)
+
+      scores = self._matrix[candidates] @ query
+      k = min(top_k, len(candidates))
+      best = np.argpartition(-scores, k - 1)[:k]
+      best = best[np.argsort(-scores[best])]
+
+      return {
+        "matches": [
+          {
+            "id": self._ids[candidates[i]],
+            "score": float(scores[i]),
+            "metadata": self._metadata[candidates[i]] if include_metadata else {},
+            **({"values": self._matrix[candidates[i]].tolist()} if include_values else {})
+          }
+          for i in best
+        ]
+      }
+
+  def exists(self, filter: dict) -> bool:
+    with self._lock, self._read_lock():
+      self._refresh()
+      return bool(self._filter_mask(filter).any())
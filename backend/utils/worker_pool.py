@@ -0,0 +1,49 @@
+from queue import Queue, Full
+from threading import Thread, Lock
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))
+MAX_QUEUED = int(os.getenv("ANALYSIS_QUEUE_SIZE", "32"))
+
+_tasks: Queue = Queue(maxsize = MAX_QUEUED)
+_workers: list[Thread] = []
+_lock = Lock()
+
+
+def _work() -> None:
+  while True:
+    fn, args, kwargs = _tasks.get()
+    try:
+      fn(*args, **kwargs)
+    except Exception:
+      logger.exception("background task %s failed", getattr(fn, "__name__", fn))
+    finally:
+      _tasks.task_done()
+
+
+# Workers are started lazily so that each gunicorn worker process gets its own threads after forking
+def _ensure_workers() -> None:
+  with _lock:
+    _workers[:] = [worker for worker in _workers if worker.is_alive()]
+
+    while len(_workers) < MAX_WORKERS:
+      worker = Thread(target = _work, name = f"analysis-worker-{len(_workers)}", daemon = True)
+      worker.start()
+      _workers.append(worker)
+
+
+def submit(fn, *args, **kwargs) -> bool:
+  _ensure_workers()
+
+  try:
+    _tasks.put_nowait((fn, args, kwargs))
+    return True
+  except Full:
+    return False
+
+
+def pending() -> int:
+  return _tasks.qsize()
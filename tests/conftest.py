@@ -0,0 +1,40 @@
+import itertools
+import tempfile
+import os
+
+import pytest
+
+# Everything the backend persists goes to a throwaway directory; these must be set before backend modules import
+_scratch = tempfile.mkdtemp(prefix = "resume-screener-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_scratch}/app.db"
+os.environ["EMBEDDING_CACHE_PATH"] = f"{_scratch}/embeddings.sqlite3"
+os.environ["VECTOR_MANIFEST_PATH"] = f"{_scratch}/vector_manifest.sqlite3"
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+# Offline embeddings everywhere; get_embeddings hands back whatever is already installed here
+from backend.embeddings import embedding_client
+from tests.fakes import HashEmbeddings
+
+embedding_client._embeddings = HashEmbeddings()
+
+_user_ids = itertools.count(1)
+
+
+@pytest.fixture
+def scratch_dir() -> str:
+  return _scratch
+
+
+@pytest.fixture
+def resume_index(tmp_path):
+  from backend.utils.vector_store import LocalVectorStore
+
+  return LocalVectorStore(str(tmp_path / "resumes"))
+
+
+@pytest.fixture
+def user():
+  from backend.db import crud
+
+  n = next(_user_ids)
+  return crud.create_user(f"user{n}", f"user{n}@tests.local", "x")
@@ -0,0 +1,26 @@
+import hashlib
+
+import numpy as np
+
+from backend.utils.vector_store import DIMENSION
+
+
+# Deterministic offline stand-in for the sentence-transformer: a hashed bag of words, so texts sharing words score closer
+class HashEmbeddings:
+  def __init__(self, dimension: int = DIMENSION):
+    self.dimension = dimension
+    self.calls = 0
+
+  def _vector(self, text: str) -> list[float]:
+    vector = np.zeros(self.dimension, dtype = np.float32)
+    for word in text.lower().split():
+      vector[int(hashlib.sha256(word.encode("utf-8")).hexdigest(), 16) % self.dimension] += 1.0
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+  def embed_documents(self, texts: list[str]) -> list[list[float]]:
+    self.calls += 1
+    return [self._vector(text) for text in texts]
+
+  def embed_query(self, text: str) -> list[float]:
+    return self._vector(text)
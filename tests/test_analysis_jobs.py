@@ -0,0 +1,66 @@
+import io
+
+from sqlalchemy import select
+from werkzeug.datastructures import FileStorage
+
+from backend.db import crud
+from backend.db.models import AnalysisJob
+from backend.db.session import session_scope
+from backend.utils import analysis_jobs, worker_pool
+from backend.utils.analysis_jobs import JOB_FAILED, JOB_QUEUED, JOB_SUCCEEDED, start_analysis_job
+from backend.utils.result_cache import text_hash
+from backend.utils.upload_utils import read_upload
+
+
+def _upload(user):
+  return read_upload(FileStorage(io.BytesIO(f"Grace Hopper {user.id}\nCOBOL".encode()), filename = "cv.txt"))
+
+
+def test_a_job_records_stage_progress_and_the_finished_analysis(user, resume_index, monkeypatch):
+  def run(user_id, upload, jd_url, resume_index, jd_index, on_stage = None):
+    resume = crud.create_resume({"text": upload.read().decode()}, user_id, upload.filename, upload.content_hash)
+    on_stage("resume_loaded", {"resume_id": resume.id})
+    jd = crud.get_or_create_job_description(text_hash(jd_url), "COBOL developer", jd_url)
+    on_stage("jd_loaded", {"jd_id": jd.id})
+    return crud.create_analysis({"jd_id": jd.id, "result": {"analysis": {"match_score": 0.9}}}, resume.id, user_id)
+  monkeypatch.setattr(analysis_jobs, "run_analysis", run)
+
+  upload = _upload(user)
+  job = start_analysis_job(user.id, upload, f"https://jobs.test/{user.id}", resume_index, resume_index)
+  assert job.status == JOB_QUEUED
+  worker_pool._tasks.join()
+
+  finished = crud.get_analysis_job(job.id)
+  assert finished.status == JOB_SUCCEEDED
+  assert finished.stage == "jd_loaded"
+  assert set(finished.partial) == {"resume_id", "jd_id"}
+  assert crud.get_analysis_by_id(finished.analysis_id).match_score == 0.9
+  assert upload.file.closed
+
+
+def test_a_failed_pipeline_marks_the_job_failed(user, resume_index, monkeypatch):
+  def run(*args, **kwargs):
+    raise RuntimeError("the job description could not be fetched")
+  monkeypatch.setattr(analysis_jobs, "run_analysis", run)
+
+  upload = _upload(user)
+  job = start_analysis_job(user.id, upload, "https://jobs.test/missing", resume_index, resume_index)
+  worker_pool._tasks.join()
+
+  failed = crud.get_analysis_job(job.id)
+  assert failed.status == JOB_FAILED
+  assert failed.error == "the job description could not be fetched"
+  assert failed.analysis_id is None
+  assert upload.file.closed
+
+
+def test_a_full_queue_refuses_the_job_and_releases_the_upload(user, resume_index, monkeypatch):
+  monkeypatch.setattr(worker_pool, "submit", lambda fn, *args: False)
+
+  upload = _upload(user)
+  assert start_analysis_job(user.id, upload, "https://jobs.test/full", resume_index, resume_index) is None
+  assert upload.file.closed
+
+  with session_scope() as db:
+    refused = db.execute(select(AnalysisJob).where(AnalysisJob.user_id == user.id)).scalar_one()
+    assert (refused.status, refused.error) == (JOB_FAILED, "The analysis queue is full.")
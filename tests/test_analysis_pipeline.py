@@ -0,0 +1,43 @@
+import io
+
+from langchain.schema import Document
+from werkzeug.datastructures import FileStorage
+
+from backend.schemas.extractor_schema import ExtractedResume
+from backend.utils import analysis_pipeline, dag
+from backend.utils.upload_utils import read_upload
+from backend.utils.vector_store import LocalVectorStore
+
+
+def test_run_analysis_with_a_new_resume_reads_its_text_after_the_insert(user, resume_index, tmp_path, monkeypatch):
+  # Background stages run on the executor's own pool so they finish before the test returns
+  monkeypatch.setattr(dag.worker_pool, "submit", lambda fn, *args: False)
+  monkeypatch.setattr(analysis_pipeline, "load_jd", lambda url: [Document(page_content = "Python engineer with PostgreSQL", metadata = {"source": url})])
+
+  extracted = []
+  def extract(resume_text):
+    extracted.append(resume_text)
+    return ExtractedResume(name = "Ada", skills = ["Python"], experiences = [], education = [], certifications = [], summary = "")
+  monkeypatch.setattr(analysis_pipeline, "get_or_extract", extract)
+
+  seen = {}
+  def match(index, resume_id, jd_text, resume_text = None, **kwargs):
+    seen.update(jd_text = jd_text, resume_text = resume_text)
+    return {"analysis": {"match_score": 0.8}, "written": {"overall_rating": "Good"}}
+  monkeypatch.setattr(analysis_pipeline, "match_resume_with_retrieval", match)
+
+  stages = []
+  upload = read_upload(FileStorage(io.BytesIO(f"Ada Lovelace {user.id}\nPython and PostgreSQL".encode()), filename = "cv.txt"))
+  try:
+    analysis = analysis_pipeline.run_analysis(
+      user.id, upload, "https://jobs.test/1", resume_index, LocalVectorStore(str(tmp_path / "jds")),
+      on_stage = lambda stage, data: stages.append((stage, data))
+    )
+  finally:
+    upload.close()
+
+  assert extracted == [f"Ada Lovelace {user.id}\nPython and PostgreSQL"]
+  assert seen == {"jd_text": "Python engineer with PostgreSQL", "resume_text": extracted[0]}
+  assert dict(stages)["jd_loaded"]["jd_text"] == "Python engineer with PostgreSQL"
+  assert analysis.result["analysis"]["match_score"] == 0.8
+  assert analysis.match_score == 0.8
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+import io
+import json
+
+from langchain.schema import Document
+from langchain_core.messages import AIMessage, AIMessageChunk
+from werkzeug.datastructures import FileStorage
+
+from backend.chains import resume_writer
+from backend.schemas.extractor_schema import ExtractedResume
+from backend.utils import analysis_pipeline, dag
+from backend.utils.analysis_stream import start_analysis_stream
+from backend.utils.upload_utils import read_upload
+from backend.utils.vector_store import LocalVectorStore
+
+ANALYSIS = json.dumps({
+  "match_score": 0.7, "matched_skills": ["Python"], "missing_skills": ["Go"], "strengths": ["Backend"], "weaknesses": ["No Go"]
+})
+WRITTEN = {"summary": "A solid Python backend engineer.", "recommendations": "Add Go projects.", "overall_rating": "Moderate Match"}
+
+
+# Stands in for the shared LLM gateway: blocking calls (analyzer, repairs) pop scripted answers, streams replay chunks
+class StubGateway:
+  def __init__(self, answers: list[str], chunks: list[str]):
+    self.answers = answers
+    self.chunks = chunks
+    self.calls = 0
+
+  def call(self, model, messages, call):
+    self.calls += 1
+    return AIMessage(content = self.answers.pop(0))
+
+  def stream(self, model, messages, open_stream):
+    for text in self.chunks:
+      yield AIMessageChunk(content = text)
+
+
+def _stream(user, tmp_path, monkeypatch, gateway: StubGateway) -> list[tuple[str, dict]]:
+  monkeypatch.setattr(resume_writer.llm, "gateway", gateway)
+  monkeypatch.setattr(dag, "worker_pool", SimpleNamespace(submit = lambda fn, *args: False))
+  monkeypatch.setattr(analysis_pipeline, "load_jd", lambda url: [Document(page_content = "Python and Go backend engineer", metadata = {"source": url})])
+  monkeypatch.setattr(analysis_pipeline, "get_or_extract", lambda text: ExtractedResume(
+    name = "Ada", skills = ["Python"], experiences = [], education = [], certifications = [], summary = ""
+  ))
+
+  upload = read_upload(FileStorage(io.BytesIO(f"Ada Lovelace {user.id}\nPython backend services".encode()), filename = "cv.txt"))
+  frames = start_analysis_stream(user.id, upload, "https://jobs.test/stream", LocalVectorStore(str(tmp_path / "resumes")), LocalVectorStore(str(tmp_path / "jds")))
+
+  events = []
+  for frame in frames:
+    if frame.startswith(":"):
+      continue
+    event, data = frame.strip().split("\n")
+    events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+  return events
+
+
+def _chunks(text: str, size: int = 7) -> list[str]:
+  return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_writer_tokens_stream_before_the_validated_report(user, tmp_path, monkeypatch):
+  gateway = StubGateway([ANALYSIS], _chunks(json.dumps(WRITTEN)))
+  events = _stream(user, tmp_path, monkeypatch, gateway)
+
+  names = [name for name, _ in events]
+  deltas = [data for name, data in events if name == "writer_delta"]
+  assert "".join(d["delta"] for d in deltas if d["field"] == "summary") == WRITTEN["summary"]
+  assert names.index("writer_delta") < names.index("written") < names.index("done")
+  assert dict(events)["written"] == {"written": WRITTEN}
+  assert names[-1] == "done"
+
+
+def test_a_truncated_writer_answer_is_repaired_field_by_field(user, tmp_path, monkeypatch):
+  truncated = json.dumps(WRITTEN)[:-40]
+  gateway = StubGateway([ANALYSIS, json.dumps({"overall_rating": "Moderate Match"})], _chunks(truncated))
+  events = _stream(user, tmp_path, monkeypatch, gateway)
+
+  assert gateway.calls == 2
+  assert dict(events)["written"]["written"]["overall_rating"] == "Moderate Match"
+  assert events[-1][0] == "done"
+
+
+def test_an_unrepairable_writer_answer_ends_the_stream_with_an_error(user, tmp_path, monkeypatch):
+  gateway = StubGateway([ANALYSIS, "{}"], _chunks('{"summary": "Cut off mid'))
+  events = _stream(user, tmp_path, monkeypatch, gateway)
+
+  names = [name for name, _ in events]
+  assert "writer_delta" in names
+  assert "written" not in names and "done" not in names
+  assert events[-1] == ("error", {"error": "There was an error with the AI processing/pinecone. Please try again."})
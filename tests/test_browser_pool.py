@@ -0,0 +1,127 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+import asyncio
+import sys
+
+import pytest
+
+from backend.loaders.browser_pool import BrowserPool
+
+
+# In-process stand-in for playwright.async_api: pages echo their url and track how many navigations overlap
+class FakePlaywright:
+  def __init__(self):
+    self.browsers = []
+    self.active = 0
+    self.peak = 0
+    self.stopped = False
+    self.chromium = self
+
+  async def start(self):
+    return self
+
+  async def stop(self):
+    self.stopped = True
+
+  async def launch(self, headless = True):
+    browser = FakeBrowser(self)
+    self.browsers.append(browser)
+    return browser
+
+
+class FakeBrowser:
+  def __init__(self, playwright: FakePlaywright):
+    self.playwright = playwright
+    self.contexts = []
+    self.connected = True
+
+  def is_connected(self) -> bool:
+    return self.connected
+
+  async def new_context(self):
+    context = FakeContext(self)
+    self.contexts.append(context)
+    return context
+
+  async def close(self):
+    self.connected = False
+
+
+class FakeContext:
+  def __init__(self, browser: FakeBrowser):
+    self.browser = browser
+    self.cookie_clears = 0
+
+  async def new_page(self):
+    return FakePage(self.browser.playwright)
+
+  async def clear_cookies(self):
+    self.cookie_clears += 1
+
+
+class FakeResponse:
+  async def all_headers(self) -> dict:
+    return {"etag": '"v1"'}
+
+
+class FakePage:
+  def __init__(self, playwright: FakePlaywright):
+    self.playwright = playwright
+    self.url = None
+
+  async def goto(self, url: str, timeout: int):
+    self.url = url
+    self.playwright.active += 1
+    self.playwright.peak = max(self.playwright.peak, self.playwright.active)
+    await asyncio.sleep(0.01)
+    self.playwright.active -= 1
+    return FakeResponse()
+
+  async def content(self) -> str:
+    return f"<html><body>{self.url}</body></html>"
+
+  async def close(self):
+    pass
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+  fake = FakePlaywright()
+  async_api = ModuleType("playwright.async_api")
+  async_api.async_playwright = lambda: fake
+  monkeypatch.setitem(sys.modules, "playwright", ModuleType("playwright"))
+  monkeypatch.setitem(sys.modules, "playwright.async_api", async_api)
+  return fake
+
+
+def test_fetches_reuse_warm_contexts_up_to_the_pool_size(playwright):
+  pool = BrowserPool(max_contexts = 2)
+  try:
+    urls = [f"https://jobs.test/{n}" for n in range(8)]
+    with ThreadPoolExecutor(max_workers = 8) as callers:
+      results = list(callers.map(pool.fetch, urls))
+  finally:
+    pool.close()
+
+  assert results == [(f"<html><body>{url}</body></html>", {"etag": '"v1"'}) for url in urls]
+  assert len(playwright.browsers) == 1
+  assert len(playwright.browsers[0].contexts) == 2
+  assert playwright.peak <= 2
+  assert sum(context.cookie_clears for context in playwright.browsers[0].contexts) == 8
+  assert playwright.stopped
+
+
+def test_a_disconnected_browser_is_relaunched_with_fresh_contexts(playwright):
+  pool = BrowserPool(max_contexts = 2)
+  try:
+    pool.fetch("https://jobs.test/first")
+    playwright.browsers[0].connected = False
+
+    html, _ = pool.fetch("https://jobs.test/second")
+  finally:
+    pool.close()
+
+  assert "https://jobs.test/second" in html
+  assert len(playwright.browsers) == 2
+  assert pool._contexts.qsize() == 2
+  assert all(context.browser is playwright.browsers[1] for context in pool._contexts._queue)
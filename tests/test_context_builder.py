@@ -0,0 +1,68 @@
+from backend.chains.llm_gateway import count_tokens, truncate_tokens
+from backend.utils.context_builder import build_resume_context, fit_jd, fit_resume, merge_chunks
+
+
+def _chunk(text: str, index: int) -> dict:
+  return {"text": text, "metadata": {"chunk_index": index}}
+
+
+def test_truncate_tokens_stays_within_the_limit():
+  text = "Requires Python and Kubernetes experience. " * 200
+
+  truncated = truncate_tokens(text, 50)
+
+  assert text.startswith(truncated)
+  assert 0 < count_tokens(truncated) <= 50
+
+
+def test_a_jd_that_is_one_oversized_block_is_cut_to_the_budget():
+  jd = "Must have 5 years of Python, SQL and Kubernetes experience " * 300
+
+  fitted = fit_jd(jd, budget = 200)
+
+  assert fitted
+  assert jd.startswith(fitted)
+  assert count_tokens(fitted) <= 200
+
+
+def test_fit_jd_keeps_the_opening_and_the_requirement_dense_sections_in_order():
+  opening = "Senior Backend Engineer at Example Corp."
+  fluff = "Our office has a great view and free snacks every day of the week. " * 20
+  requirements = "Requirements:\n- 5+ years of Python\n- Experience with PostgreSQL and Kubernetes\n- Docker skills"
+  jd = "\n\n".join([opening, fluff, requirements])
+
+  fitted = fit_jd(jd, budget = count_tokens(opening) + count_tokens(requirements) + 10)
+
+  assert fitted.startswith(opening)
+  assert requirements in fitted
+  assert "free snacks" not in fitted
+
+
+def test_short_jds_are_returned_unchanged():
+  assert fit_jd("Python developer", budget = 100) == "Python developer"
+
+
+def test_neighbouring_chunks_merge_without_repeating_the_overlap():
+  shared = "worked on distributed data pipelines"
+  chunks = [_chunk(f"Led the platform team and {shared}", 0), _chunk(f"{shared} in Spark and Kafka", 1), _chunk("Education: BSc", 5)]
+
+  assert merge_chunks(list(reversed(chunks))) == [f"Led the platform team and {shared} in Spark and Kafka", "Education: BSc"]
+
+
+def test_resume_context_drops_the_lowest_ranked_chunks_first():
+  chunks = [_chunk("Python and SQL " * 40, 7), _chunk("Kubernetes " * 40, 2), _chunk("Hobbies: chess " * 40, 12)]
+
+  context = build_resume_context(chunks, budget = count_tokens(chunks[0]["text"] + chunks[1]["text"]) + 10)
+
+  assert "Hobbies" not in context
+  assert context.index("Kubernetes") < context.index("Python")
+
+
+def test_fit_resume_bounds_long_resumes_and_is_stable():
+  resume = "\n\n".join(["Ada Lovelace, Senior Engineer"] + [f"- {n} years of Python, SQL and Kubernetes experience at company {n}" for n in range(400)])
+
+  fitted = fit_resume(resume, budget = 300)
+
+  assert fitted.startswith("Ada Lovelace")
+  assert count_tokens(fitted) <= 300
+  assert fit_resume(fitted, budget = 300) == fitted
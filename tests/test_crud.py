@@ -0,0 +1,25 @@
+from backend.db import crud
+
+
+def test_create_resume_returns_existing_row_for_same_hash(user):
+  first = crud.create_resume({"text": "first upload"}, user.id, "a.pdf", "hash-1")
+  second = crud.create_resume({"text": "second upload"}, user.id, "b.pdf", "hash-1")
+
+  assert second.id == first.id
+  assert second.text == "first upload"
+
+
+def test_create_resume_keeps_hashes_per_user(user):
+  other = crud.create_user("other", "other-crud@tests.local", "x")
+
+  mine = crud.create_resume({"text": "mine"}, user.id, "a.pdf", "hash-2")
+  theirs = crud.create_resume({"text": "theirs"}, other.id, "a.pdf", "hash-2")
+
+  assert mine.id != theirs.id
+
+
+def test_new_job_description_text_is_readable_after_its_session_closes():
+  jd = crud.get_or_create_job_description("jd-hash-detached", "Senior Python engineer")
+
+  assert jd.text == "Senior Python engineer"
+  assert jd.fetched_at is not None
@@ -0,0 +1,102 @@
+from threading import Event
+
+import pytest
+
+from backend.utils import dag
+from backend.utils.dag import Stage, run_dag
+
+
+def test_stages_run_after_their_dependencies_and_see_their_results():
+  order = []
+
+  def step(name, value):
+    def fn(results):
+      order.append(name)
+      return value(results)
+    return fn
+
+  run = run_dag([
+    Stage("sum", step("sum", lambda r: r["a"] + r["b"]), deps = ("a", "b")),
+    Stage("a", step("a", lambda r: 1)),
+    Stage("b", step("b", lambda r: 2)),
+    Stage("double", step("double", lambda r: r["sum"] * 2), deps = ("sum",)),
+  ])
+
+  assert run.results == {"a": 1, "b": 2, "sum": 3, "double": 6}
+  assert set(order[:2]) == {"a", "b"} and order[2:] == ["sum", "double"]
+  assert set(run.timings) == {"a", "b", "sum", "double"}
+
+
+def test_independent_stages_overlap():
+  both_started = Event()
+  started = []
+
+  def wait_for_peer(name):
+    def fn(results):
+      started.append(name)
+      if len(started) == 2:
+        both_started.set()
+      # Only returns if the other stage is running at the same time
+      assert both_started.wait(timeout = 5)
+    return fn
+
+  run_dag([Stage("a", wait_for_peer("a")), Stage("b", wait_for_peer("b"))])
+
+
+def test_a_failing_stage_propagates_and_its_dependents_never_run():
+  ran = []
+
+  def boom(results):
+    raise RuntimeError("stage failed")
+
+  with pytest.raises(RuntimeError, match = "stage failed"):
+    run_dag([
+      Stage("a", boom),
+      Stage("b", lambda r: ran.append("b"), deps = ("a",)),
+    ])
+
+  assert ran == []
+
+
+@pytest.mark.parametrize("stages, message", [
+  ([Stage("a", lambda r: 1), Stage("a", lambda r: 2)], "unique"),
+  ([Stage("a", lambda r: 1, deps = ("missing",))], "unknown stage missing"),
+  ([Stage("a", lambda r: 1, background = True), Stage("b", lambda r: 2, deps = ("a",))], "background stage a"),
+  ([Stage("a", lambda r: 1, deps = ("b",)), Stage("b", lambda r: 2, deps = ("a",))], "cycle"),
+])
+def test_invalid_graphs_are_rejected(stages, message):
+  with pytest.raises(ValueError, match = message):
+    run_dag(stages)
+
+
+def test_background_stages_are_not_awaited_and_their_errors_are_contained(monkeypatch):
+  submitted = []
+  monkeypatch.setattr(dag.worker_pool, "submit", lambda fn, *args: submitted.append((fn, args)) or True)
+
+  def fails(results):
+    raise RuntimeError("background failure")
+
+  run = run_dag([
+    Stage("a", lambda r: 1),
+    Stage("index", fails, deps = ("a",), background = True),
+    Stage("b", lambda r: r["a"] + 1, deps = ("a",)),
+  ])
+
+  assert run.results["b"] == 2
+  assert run.results["index"] is None
+  assert "index" not in run.timings
+
+  # The stage only runs when the worker pool gets to it, and a failure there is logged rather than raised
+  (fn, args), = submitted
+  fn(*args)
+  assert "index" in run.timings
+
+
+def test_background_stages_fall_back_to_the_local_pool_when_the_queue_is_full(monkeypatch):
+  monkeypatch.setattr(dag.worker_pool, "submit", lambda fn, *args: False)
+  ran = Event()
+
+  run = run_dag([Stage("index", lambda r: ran.set(), background = True)])
+
+  assert ran.wait(timeout = 5)
+  assert run.results == {"index": None}
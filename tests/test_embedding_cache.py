@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from backend.embeddings.embedding_cache import CachedEmbeddings, EmbeddingCache, cache_key
+from tests.fakes import HashEmbeddings
+
+
+@pytest.fixture
+def cache(tmp_path):
+  return EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), memory_items = 2, disk_items = 10)
+
+
+def test_only_texts_missing_from_the_cache_are_embedded(cache):
+  model = HashEmbeddings()
+  cached = CachedEmbeddings(model, "test-model", cache)
+
+  first = cached.embed_documents(["python developer", "data engineer", "python developer"])
+  assert model.calls == 1
+  assert first[0] == first[2]
+
+  again = cached.embed_documents(["data engineer", "  python   developer "])
+  assert model.calls == 1
+  assert again == [first[1], first[0]]
+
+
+def test_the_disk_tier_stores_float16_and_survives_a_restart(cache, tmp_path):
+  vector = HashEmbeddings().embed_query("python developer")
+  key = cache_key("test-model", "python developer")
+  cache.put_many({key: vector})
+
+  blob = cache._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()[0]
+  assert len(blob) == len(vector) * 2
+
+  reopened = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+  restored = reopened.get_many([key])[key]
+  assert reopened.stats["disk_hits"] == 1
+  # Half precision keeps unit vectors well within ranking tolerance
+  assert np.allclose(restored, vector, atol = 1e-3)
+  assert np.dot(restored, vector) == pytest.approx(1.0, abs = 1e-3)
+
+
+def test_keys_depend_on_the_model(cache):
+  cache.put_many({cache_key("model-a", "python"): [1.0, 0.0]})
+
+  assert cache.get_many([cache_key("model-b", "python")]) == {}
+  assert cache.stats["misses"] == 1
+
+
+def test_the_disk_tier_evicts_least_recently_used_rows(cache):
+  cache.put_many({f"old-{n}": [float(n)] for n in range(10)})
+  cache.get_many(["old-0"])
+  cache.put_many({"new": [1.0]})
+
+  stored = {key for (key,) in cache._db.execute("SELECT key FROM embeddings")}
+  assert len(stored) == 9
+  assert {"old-0", "new"} <= stored
+  assert cache.stats["evictions"] == 2
@@ -0,0 +1,36 @@
+from threading import Thread
+import os
+
+import pytest
+
+from backend.embeddings import embedding_client
+from backend.embeddings.embedding_client import EmbeddingServerError, RemoteEmbeddings
+from backend.embeddings.embedding_server import EmbeddingServer, MicroBatcher
+from tests.fakes import HashEmbeddings
+
+
+def test_get_embeddings_fails_when_configured_socket_is_missing(monkeypatch, tmp_path):
+  monkeypatch.setattr(embedding_client, "_embeddings", None)
+  monkeypatch.setattr(embedding_client, "SOCKET_PATH", str(tmp_path / "missing.sock"))
+  monkeypatch.setattr(embedding_client, "STARTUP_WAIT", 0)
+
+  with pytest.raises(EmbeddingServerError):
+    embedding_client.get_embeddings()
+
+
+def test_remote_embeddings_round_trip(tmp_path):
+  socket_path = str(tmp_path / "embeddings.sock")
+  model = HashEmbeddings()
+  server = EmbeddingServer(socket_path, MicroBatcher(model))
+  Thread(target = server.serve_forever, daemon = True).start()
+
+  try:
+    assert os.path.exists(socket_path)
+    remote = RemoteEmbeddings(socket_path)
+    vectors = remote.embed_documents(["python developer", "data engineer"])
+
+    assert vectors == model.embed_documents(["python developer", "data engineer"])
+    assert remote.embed_query("python developer") == vectors[0]
+  finally:
+    server.shutdown()
+    server.server_close()
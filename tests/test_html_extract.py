@@ -0,0 +1,38 @@
+import json
+
+from backend.loaders.html_extract import extract_main_text
+
+
+def test_json_ld_job_posting_wins_over_the_page():
+  posting = {"@context": "https://schema.org", "@type": "JobPosting", "title": "Data Engineer", "description": "<p>Build <b>Spark</b> pipelines</p><ul><li>Airflow</li></ul>"}
+  html = f"""
+    <html><head><script type="application/ld+json">{json.dumps({"@graph": [{"@type": "Organization"}, posting]})}</script></head>
+    <body><main>Unrelated marketing copy</main></body></html>
+  """
+
+  assert extract_main_text(html) == "Data Engineer\nBuild\nSpark\npipelines\nAirflow"
+
+
+def test_page_chrome_is_stripped_and_the_main_block_kept():
+  html = """
+    <html><body>
+      <nav>Home Jobs About</nav>
+      <div class="cookie-banner">We use cookies</div>
+      <main>
+        <h1>Backend Engineer</h1>
+        <p>Design APIs in Python and PostgreSQL.</p>
+        <div class="similar-jobs">Frontend Engineer</div>
+      </main>
+      <aside>Share this job</aside>
+      <footer>Copyright</footer>
+      <script>track()</script>
+    </body></html>
+  """
+
+  assert extract_main_text(html) == "Backend Engineer\nDesign APIs in Python and PostgreSQL."
+
+
+def test_pages_without_a_main_block_fall_back_to_the_body():
+  html = "<html><body><div id='sidebar'>Filters</div><div><p>Rust developer</p>\n\n<p>Remote</p></div></body></html>"
+
+  assert extract_main_text(html) == "Rust developer\nRemote"
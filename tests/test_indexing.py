@@ -0,0 +1,25 @@
+from langchain.schema import Document
+
+from backend.db import crud
+from backend.utils import res_pc
+from backend.utils.analysis_pipeline import index_resumes
+
+
+def test_index_resumes_sends_all_resumes_through_one_batched_upsert(user, resume_index, monkeypatch):
+  resumes = [
+    crud.create_resume({"text": f"resume {n} python sql"}, user.id, f"r{n}.txt", f"bulk-{user.id}-{n}")
+    for n in range(3)
+  ]
+  splits = [(resume, [Document(page_content = f"resume {n} python sql", metadata = {})]) for n, resume in enumerate(resumes)]
+
+  calls = []
+  original = res_pc.upsert_vector_sets
+  monkeypatch.setattr(res_pc, "upsert_vector_sets", lambda index, sets: calls.append(len(sets)) or original(index, sets))
+
+  counts = index_resumes(splits, user.id, resume_index)
+
+  assert calls == [3]
+  assert counts == {resume.id: 1 for resume in resumes}
+  assert {crud.get_resume_by_id(resume.id).vector_count for resume in resumes} == {1}
+  for resume in resumes:
+    assert resume_index.exists({"resume_id": {"$eq": resume.id}})
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+from langchain.schema import Document
+import requests
+
+from backend.loaders import jd_cache as jd_cache_module
+from backend.loaders.jd_cache import JDCache
+
+URL = "https://jobs.test/posting"
+DOCS = [Document(page_content = "Python engineer", metadata = {"source": URL})]
+
+
+def _stub_revalidation(monkeypatch, status_code: int = 304, error: Exception | None = None) -> list[dict]:
+  sent = []
+  def get(url, headers = None, **kwargs):
+    sent.append(headers)
+    if error:
+      raise error
+    return SimpleNamespace(status_code = status_code, close = lambda: None)
+  monkeypatch.setattr(jd_cache_module.requests, "get", get)
+  return sent
+
+
+def test_a_fresh_entry_is_served_without_a_request(monkeypatch):
+  sent = _stub_revalidation(monkeypatch)
+  cache = JDCache(ttl = 3600)
+  cache.put(URL, DOCS, {"etag": '"v1"'})
+
+  assert cache.get(URL) is DOCS
+  assert cache.get("https://jobs.test/other") is None
+  assert sent == []
+  assert cache.stats == {"hits": 1, "revalidated": 0, "misses": 1}
+
+
+def test_an_expired_entry_answered_with_304_is_reused(monkeypatch):
+  sent = _stub_revalidation(monkeypatch, 304)
+  cache = JDCache(ttl = 0)
+  cache.put(URL, DOCS, {"etag": '"v1"', "last-modified": "Mon, 05 Oct 2026 10:00:00 GMT"})
+
+  assert cache.get(URL) is DOCS
+  assert sent == [{"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 05 Oct 2026 10:00:00 GMT"}]
+  assert cache.stats["revalidated"] == 1
+
+
+def test_an_expired_entry_that_changed_or_cannot_be_checked_is_a_miss(monkeypatch):
+  cache = JDCache(ttl = 0)
+  cache.put(URL, DOCS, {"etag": '"v1"'})
+
+  _stub_revalidation(monkeypatch, 200)
+  assert cache.get(URL) is None
+
+  _stub_revalidation(monkeypatch, error = requests.ConnectionError("offline"))
+  assert cache.get(URL) is None
+
+  # Without validators there is nothing to revalidate with
+  sent = _stub_revalidation(monkeypatch)
+  cache.put(URL, DOCS, {})
+  assert cache.get(URL) is None
+  assert sent == []
+  assert cache.stats["misses"] == 3
+
+
+def test_the_least_recently_used_entry_is_dropped_past_the_bound(monkeypatch):
+  _stub_revalidation(monkeypatch)
+  cache = JDCache(ttl = 3600, max_entries = 2)
+  cache.put("https://jobs.test/1", DOCS, {})
+  cache.put("https://jobs.test/2", DOCS, {})
+  cache.get("https://jobs.test/1")
+  cache.put("https://jobs.test/3", DOCS, {})
+
+  assert cache.get("https://jobs.test/2") is None
+  assert cache.get("https://jobs.test/1") is DOCS
+  assert cache.get("https://jobs.test/3") is DOCS
@@ -0,0 +1,80 @@
+from collections import defaultdict
+from types import SimpleNamespace
+
+import pytest
+
+from backend.loaders import jd_loaders
+from backend.loaders.jd_cache import JDCache
+
+POSTING = "<html><body><main><h1>Platform Engineer</h1><p>" + "Kubernetes, Terraform and Go. " * 30 + "</p></main></body></html>"
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+  monkeypatch.setattr(jd_loaders, "_domain_stats", defaultdict(lambda: {"http": 0, "browser": 0, "http_misses": 0, "http_ms": 0.0, "browser_ms": 0.0}))
+  monkeypatch.setattr(jd_loaders, "jd_cache", JDCache())
+
+  calls = {"http": [], "browser": [], "http_html": POSTING, "content_type": "text/html; charset=utf-8"}
+
+  def get(url, **kwargs):
+    calls["http"].append(url)
+    return SimpleNamespace(ok = True, text = calls["http_html"], headers = {"content-type": calls["content_type"], "etag": '"v1"'})
+
+  def browser_fetch(url):
+    calls["browser"].append(url)
+    return POSTING, {"etag": '"rendered"'}
+
+  monkeypatch.setattr(jd_loaders.requests, "get", get)
+  monkeypatch.setattr(jd_loaders, "get_browser_pool", lambda: SimpleNamespace(fetch = browser_fetch))
+  return calls
+
+
+def test_plain_http_serves_server_rendered_postings(fetches):
+  docs = jd_loaders.load_jd("https://careers.test/jobs/1")
+
+  assert docs[0].page_content.startswith("Platform Engineer\nKubernetes")
+  assert docs[0].metadata == {"source": "https://careers.test/jobs/1"}
+  assert fetches["browser"] == []
+  assert jd_loaders.get_domain_stats()["careers.test"]["http"] == 1
+
+
+def test_a_short_http_result_falls_back_to_the_browser(fetches):
+  fetches["http_html"] = "<html><body><div id='root'>Loading...</div></body></html>"
+
+  docs = jd_loaders.load_jd("https://spa.test/jobs/1")
+
+  assert fetches["http"] == fetches["browser"] == ["https://spa.test/jobs/1"]
+  assert "Kubernetes" in docs[0].page_content
+  assert jd_loaders.get_domain_stats()["spa.test"]["http_misses"] == 1
+
+
+def test_non_html_responses_are_not_extracted(fetches):
+  fetches["content_type"] = "application/pdf"
+
+  jd_loaders.load_jd("https://files.test/jd.pdf")
+
+  assert fetches["browser"] == ["https://files.test/jd.pdf"]
+
+
+def test_js_only_domains_and_repeat_misses_skip_plain_http(fetches, monkeypatch):
+  monkeypatch.setattr(jd_loaders, "JS_REQUIRED_DOMAINS", ["myworkdayjobs.com"])
+  jd_loaders.load_jd("https://acme.wd5.myworkdayjobs.com/job/1")
+  assert fetches["http"] == []
+
+  fetches["http_html"] = "<html><body>Enable JavaScript</body></html>"
+  for n in range(jd_loaders.HTTP_MISS_LIMIT + 2):
+    jd_loaders.load_jd(f"https://spa.test/jobs/{n}")
+  assert len(fetches["http"]) == jd_loaders.HTTP_MISS_LIMIT
+
+
+def test_a_cached_posting_is_not_fetched_again(fetches):
+  first = jd_loaders.load_jd("https://careers.test/jobs/2")
+  second = jd_loaders.load_jd("https://careers.test/jobs/2")
+
+  assert second is first
+  assert fetches["http"] == ["https://careers.test/jobs/2"]
+
+
+def test_invalid_urls_are_rejected(fetches):
+  with pytest.raises(ValueError):
+    jd_loaders.load_jd("ftp://jobs.test/1")
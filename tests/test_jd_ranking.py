@@ -0,0 +1,73 @@
+from langchain.schema import Document
+import pytest
+
+from backend.db import crud
+from backend.utils import jd_ranking
+from backend.utils.analysis_pipeline import index_jd, index_resumes, store_jd
+from backend.utils.vector_store import LocalVectorStore
+
+RESUME = "Ada Lovelace. Backend engineer: Python, PostgreSQL, Kubernetes and Kafka in production."
+
+
+@pytest.fixture
+def jd_index(tmp_path):
+  return LocalVectorStore(str(tmp_path / "jds"))
+
+
+@pytest.fixture
+def embedder_calls(monkeypatch):
+  calls = []
+  for embedder in (jd_ranking.jd_embedder, jd_ranking.resume_embedder):
+    original = embedder.embed_documents
+    monkeypatch.setattr(embedder, "embed_documents", lambda texts, original = original: calls.append(len(texts)) or original(texts))
+  return calls
+
+
+def _indexed_resume(user, resume_index):
+  created = crud.create_resume({"text": RESUME}, user.id, "cv.txt", f"rank-{user.id}")
+  index_resumes([(created, [Document(page_content = RESUME, metadata = {})])], user.id, resume_index)
+  return crud.get_resume_by_id(created.id)
+
+
+def _analyzed_jd(user, resume, jd_index, text):
+  jd = store_jd(text, None)
+  index_jd(jd, [Document(page_content = text, metadata = {})], user.id, jd_index)
+  return crud.create_analysis({"jd_id": jd.id, "result": {}}, resume.id, user.id)
+
+
+def test_stored_jds_and_resumes_are_scored_from_their_indexed_vectors(user, resume_index, jd_index, embedder_calls):
+  resume = _indexed_resume(user, resume_index)
+  close = _analyzed_jd(user, resume, jd_index, f"{user.id} Python and Kubernetes backend engineer, PostgreSQL and Kafka")
+  far = _analyzed_jd(user, resume, jd_index, f"{user.id} Pastry chef for a busy bakery, sourdough and croissants")
+  embedder_calls.clear()
+
+  ranking = jd_ranking.rank_jds_for_resume(resume_index, jd_index, user.id, resume, [], [far.id, close.id])
+
+  assert embedder_calls == []
+  assert [entry["jd_id"] for entry in ranking] == [close.jd_id, far.jd_id]
+  assert ranking[0]["similarity"] > ranking[1]["similarity"]
+
+
+def test_jds_that_were_never_indexed_are_embedded(user, resume_index, jd_index, embedder_calls, monkeypatch):
+  resume = _indexed_resume(user, resume_index)
+  embedder_calls.clear()
+  monkeypatch.setattr(jd_ranking, "load_jd", lambda url: [Document(page_content = f"{url} Python engineer", metadata = {"source": url})])
+
+  ranking = jd_ranking.rank_jds_for_resume(resume_index, jd_index, user.id, resume, ["https://jobs.test/new"], [])
+
+  assert embedder_calls == [1]
+  assert ranking[0]["source"] == "https://jobs.test/new"
+  assert "similarity" in ranking[0]
+
+
+def test_analyze_top_is_capped(user, resume_index, jd_index, monkeypatch):
+  resume = _indexed_resume(user, resume_index)
+  monkeypatch.setattr(jd_ranking, "RANKING_MAX_ANALYZE_TOP", 2)
+  monkeypatch.setattr(jd_ranking, "load_jd", lambda url: [Document(page_content = f"{url} Python engineer", metadata = {"source": url})])
+  analyzed = []
+  monkeypatch.setattr(jd_ranking, "_analyze", lambda index, user_id, resume, jd: analyzed.append(jd["source"]))
+
+  urls = [f"https://jobs.test/{user.id}/{n}" for n in range(4)]
+  jd_ranking.rank_jds_for_resume(resume_index, jd_index, user.id, resume, urls, [], analyze_top = 50)
+
+  assert len(analyzed) == 2
@@ -0,0 +1,181 @@
+from threading import Event, Lock
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+import httpx
+import openai
+import pytest
+
+from backend.chains import llm_gateway
+from backend.chains.llm_gateway import LLMGateway, LLMUnavailableError, TokenBucket
+
+MESSAGES = [HumanMessage(content = "hello")]
+
+
+class Clock:
+  def __init__(self):
+    self.now = 1000.0
+
+  def __call__(self) -> float:
+    return self.now
+
+
+def _rate_limited() -> openai.RateLimitError:
+  response = httpx.Response(429, headers = {"retry-after": "0"}, request = httpx.Request("POST", "http://llm.test/v1/chat/completions"))
+  return openai.RateLimitError("rate limited", response = response, body = None)
+
+
+# Fails the first `failures` calls with `error`, then answers
+class FakeClient:
+  def __init__(self, failures: int = 0, error = _rate_limited, total_tokens: int | None = None):
+    self.failures = failures
+    self.error = error
+    self.total_tokens = total_tokens
+    self.calls = 0
+    self._lock = Lock()
+
+  def _next(self) -> int:
+    with self._lock:
+      self.calls += 1
+      return self.calls
+
+  def _answer(self, n: int) -> AIMessage:
+    if n <= self.failures:
+      raise self.error()
+    usage = {"input_tokens": 0, "output_tokens": self.total_tokens, "total_tokens": self.total_tokens} if self.total_tokens else None
+    return AIMessage(content = f"answer {n}", usage_metadata = usage)
+
+  def call(self) -> AIMessage:
+    return self._answer(self._next())
+
+  async def acall(self) -> AIMessage:
+    return self._answer(self._next())
+
+
+@pytest.fixture
+def clock(monkeypatch):
+  fake = Clock()
+  monkeypatch.setattr(time, "monotonic", fake)
+  return fake
+
+
+def test_bucket_serves_its_capacity_then_reports_the_wait(clock):
+  bucket = TokenBucket(60)
+
+  assert bucket.reserve(60) == 0.0
+  # One per second refill, so a caller two units into debt waits two seconds
+  assert bucket.reserve(2) == pytest.approx(2.0)
+
+  clock.now += 3
+  assert bucket.reserve(1) == 0.0
+
+
+def test_bucket_refill_is_capped_at_capacity(clock):
+  bucket = TokenBucket(60)
+
+  clock.now += 3600
+  assert bucket.reserve(60) == 0.0
+  assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_bucket_adjust_charges_the_difference_from_the_estimate(clock):
+  bucket = TokenBucket(60)
+  bucket.reserve(30)
+
+  bucket.adjust(40)
+  assert bucket.reserve(1) == pytest.approx(11.0)
+
+  bucket.adjust(-100)
+  assert bucket.reserve(60) == 0.0
+
+
+def test_retryable_errors_are_retried_until_an_answer():
+  client = FakeClient(failures = 2)
+
+  message = LLMGateway().call("gpt-4o-mini", MESSAGES, client.call)
+
+  assert message.content == "answer 3"
+  assert client.calls == 3
+
+
+def test_exhausted_retries_raise_llm_unavailable():
+  client = FakeClient(failures = llm_gateway.MAX_ATTEMPTS)
+
+  with pytest.raises(LLMUnavailableError) as raised:
+    LLMGateway().call("gpt-4o-mini", MESSAGES, client.call)
+
+  assert client.calls == llm_gateway.MAX_ATTEMPTS
+  assert raised.value.retry_after == 0.0
+  assert isinstance(raised.value.__cause__, openai.RateLimitError)
+
+
+def test_other_errors_are_not_retried():
+  client = FakeClient(failures = 1, error = lambda: ValueError("bad request"))
+
+  with pytest.raises(ValueError):
+    LLMGateway().call("gpt-4o-mini", MESSAGES, client.call)
+
+  assert client.calls == 1
+
+
+def test_async_calls_retry_the_same_way():
+  client = FakeClient(failures = 1)
+
+  message = asyncio.run(LLMGateway().acall("gpt-4o-mini", MESSAGES, client.acall))
+
+  assert message.content == "answer 2"
+  assert client.calls == 2
+
+
+def test_reported_usage_settles_the_token_bucket(clock):
+  gateway = LLMGateway()
+  estimate = gateway.estimate_tokens("gpt-4o-mini", MESSAGES)
+  level = gateway.tokens._level
+
+  gateway.call("gpt-4o-mini", MESSAGES, FakeClient(total_tokens = estimate + 500).call)
+
+  # Only the usage beyond the estimate is charged on top of the reservation
+  assert gateway.tokens._level == pytest.approx(level - estimate - 500)
+
+
+def test_a_slow_call_is_hedged_with_a_second_request(monkeypatch):
+  monkeypatch.setattr(llm_gateway, "HEDGE_AFTER_SECONDS", 0.05)
+  release = Event()
+  calls = []
+
+  def call():
+    calls.append(len(calls))
+    if len(calls) == 1:
+      release.wait(timeout = 5)
+      return AIMessage(content = "slow")
+    return AIMessage(content = "fast")
+
+  try:
+    assert LLMGateway().call("gpt-4o-mini", MESSAGES, call).content == "fast"
+    assert len(calls) == 2
+  finally:
+    release.set()
+
+
+def test_a_prompt_call_is_not_hedged(monkeypatch):
+  monkeypatch.setattr(llm_gateway, "HEDGE_AFTER_SECONDS", 5)
+  client = FakeClient()
+
+  assert LLMGateway().call("gpt-4o-mini", MESSAGES, client.call).content == "answer 1"
+  assert client.calls == 1
+
+
+def test_a_failed_hedge_falls_back_to_the_other_request(monkeypatch):
+  monkeypatch.setattr(llm_gateway, "HEDGE_AFTER_SECONDS", 0.05)
+  calls = []
+
+  def call():
+    calls.append(len(calls))
+    if len(calls) == 1:
+      time.sleep(0.2)
+      return AIMessage(content = "slow")
+    raise _rate_limited()
+
+  assert LLMGateway().call("gpt-4o-mini", MESSAGES, call).content == "slow"
+  assert len(calls) == 2
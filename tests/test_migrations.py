@@ -0,0 +1,93 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+import pytest
+
+from backend.db import crud, session as db_session
+from backend.db.models import Base
+
+MIGRATIONS = Path(__file__).resolve().parents[1] / "backend" / "db" / "migrations"
+
+# The schema deployments had before any migration existed, as the original models created it
+baseline = sa.MetaData()
+sa.Table(
+  "users", baseline,
+  sa.Column("id", sa.Integer, primary_key = True),
+  sa.Column("name", sa.String, nullable = False),
+  sa.Column("email", sa.String, unique = True),
+  sa.Column("created_at", sa.DateTime),
+  sa.Column("password_hash", sa.String, nullable = False),
+)
+sa.Table(
+  "resumes", baseline,
+  sa.Column("id", sa.Integer, primary_key = True),
+  sa.Column("filename", sa.String, nullable = False, unique = True),
+  sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable = False),
+  sa.Column("text", sa.Text),
+  sa.Column("created_at", sa.DateTime(timezone = True), server_default = sa.func.now()),
+)
+sa.Table(
+  "analyses", baseline,
+  sa.Column("id", sa.Integer, primary_key = True),
+  sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable = False),
+  sa.Column("resume_id", sa.Integer, sa.ForeignKey("resumes.id"), nullable = False),
+  sa.Column("jd_text", sa.Text, nullable = False),
+  sa.Column("result", sa.JSON, nullable = False),
+  sa.Column("created_at", sa.DateTime(timezone = True), server_default = sa.func.now()),
+)
+
+
+@pytest.fixture
+def legacy_engine(tmp_path, monkeypatch):
+  url = f"sqlite:///{tmp_path}/legacy.db"
+  engine = sa.create_engine(url)
+  baseline.create_all(engine)
+
+  with engine.begin() as conn:
+    conn.execute(sa.text("INSERT INTO users (id, name, email, password_hash) VALUES (1, 'a', 'a@legacy', 'x'), (2, 'b', 'b@legacy', 'x')"))
+    conn.execute(sa.text("INSERT INTO resumes (id, filename, user_id, text) VALUES (1, 'cv.pdf', 1, 'legacy resume')"))
+    conn.execute(sa.text("INSERT INTO analyses (id, user_id, resume_id, jd_text, result) VALUES (1, 1, 1, 'legacy jd', '{\"analysis\": {\"match_score\": 0.4}}')"))
+
+  # Importing the app runs create_all, which adds the new tables but never alters existing ones
+  Base.metadata.create_all(engine)
+
+  # env.py reads the app's DATABASE_URL; no ini file, so the test run's logging config is left alone
+  monkeypatch.setattr(db_session, "DATABASE_URL", url)
+  config = Config()
+  config.set_main_option("script_location", str(MIGRATIONS))
+  command.upgrade(config, "head")
+
+  yield engine
+  engine.dispose()
+
+
+def test_upgrading_a_baseline_database_supports_the_resume_crud_paths(legacy_engine):
+  with Session(legacy_engine, expire_on_commit = False) as db:
+    legacy = crud.get_resume_by_id(1, db = db)
+    assert legacy.text == "legacy resume"
+    assert legacy.vector_count is None
+
+    crud.set_resume_vector_count(1, 3, db = db)
+    assert crud.get_resume_by_id(1, db = db).vector_count == 3
+
+    # Filenames are no longer unique across users
+    other = crud.create_resume({"text": "another resume"}, 2, "cv.pdf", "hash-b", db = db)
+    assert crud.get_resume_by_hash("hash-b", 2, db = db).id == other.id
+    assert [row.filename for row in crud.list_resume_summaries(2, db = db)] == ["cv.pdf"]
+    db.commit()
+
+    analysis = crud.list_analysis_summaries(1, db = db)[0]
+    assert analysis.match_score == 0.4
+
+
+def test_upgraded_resumes_table_matches_the_model(legacy_engine):
+  inspector = sa.inspect(legacy_engine)
+
+  columns = {column["name"] for column in inspector.get_columns("resumes")}
+  assert columns == {column.name for column in Base.metadata.tables["resumes"].columns}
+
+  uniques = {tuple(unique["column_names"]) for unique in inspector.get_unique_constraints("resumes")}
+  assert uniques == {("user_id", "content_hash")}
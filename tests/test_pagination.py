@@ -0,0 +1,84 @@
+import datetime
+
+import pytest
+
+from backend.db import crud
+from backend.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, optional_number, page_size, split_page
+
+
+class Row:
+  def __init__(self, row_id: int, created_at: datetime.datetime):
+    self.id = row_id
+    self.created_at = created_at
+
+
+def test_cursors_round_trip_timestamps_and_scores():
+  created_at = datetime.datetime(2026, 10, 18, 12, 30, 5, 123456, tzinfo = datetime.timezone.utc)
+
+  assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+  assert decode_cursor(encode_cursor(0.875, 7), parse = float) == (0.875, 7)
+  assert "=" not in encode_cursor(created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(0.5, 1), "W1td"])
+def test_malformed_cursors_raise_value_error(cursor):
+  with pytest.raises(ValueError, match = "Invalid cursor"):
+    decode_cursor(cursor)
+
+
+def test_missing_cursor_means_first_page():
+  assert decode_cursor(None) is None
+  assert decode_cursor("") is None
+
+
+def test_page_size_is_clamped():
+  assert page_size(None) == DEFAULT_PAGE_SIZE
+  assert page_size("0") == 1
+  assert page_size(str(MAX_PAGE_SIZE + 1)) == MAX_PAGE_SIZE
+  with pytest.raises(ValueError):
+    page_size("ten")
+
+
+def test_split_page_only_returns_a_cursor_when_another_page_exists():
+  start = datetime.datetime(2026, 1, 1)
+  rows = [Row(n, start - datetime.timedelta(minutes = n)) for n in range(1, 5)]
+
+  assert split_page(rows[:3], 3) == (rows[:3], None)
+
+  page, cursor = split_page(rows, 3)
+  assert page == rows[:3]
+  assert decode_cursor(cursor) == (rows[2].created_at, 3)
+
+
+def test_score_pages_walk_every_analysis_once_in_score_order(user):
+  resume = crud.create_resume({"text": "paged"}, user.id, "paged.txt", f"paged-{user.id}")
+  jd = crud.get_or_create_job_description(f"paged-jd-{user.id}", "Paged JD")
+  # Repeated scores make the id the tie breaker across page boundaries
+  scores = [0.9, 0.5, 0.5, 0.5, 0.7, 0.1, 0.5]
+  for score in scores:
+    crud.create_analysis({"jd_id": jd.id, "result": {"analysis": {"match_score": score}}}, resume.id, user.id)
+
+  seen, after = [], None
+  while True:
+    rows, cursor = split_page(crud.list_analyses_by_score(user.id, jd_id = jd.id, after = after, limit = 2), 2, key = "match_score")
+    seen.extend(rows)
+    if not cursor:
+      break
+    after = decode_cursor(cursor, parse = float)
+
+  assert [row.match_score for row in seen] == sorted(scores, reverse = True)
+  assert len({row.id for row in seen}) == len(scores)
+
+
+def test_optional_numbers_reject_malformed_values_instead_of_ignoring_them():
+  args = {"min_score": "0.75", "jd_id": "12", "max_score": "high", "limit": "nan"}
+
+  assert optional_number(args, "min_score") == 0.75
+  assert optional_number(args, "jd_id", parse = int) == 12
+  assert optional_number(args, "missing") is None
+  with pytest.raises(ValueError, match = "max_score must be a number"):
+    optional_number(args, "max_score")
+  with pytest.raises(ValueError, match = "finite"):
+    optional_number(args, "limit")
+  with pytest.raises(ValueError, match = "jd_id"):
+    optional_number({"jd_id": "1.5"}, "jd_id", parse = int)
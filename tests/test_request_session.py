@@ -0,0 +1,87 @@
+import itertools
+
+from flask import Flask, jsonify
+import pytest
+
+from backend.app import routes_bp
+from backend.db import crud
+from backend.db.models import User
+from backend.db.session import request_session
+
+_emails = itertools.count(1)
+
+
+@pytest.fixture
+def app():
+  app = Flask(__name__)
+  app.register_blueprint(routes_bp)
+  return app
+
+
+def _email() -> str:
+  return f"session{next(_emails)}@tests.local"
+
+
+def test_writes_are_committed_before_a_successful_response(app):
+  email = _email()
+
+  @app.post("/ok")
+  def ok():
+    user = crud.create_user("ok", email, "x")
+    # Same session for every crud call in the request, and nothing is committed yet
+    assert crud.get_user_by_email(email) is user
+    return jsonify({"id": user.id}), 201
+
+  response = app.test_client().post("/ok")
+
+  assert response.status_code == 201
+  assert crud.get_user_by_email(email).id == response.json["id"]
+
+
+def test_a_failed_commit_turns_into_an_error_response(app):
+  email = _email()
+
+  @app.post("/conflict")
+  def conflict():
+    # Passes the view but violates NOT NULL when the request session commits
+    request_session().add(User(name = None, email = email, password_hash = "x"))
+    return jsonify({"created": True}), 201
+
+  response = app.test_client().post("/conflict")
+
+  assert response.status_code == 500
+  assert "could not be saved" in response.json["error"]
+  assert crud.get_user_by_email(email) is None
+
+
+def test_error_responses_roll_back(app):
+  email = _email()
+
+  @app.post("/rejected")
+  def rejected():
+    crud.create_user("rejected", email, "x")
+    return jsonify({"error": "bad input"}), 400
+
+  assert app.test_client().post("/rejected").status_code == 400
+  assert crud.get_user_by_email(email) is None
+
+
+def test_unhandled_errors_roll_back(app):
+  email = _email()
+  app.config["PROPAGATE_EXCEPTIONS"] = False
+
+  @app.post("/boom")
+  def boom():
+    crud.create_user("boom", email, "x")
+    raise RuntimeError("boom")
+
+  assert app.test_client().post("/boom").status_code == 500
+  assert crud.get_user_by_email(email) is None
+
+
+def test_code_outside_a_request_commits_its_own_session():
+  email = _email()
+
+  crud.create_user("private", email, "x")
+
+  assert crud.get_user_by_email(email) is not None
@@ -0,0 +1,66 @@
+from langchain.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
+
+from backend.chains.versioning import chain_fingerprint
+from backend.db import crud
+from backend.utils import result_cache, resume_jd_match_utils
+from backend.utils.result_cache import get_cached_result, store_result, text_hash
+
+RESULT = {"extracted": {"name": "Ada"}, "analysis": {"match_score": 0.6}, "written": {"overall_rating": "Moderate Match"}}
+
+
+class Report(BaseModel):
+  summary: str
+
+
+def test_a_stored_result_is_found_again_and_replays_its_stages():
+  store_result("Ada  Lovelace\nPython", "Python engineer", RESULT)
+
+  stages = []
+  cached = get_cached_result(" Ada Lovelace Python ", "Python engineer", on_stage = lambda stage, data: stages.append((stage, data)))
+
+  assert cached == RESULT
+  assert stages == [("extracted", {"extracted": {"name": "Ada"}}), ("analyzed", {"analysis": {"match_score": 0.6}}), ("written", {"written": {"overall_rating": "Moderate Match"}})]
+  assert get_cached_result("Ada Lovelace Python", "Go engineer") is None
+
+
+def test_a_new_pipeline_version_invalidates_stored_results(monkeypatch):
+  store_result("Grace Hopper COBOL", "COBOL engineer", RESULT)
+  monkeypatch.setattr(result_cache, "PIPELINE_VERSION", "0" * 16)
+
+  assert get_cached_result("Grace Hopper COBOL", "COBOL engineer") is None
+
+
+def test_storing_the_same_key_twice_keeps_the_first_result():
+  store_result("Alan Turing maths", "Cryptographer", RESULT)
+  store_result("Alan Turing maths", "Cryptographer", {"written": {"overall_rating": "Weak Match"}})
+
+  assert get_cached_result("Alan Turing maths", "Cryptographer") == RESULT
+  assert crud.get_pipeline_result(text_hash("Alan Turing maths"), text_hash("Cryptographer"), result_cache.PIPELINE_VERSION).result == RESULT
+
+
+def test_the_fingerprint_changes_with_prompt_model_and_schema():
+  prompt = ChatPromptTemplate.from_messages([("system", "Summarize."), ("user", "{text}")])
+  base = chain_fingerprint(prompt, "gpt-4o-mini", Report)
+
+  class DescribedReport(BaseModel):
+    summary: str = Field(..., description = "Three sentences")
+
+  assert chain_fingerprint(ChatPromptTemplate.from_messages([("system", "Summarize."), ("user", "{text}")]), "gpt-4o-mini", Report) == base
+  assert chain_fingerprint(ChatPromptTemplate.from_messages([("system", "Summarize briefly."), ("user", "{text}")]), "gpt-4o-mini", Report) != base
+  assert chain_fingerprint(prompt, "gpt-4o", Report) != base
+  assert chain_fingerprint(prompt, "gpt-4o-mini", DescribedReport) != base
+
+
+def test_a_repeat_match_is_served_from_the_cache(monkeypatch):
+  runs = []
+  def run(resume_text, jd_text, *args, **kwargs):
+    runs.append(resume_text)
+    return RESULT
+  monkeypatch.setattr(resume_jd_match_utils, "run_resume_pipeline", run)
+
+  for _ in range(2):
+    result = resume_jd_match_utils.match_resume_with_retrieval(None, 1, "Rust engineer", resume_text = "Linus Rust kernel", extraction = "extraction")
+
+  assert result == RESULT
+  assert runs == ["Linus Rust kernel"]
@@ -0,0 +1,22 @@
+from backend.schemas.extractor_schema import ExtractedResume
+from backend.utils import resume_extraction
+
+
+def _fake_extractor(calls):
+  def extract(resume_text):
+    calls.append(resume_text)
+    return ExtractedResume(name = resume_text.split()[0], skills = [], experiences = [], education = [], certifications = [], summary = "")
+  return extract
+
+
+def test_extractions_are_keyed_by_the_text_that_was_extracted(monkeypatch):
+  calls = []
+  monkeypatch.setattr(resume_extraction, "get_resume_extractor_chain", _fake_extractor(calls))
+
+  # Two accounts posting different text for the same file must not share an extraction
+  assert resume_extraction.get_or_extract("Alice keyed-by-text python").name == "Alice"
+  assert resume_extraction.get_or_extract("Mallory keyed-by-text python").name == "Mallory"
+
+  # Whitespace-only differences normalize to the same text and reuse the stored row
+  assert resume_extraction.get_or_extract("Alice  keyed-by-text\npython").name == "Alice"
+  assert len(calls) == 2
@@ -0,0 +1,39 @@
+from backend.chains.llm_gateway import count_tokens
+from backend.utils import resume_jd_match_utils
+from backend.utils.context_builder import fit_resume
+
+
+def _stub_pipeline(monkeypatch, seen):
+  def run(resume_text, jd_text, *args, extraction = None, **kwargs):
+    seen.update(resume_text = resume_text, jd_text = jd_text, extraction = extraction)
+    return {"analysis": {"match_score": 0.5}}
+  monkeypatch.setattr(resume_jd_match_utils, "run_resume_pipeline", run)
+
+
+def test_stored_resume_text_is_fitted_to_the_resume_budget(monkeypatch):
+  seen, extracted = {}, []
+  _stub_pipeline(monkeypatch, seen)
+  monkeypatch.setattr(resume_jd_match_utils, "get_or_extract", lambda text: extracted.append(text) or "extraction")
+  monkeypatch.setattr(resume_jd_match_utils, "fit_resume", lambda text: fit_resume(text, budget = 200))
+
+  resume = "\n\n".join(f"- budgeted {n}: Python and Kubernetes experience at company {n}" for n in range(500))
+  result = resume_jd_match_utils.match_resume_with_retrieval(None, 1, "Python engineer", resume_text = resume)
+
+  assert result == {"analysis": {"match_score": 0.5}}
+  assert count_tokens(seen["resume_text"]) <= 200
+  assert extracted == [seen["resume_text"]]
+  assert seen["extraction"] == "extraction"
+
+
+def test_without_stored_text_the_context_is_built_from_retrieved_chunks(monkeypatch):
+  seen = {}
+  _stub_pipeline(monkeypatch, seen)
+  chunks = [
+    {"text": "Kubernetes operator work", "metadata": {"chunk_index": 3}},
+    {"text": "Python services", "metadata": {"chunk_index": 0}},
+  ]
+  monkeypatch.setattr(resume_jd_match_utils, "query_resume_chunks_for_jd", lambda index, resume_id, jd_text, top_k: chunks)
+
+  resume_jd_match_utils.match_resume_with_retrieval(None, 1, "Python engineer")
+
+  assert seen["resume_text"] == "Python services\n...\nKubernetes operator work"
@@ -0,0 +1,26 @@
+from langchain.schema import Document
+
+from backend.db import crud
+from backend.utils.screening import rank_resumes_by_similarity
+
+
+def test_ranking_sizes_top_k_from_the_chunks_indexed_in_the_same_run(user, resume_index, monkeypatch):
+  long_text = " ".join(f"line {n} python sql kubernetes" for n in range(200))
+  created = [
+    crud.create_resume({"text": f"{n} {long_text}"}, user.id, f"r{n}.txt", f"screen-{user.id}-{n}")
+    for n in range(2)
+  ]
+  # Loaded the way a screening job loads them, before anything is indexed
+  resumes = crud.get_resumes_by_ids([resume.id for resume in created], user.id)
+  assert all(resume.vector_count is None for resume in resumes)
+
+  top_ks = []
+  original = resume_index.query
+  monkeypatch.setattr(resume_index, "query", lambda **kwargs: top_ks.append(kwargs["top_k"]) or original(**kwargs))
+
+  ranked = rank_resumes_by_similarity(resume_index, user.id, resumes, [Document(page_content = "python and sql engineer")])
+
+  stored = sum(crud.get_resume_by_id(resume.id).vector_count for resume in resumes)
+  assert stored > len(resumes)
+  assert top_ks == [stored]
+  assert all(score > 0 for _, score in ranked)
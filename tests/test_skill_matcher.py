@@ -0,0 +1,29 @@
+from backend.utils.skill_matcher import SkillMatcher, get_matcher, prescore
+
+
+def test_everyday_words_that_share_a_skill_name_do_not_match():
+  text = "We go to great lengths to excel, express ideas clearly and git r done with a grade of C."
+
+  assert get_matcher().find_skills(text) == set()
+
+
+def test_explicit_synonyms_match_whole_tokens_only():
+  skills = get_matcher().find_skills("Built services in Golang and C language; versioned with GitHub, analysed in Microsoft Excel and Express.js")
+
+  assert skills == {"Go", "C", "Git", "Excel", "Express"}
+  assert get_matcher().find_skills("javascript") == {"JavaScript"}
+
+
+def test_display_names_are_not_patterns():
+  matcher = SkillMatcher({"Go": ["golang"]})
+
+  assert matcher.find_skills("let's go") == set()
+  assert matcher.find_skills("golang") == {"Go"}
+
+
+def test_prescore_counts_skills_missing_from_the_resume():
+  skills = prescore("python and postgres", "Python, PostgreSQL and Kubernetes")
+
+  assert skills.matched == {"Python", "PostgreSQL"}
+  assert skills.missing == {"Kubernetes"}
+  assert skills.score == round(2 / 3, 4)
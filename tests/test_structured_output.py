@@ -0,0 +1,102 @@
+import json
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessage, HumanMessage
+import pytest
+
+from backend.chains import structured_output
+from backend.chains.structured_output import build_prompt, parse_native, response_format, structured_chain
+from backend.schemas.analyzer_schema import AnalysisResult
+
+MESSAGES = [HumanMessage(content = "Analyze this resume")]
+VALID = {"match_score": 0.7, "matched_skills": ["Python"], "missing_skills": ["Go"], "strengths": ["APIs"], "weaknesses": ["No Go"]}
+
+
+# Answers every call in order and records the response_format each call was bound with
+class ScriptedLLM:
+  def __init__(self, *answers: str):
+    self.answers = list(answers)
+    self.calls = []
+
+  def bind(self, response_format: dict):
+    llm = self
+
+    class Bound:
+      def invoke(self, messages):
+        llm.calls.append((response_format, messages))
+        return AIMessage(content = llm.answers.pop(0))
+
+    return Bound()
+
+
+def test_the_response_format_is_a_strict_json_schema():
+  schema_format = response_format(AnalysisResult)
+  schema = schema_format["json_schema"]["schema"]
+
+  assert schema_format["type"] == "json_schema"
+  assert schema_format["json_schema"]["strict"] is True
+  assert schema["additionalProperties"] is False
+  assert set(schema["required"]) == set(AnalysisResult.model_fields)
+
+
+def test_format_instructions_are_only_added_in_parser_mode(monkeypatch):
+  native = build_prompt("You analyze resumes.", "{resume}", AnalysisResult)
+  assert "format_instructions" not in native.partial_variables
+
+  monkeypatch.setattr(structured_output, "STRUCTURED_OUTPUT", "parser")
+  parser = build_prompt("You analyze resumes.", "{resume}", AnalysisResult)
+  system = parser.format_messages(resume = "cv")[0].content
+  assert system.startswith("You analyze resumes.")
+  assert "match_score" in system
+
+
+def test_a_valid_answer_needs_no_follow_up():
+  llm = ScriptedLLM()
+
+  assert parse_native(llm, AnalysisResult, MESSAGES, AIMessage(content = json.dumps(VALID))) == AnalysisResult(**VALID)
+  assert llm.calls == []
+
+
+def test_only_the_failing_fields_are_asked_for_again():
+  broken = dict(VALID, match_score = "high")
+  del broken["weaknesses"]
+  llm = ScriptedLLM(json.dumps({"match_score": 0.4, "weaknesses": ["No Go"], "strengths": ["ignored"]}))
+
+  repaired = parse_native(llm, AnalysisResult, MESSAGES, AIMessage(content = json.dumps(broken)))
+
+  assert repaired == AnalysisResult(**dict(VALID, match_score = 0.4))
+  response, follow_up = llm.calls[0]
+  assert set(response["json_schema"]["schema"]["properties"]) == {"match_score", "weaknesses"}
+  assert follow_up[:-2] == MESSAGES
+  assert "match_score, weaknesses" in follow_up[-1].content
+
+
+def test_truncated_json_keeps_the_fields_it_already_has():
+  truncated = json.dumps(VALID)[:-25]
+  llm = ScriptedLLM(json.dumps({"weaknesses": ["No Go"]}))
+
+  assert parse_native(llm, AnalysisResult, MESSAGES, AIMessage(content = truncated)) == AnalysisResult(**VALID)
+
+
+def test_an_answer_still_invalid_after_repair_raises():
+  llm = ScriptedLLM(json.dumps({"match_score": "unknown"}))
+
+  with pytest.raises(OutputParserException):
+    parse_native(llm, AnalysisResult, MESSAGES, AIMessage(content = json.dumps(dict(VALID, match_score = "high"))))
+
+
+def test_a_refusal_raises_without_a_repair():
+  llm = ScriptedLLM()
+  refusal = AIMessage(content = "", additional_kwargs = {"refusal": "I can't help with that."})
+
+  with pytest.raises(OutputParserException, match = "refused"):
+    parse_native(llm, AnalysisResult, MESSAGES, refusal)
+  assert llm.calls == []
+
+
+def test_the_native_chain_binds_the_schema_and_validates():
+  llm = ScriptedLLM(json.dumps(VALID))
+  prompt = build_prompt("You analyze resumes.", "{resume}", AnalysisResult)
+
+  assert structured_chain(prompt, llm, AnalysisResult).invoke({"resume": "cv"}) == AnalysisResult(**VALID)
+  assert llm.calls[0][0] == response_format(AnalysisResult)
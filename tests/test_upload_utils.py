@@ -0,0 +1,99 @@
+import hashlib
+import io
+
+from flask import Flask, jsonify, request
+from werkzeug.datastructures import FileStorage
+import pytest
+
+from backend.app import routes_bp
+from backend.utils.upload_utils import MAX_REQUEST_BYTES, UploadTooLarge, read_upload
+
+kept = []
+
+
+class Unseekable(io.RawIOBase):
+  def __init__(self, data: bytes):
+    self._data = io.BytesIO(data)
+
+  def readable(self) -> bool:
+    return True
+
+  def read(self, size = -1) -> bytes:
+    return self._data.read(size)
+
+
+@pytest.fixture
+def client():
+  app = Flask(__name__)
+  app.register_blueprint(routes_bp)
+
+  @app.post("/upload")
+  def upload():
+    # Kept past the end of the request, like a background job would
+    kept.append(read_upload(request.files["resume"]))
+    return jsonify({"content_hash": kept[-1].content_hash})
+
+  yield app.test_client()
+  while kept:
+    kept.pop().close()
+
+
+def test_upload_reuses_the_spooled_request_stream_and_outlives_the_request(client):
+  data = b"resume bytes " * 1000
+
+  response = client.post("/upload", data = {"resume": (io.BytesIO(data), "cv.txt")})
+
+  assert response.json["content_hash"] == hashlib.sha256(data).hexdigest()
+  upload, = kept
+  assert upload.size == len(data)
+  assert upload.read() == data
+
+
+def test_oversized_bodies_are_rejected_by_the_app_config(client):
+  assert client.application.config["MAX_CONTENT_LENGTH"] == MAX_REQUEST_BYTES
+
+  response = client.post("/upload", data = {"resume": (io.BytesIO(b"x" * (MAX_REQUEST_BYTES + 1)), "cv.txt")})
+
+  assert response.status_code == 413
+  assert kept == []
+
+
+def test_an_explicit_content_length_limit_is_left_alone():
+  app = Flask(__name__)
+  app.config["MAX_CONTENT_LENGTH"] = 1024
+  app.register_blueprint(routes_bp)
+
+  assert app.config["MAX_CONTENT_LENGTH"] == 1024
+
+
+def test_read_upload_takes_over_the_file_stream():
+  stream = io.BytesIO(b"resume")
+  stream.read()
+  storage = FileStorage(stream, filename = "../cv.txt")
+
+  upload = read_upload(storage)
+  storage.close()
+
+  assert upload.file is stream
+  assert upload.read() == b"resume"
+  assert upload.filename == "cv.txt"
+  upload.close()
+
+
+def test_read_upload_copies_streams_it_cannot_rewind():
+  upload = read_upload(FileStorage(Unseekable(b"resume"), filename = "cv.txt"))
+
+  assert upload.read() == b"resume"
+  assert upload.content_hash == hashlib.sha256(b"resume").hexdigest()
+  upload.close()
+
+
+def test_files_over_the_upload_limit_raise():
+  storage = FileStorage(io.BytesIO(b"x" * 100), filename = "cv.txt")
+
+  with pytest.raises(UploadTooLarge) as raised:
+    read_upload(storage, max_bytes = 10)
+
+  assert raised.value.limit == 10
+  # The stream still belongs to werkzeug, which closes it with the request
+  assert not storage.stream.closed
@@ -0,0 +1,67 @@
+from langchain.schema import Document
+
+from backend.embeddings.resume_embeddings import embed_chunks
+from backend.utils import res_pc
+from backend.utils.vector_manifest import VectorManifest, document_hash, vector_id
+
+
+def test_repeated_chunks_in_one_document_get_distinct_ids(user, resume_index):
+  boilerplate = "References available on request."
+  chunks = [Document(page_content = text, metadata = {"resume_id": 1}) for text in (boilerplate, "Python and SQL", boilerplate)]
+
+  vectors = embed_chunks(chunks, user.id)
+  res_pc.upsert_vectors(resume_index, vectors)
+
+  assert len({v["id"] for v in vectors}) == 3
+  assert len(resume_index.query([1.0] * 384, top_k = 10, filter = {"user_id": {"$eq": user.id}})["matches"]) == 3
+
+
+def test_vector_ids_are_stable_and_whitespace_insensitive():
+  assert vector_id("res", 1, "doc", 0, "Python  and\nSQL") == vector_id("res", 1, "doc", 0, "Python and SQL")
+  assert vector_id("res", 1, "doc", 0, "Python") != vector_id("res", 1, "doc", 1, "Python")
+  assert vector_id("res", 1, "doc", 0, "Python") != vector_id("res", 2, "doc", 0, "Python")
+
+
+def test_document_hash_depends_on_chunk_boundaries():
+  joined = [Document(page_content = "ab")]
+  split = [Document(page_content = "a"), Document(page_content = "b")]
+
+  assert document_hash(joined) != document_hash(split)
+  assert document_hash(split) == document_hash([Document(page_content = " a "), Document(page_content = "b")])
+
+
+def test_mark_indexed_and_forget(tmp_path):
+  manifest = VectorManifest(str(tmp_path / "manifest.sqlite3"))
+
+  assert not manifest.is_indexed("resumes", 1, "doc-a")
+  manifest.mark_indexed("resumes", 1, "doc-a", 10, 3)
+  manifest.mark_indexed("resumes", 1, "doc-b", 11, 2)
+
+  assert manifest.is_indexed("resumes", 1, "doc-a")
+  # Scoped per index and per user
+  assert not manifest.is_indexed("jds", 1, "doc-a")
+  assert not manifest.is_indexed("resumes", 2, "doc-a")
+
+  manifest.forget("resumes", 1, 10)
+  assert not manifest.is_indexed("resumes", 1, "doc-a")
+  assert manifest.is_indexed("resumes", 1, "doc-b")
+
+  # Persisted, so another worker process sees the same state
+  assert VectorManifest(str(tmp_path / "manifest.sqlite3")).is_indexed("resumes", 1, "doc-b")
+
+
+def test_indexed_documents_skip_the_vector_store(user, resume_index, monkeypatch):
+  vectors = embed_chunks([Document(page_content = "Kubernetes operator", metadata = {"resume_id": 5})], user.id)
+  res_pc.upsert_vectors(resume_index, vectors)
+
+  upserts = []
+  monkeypatch.setattr(resume_index, "upsert", lambda batch: upserts.append(batch))
+  res_pc.upsert_vectors(resume_index, vectors)
+  assert upserts == []
+
+  # Deleting the resume's vectors forgets it, so the next upsert goes through again
+  monkeypatch.undo()
+  res_pc.delete_vectors_by_resume(resume_index, {"resume_id": 5, "user_id": user.id})
+  assert not resume_index.exists({"resume_id": {"$eq": 5}, "user_id": {"$eq": user.id}})
+  res_pc.upsert_vectors(resume_index, vectors)
+  assert resume_index.exists({"resume_id": {"$eq": 5}, "user_id": {"$eq": user.id}})
@@ -0,0 +1,94 @@
+from threading import Event, Thread
+import fcntl
+
+import numpy as np
+
+from backend.utils.vector_store import LocalVectorStore
+
+
+def _vector(*hot: int, dimension: int = 8) -> list[float]:
+  return [1.0 if i in hot else 0.0 for i in range(dimension)]
+
+
+def _store(tmp_path) -> LocalVectorStore:
+  store = LocalVectorStore(str(tmp_path / "resumes"), dimension = 8)
+  store.upsert([
+    {"id": "a", "values": _vector(0), "metadata": {"user_id": 1, "resume_id": 10, "text": "a"}},
+    {"id": "b", "values": _vector(0, 1), "metadata": {"user_id": 1, "resume_id": 11, "text": "b"}},
+    {"id": "c", "values": _vector(2), "metadata": {"user_id": 2, "resume_id": 12, "text": "c"}},
+  ])
+  return store
+
+
+def test_query_ranks_by_cosine_and_applies_filters(tmp_path):
+  store = _store(tmp_path)
+
+  matches = store.query(_vector(0), top_k = 3, filter = {"user_id": {"$eq": 1}})["matches"]
+
+  assert [m["id"] for m in matches] == ["a", "b"]
+  assert matches[0]["score"] > matches[1]["score"]
+  assert matches[0]["metadata"]["resume_id"] == 10
+
+  in_filter = store.query(_vector(0), top_k = 3, filter = {"resume_id": {"$in": [11, 12]}})["matches"]
+  assert {m["id"] for m in in_filter} == {"b", "c"}
+
+
+def test_upsert_replaces_existing_ids(tmp_path):
+  store = _store(tmp_path)
+  store.upsert([{"id": "a", "values": _vector(3), "metadata": {"user_id": 1, "resume_id": 10, "text": "moved"}}])
+
+  assert store.count == 3
+  best = store.query(_vector(3), top_k = 1)["matches"][0]
+  assert best["id"] == "a"
+  assert best["metadata"]["text"] == "moved"
+
+
+def test_delete_by_filter_and_reload_from_disk(tmp_path):
+  store = _store(tmp_path)
+  store.delete({"resume_id": {"$eq": 10}, "user_id": {"$eq": 1}})
+
+  assert not store.exists({"resume_id": {"$eq": 10}})
+  assert store.exists({"resume_id": {"$eq": 11}})
+
+  # A second handle on the same directory, as another worker process would have
+  reopened = LocalVectorStore(str(tmp_path / "resumes"), dimension = 8)
+  assert reopened.count == 2
+  assert [m["id"] for m in reopened.query(_vector(0), top_k = 5)["matches"]][0] == "b"
+
+
+def test_query_leaves_the_callers_vector_alone(tmp_path):
+  store = _store(tmp_path)
+  vector = np.asarray(_vector(0, 1), dtype = np.float32) * 3
+
+  store.query(vector, top_k = 1)
+
+  assert vector.tolist() == (np.asarray(_vector(0, 1)) * 3).tolist()
+
+
+def test_every_write_is_seen_by_other_handles(tmp_path):
+  store = _store(tmp_path)
+  reader = LocalVectorStore(str(tmp_path / "resumes"), dimension = 8)
+  assert reader.count == 3
+
+  # Back-to-back writes that a file timestamp could not tell apart
+  store.delete({"resume_id": {"$eq": 10}})
+  store.upsert([{"id": "d", "values": _vector(4), "metadata": {"user_id": 1, "resume_id": 13}}])
+
+  assert [m["id"] for m in reader.query(_vector(4), top_k = 1)["matches"]] == ["d"]
+  assert sorted(m["id"] for m in reader.query(_vector(0), top_k = 10)["matches"]) == ["b", "c", "d"]
+
+
+def test_readers_wait_for_a_writer_in_another_process(tmp_path):
+  store = _store(tmp_path)
+  finished = Event()
+
+  # A separate open file description, as a writer in another process would hold
+  with open(tmp_path / "resumes" / ".lock", "a") as writer:
+    fcntl.flock(writer, fcntl.LOCK_EX)
+    reader = Thread(target = lambda: store.query(_vector(0), top_k = 1) and finished.set())
+    reader.start()
+    assert not finished.wait(timeout = 0.2)
+    fcntl.flock(writer, fcntl.LOCK_UN)
+
+  reader.join(timeout = 5)
+  assert finished.is_set()
@@ -0,0 +1,38 @@
+from queue import Queue
+from threading import Event
+
+from backend.utils import worker_pool
+
+
+def test_submitted_tasks_run_on_a_worker_thread():
+  done = Event()
+  ran = []
+
+  assert worker_pool.submit(lambda value: ran.append(value) or done.set(), "job")
+  assert done.wait(5)
+  assert ran == ["job"]
+
+
+def test_a_failing_task_does_not_take_its_worker_down():
+  done = Event()
+
+  def fail():
+    raise RuntimeError("boom")
+
+  for _ in range(worker_pool.MAX_WORKERS):
+    assert worker_pool.submit(fail)
+  worker_pool._tasks.join()
+
+  assert worker_pool.submit(done.set)
+  assert done.wait(5)
+  assert all(worker.is_alive() for worker in worker_pool._workers)
+
+
+def test_submit_refuses_work_once_the_queue_is_full(monkeypatch):
+  # No workers drain this queue, so its single slot stays taken
+  monkeypatch.setattr(worker_pool, "_tasks", Queue(maxsize = 1))
+  monkeypatch.setattr(worker_pool, "_ensure_workers", lambda: None)
+
+  assert worker_pool.submit(print)
+  assert not worker_pool.submit(print)
+  assert worker_pool.pending() == 1